@@ -0,0 +1,191 @@
+# Admission control for the AI processing endpoints
+# Each processing call holds a worker for the whole Whisper+GPT+scrape chain, so only a few run at once
+# and a short queue absorbs bursts; the rest are shed with 503 so read endpoints keep their threads
+
+from flask import Blueprint, jsonify, Response
+from functools import wraps
+from typing import Dict, Any, Optional
+import asyncio
+import math
+import os
+import threading
+import time
+
+bp = Blueprint('admission', __name__)
+
+PROCESSING_MAX_CONCURRENT = int(os.getenv('PROCESSING_MAX_CONCURRENT', '4'))
+PROCESSING_MAX_QUEUE = int(os.getenv('PROCESSING_MAX_QUEUE', '8'))
+PROCESSING_MAX_WAIT_SECONDS = float(os.getenv('PROCESSING_MAX_WAIT_SECONDS', '5'))
+RETRY_AFTER_MAX_SECONDS = 60
+
+# The ASGI app's processing endpoints hold no thread while they wait on the network, so far more run at once
+ASYNC_PROCESSING_MAX_CONCURRENT = int(os.getenv('ASYNC_PROCESSING_MAX_CONCURRENT', '64'))
+ASYNC_PROCESSING_MAX_QUEUE = int(os.getenv('ASYNC_PROCESSING_MAX_QUEUE', '32'))
+
+class AdmissionController:
+    """
+    Bounded concurrency limiter with a short FIFO wait queue
+    Up to max_concurrent callers run; up to max_queue more wait at most max_wait_seconds for a slot.
+    Anything beyond that is rejected immediately.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._next_ticket = 0
+        self._serving = 0  # Ticket at the head of the queue, so slots go to waiters in arrival order
+        self._skipped = set()  # Tickets that gave up before reaching the head
+
+        self._admitted = 0
+        self._rejected_queue_full = 0
+        self._rejected_timeout = 0
+        self._peak_waiting = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._service_seconds_avg = 0.0  # EWMA of how long admitted calls hold a slot
+
+    def _admit_now(self) -> Optional[bool]:
+        """True with a free slot and nobody queued, False with a full queue, None when the caller has to queue"""
+        if self._active < self.max_concurrent and self._waiting == 0:
+            self._active += 1
+            self._admitted += 1
+            return True
+
+        if self._waiting >= self.max_queue:
+            self._rejected_queue_full += 1
+            return False
+        return None
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed; False when the caller should be shed"""
+        started = time.monotonic()
+        with self._cond:
+            admitted = self._admit_now()
+            if admitted is not None:
+                return admitted
+
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._waiting += 1
+            self._peak_waiting = max(self._peak_waiting, self._waiting)
+            wait_until = started + self.max_wait_seconds
+
+            try:
+                while self._active >= self.max_concurrent or self._serving != ticket:
+                    remaining = wait_until - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+
+                self._active += 1
+                self._admitted += 1
+                waited_ms = (time.monotonic() - started) * 1000
+                self._wait_ms_total += waited_ms
+                self._wait_ms_max = max(self._wait_ms_max, waited_ms)
+                return True
+            finally:
+                self._waiting -= 1
+                if self._serving == ticket:
+                    self._serving += 1
+                elif ticket > self._serving:
+                    # Timed out while queued: later tickets must not wait on this one
+                    self._skipped.add(ticket)
+                while self._serving in self._skipped:
+                    self._skipped.discard(self._serving)
+                    self._serving += 1
+                self._cond.notify_all()
+
+    async def acquire_async(self) -> bool:
+        """acquire() for the event loop: only callers that have to queue wait, on a worker thread"""
+        with self._cond:
+            admitted = self._admit_now()
+        if admitted is not None:
+            return admitted
+        return await asyncio.to_thread(self.acquire)
+
+    def release(self, held_seconds: float = None):
+        with self._cond:
+            self._active -= 1
+            if held_seconds is not None:
+                self._service_seconds_avg = held_seconds if not self._service_seconds_avg else 0.8 * self._service_seconds_avg + 0.2 * held_seconds
+            self._cond.notify_all()
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: roughly how long it takes the queue ahead of it to drain"""
+        with self._cond:
+            backlog = self._active + self._waiting
+            estimate = self._service_seconds_avg * backlog / max(1, self.max_concurrent)
+        return max(1, min(RETRY_AFTER_MAX_SECONDS, math.ceil(estimate)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, wait time and shedding counters for ops"""
+        with self._cond:
+            admitted = self._admitted
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._waiting,
+                "peak_queue_depth": self._peak_waiting,
+                "admitted": self._admitted,
+                "rejected_queue_full": self._rejected_queue_full,
+                "rejected_timeout": self._rejected_timeout,
+                "wait_ms_avg": round(self._wait_ms_total / admitted, 1) if admitted else 0.0,
+                "wait_ms_max": round(self._wait_ms_max, 1),
+                "service_seconds_avg": round(self._service_seconds_avg, 2)
+            }
+
+# Shared by /api/process-audio, /api/process-sample and /api/process-batch
+processing_admission = AdmissionController(
+    "processing", PROCESSING_MAX_CONCURRENT, PROCESSING_MAX_QUEUE, PROCESSING_MAX_WAIT_SECONDS
+)
+
+# Shared by the async /api/process-audio and /api/process-sample of the ASGI app (asgi.py)
+async_processing_admission = AdmissionController(
+    "async_processing", ASYNC_PROCESSING_MAX_CONCURRENT, ASYNC_PROCESSING_MAX_QUEUE, PROCESSING_MAX_WAIT_SECONDS
+)
+
+def admission_controlled(controller: AdmissionController):
+    """
+    Decorator for endpoints behind a limiter
+    Shed requests get 503 with Retry-After; streamed responses keep their slot until the stream closes
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not controller.acquire():
+                retry_after = controller.retry_after()
+                response = jsonify({"error": "Server busy processing other requests, please retry shortly", "retry_after": retry_after})
+                response.status_code = 503
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+
+            started = time.monotonic()
+            released = False
+            try:
+                result = fn(*args, **kwargs)
+                if isinstance(result, Response) and result.is_streamed:
+                    result.call_on_close(lambda: controller.release(time.monotonic() - started))
+                    released = True
+                return result
+            finally:
+                if not released:
+                    controller.release(time.monotonic() - started)
+        return wrapper
+    return decorator
+
+@bp.route('/api/ops/admission', methods=['GET'])
+def get_admission_stats():
+    """Expose processing queue depth, wait time and shed counts"""
+    return jsonify({"admission": {controller.name: controller.snapshot() for controller in (processing_admission, async_processing_admission)}})
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
\ No newline at end of file
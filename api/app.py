@@ -1,7 +1,7 @@
 # Main Flask application combining all API endpoints
 # PRD: backend: Python Flask with simple REST API structure
 
-from flask import Flask, request, jsonify
+from flask import Flask, jsonify
 from flask_cors import CORS
 import sys
 import os
@@ -9,15 +9,32 @@ import os
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(__file__))
 
-from process_audio import app as audio_app
-from inventory import app as inventory_app  
-from skus import app as skus_app
-from categories import app as categories_app
-from auth import app as auth_app
+from process_audio import bp as audio_bp
+from batch import bp as batch_bp
+from chunked_upload import bp as chunked_upload_bp
+from inventory import bp as inventory_bp
+from skus import bp as skus_bp
+from categories import bp as categories_bp
+from auth import bp as auth_bp
+from session_tokens import bp as session_tokens_bp
+from search import bp as search_bp
+from sku_suggest import bp as sku_suggest_bp
+from locations import bp as locations_bp
+from image_pipeline import bp as images_bp
+from metrics import bp as metrics_bp, install_metrics
+from responses import install_responses
+from circuit_breaker import bp as breakers_bp
+from openai_client import bp as openai_bp
+from admission import bp as admission_bp
+from profiling import bp as profiling_bp, install_profiler, PROFILING_ENABLED
+from uploads import configure_uploads
 
 # Create main Flask app
 app = Flask(__name__)
 CORS(app)
+configure_uploads(app)
+install_metrics(app)
+install_responses(app)
 
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
@@ -29,38 +46,30 @@ def health_check():
         "endpoints": [
             "/api/process-audio",
             "/api/inventory", 
+            "/api/inventory/export",
+            "/api/inventory/locations",
             "/api/skus",
+            "/api/skus/suggest",
+            "/api/skus/export",
+            "/api/search",
             "/api/categories",
             "/api/auth/login",
-            "/api/auth/signup"
+            "/api/auth/signup",
+            "/api/auth/logout"
         ]
     })
 
-# Import and register route handlers
-from process_audio import process_audio, process_sample
-from inventory import get_inventory, create_inventory_item
-from skus import get_skus, create_sku
-from categories import get_categories
-from auth import login, signup
+# One app for every endpoint: each feature module contributes a blueprint with its routes
+# Heavy SDKs (OpenAI, Firestore, Scrapegraphai, BeautifulSoup, Pillow) are imported by the code that
+# first uses them, so a cold start for e.g. GET /api/categories only loads Flask and these modules
+for blueprint in (audio_bp, batch_bp, chunked_upload_bp, inventory_bp, skus_bp, categories_bp, auth_bp,
+                  session_tokens_bp, search_bp, sku_suggest_bp, locations_bp, images_bp, metrics_bp, breakers_bp,
+                  openai_bp, admission_bp, profiling_bp):
+    app.register_blueprint(blueprint)
 
-# Register audio processing routes
-app.add_url_rule('/api/process-audio', 'process_audio', process_audio, methods=['POST'])
-app.add_url_rule('/api/process-sample', 'process_sample', process_sample, methods=['POST'])
-
-# Register inventory routes  
-app.add_url_rule('/api/inventory', 'get_inventory', get_inventory, methods=['GET'])
-app.add_url_rule('/api/inventory', 'create_inventory_item', create_inventory_item, methods=['POST'])
-
-# Register SKU routes
-app.add_url_rule('/api/skus', 'get_skus', get_skus, methods=['GET'])
-app.add_url_rule('/api/skus', 'create_sku', create_sku, methods=['POST'])
-
-# Register categories route
-app.add_url_rule('/api/categories', 'get_categories', get_categories, methods=['GET'])
-
-# Register authentication routes
-app.add_url_rule('/api/auth/login', 'login', login, methods=['POST'])
-app.add_url_rule('/api/auth/signup', 'signup', signup, methods=['POST'])
+# Opt-in per-request profiling: PROFILING_ENABLED=true plus an X-Profile header on the request
+if PROFILING_ENABLED:
+    install_profiler(app)
 
 # Vercel serverless handler
 def handler(request):
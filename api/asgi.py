@@ -0,0 +1,293 @@
+# ASGI entry point: the processing endpoints run on an event loop, every other route is the Flask app
+#   uvicorn asgi:app --app-dir api --port 5000
+# A blocking /api/process-* call holds a WSGI thread through Whisper, GPT, the search and three page fetches;
+# here those are tasks awaiting the network, so one worker process keeps dozens of pipelines in flight.
+# All other routes (and CORS preflights) run unchanged on a thread pool through WsgiAdapter.
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(__file__))
+
+from app import app as flask_app
+from admission import async_processing_admission
+from deadline import request_deadline
+from metrics import collect_request_timings, record_request, server_timing_header
+from pipeline import PipelineAbort
+from process_audio import ANALYSIS_PIPELINE, AUDIO_PIPELINE
+from uploads import AudioSpool, UploadRejected, get_audio_uploads
+import http_cache
+import openai_client
+
+# Threads for Flask routes and for reading multipart uploads
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '32'))
+
+_wsgi_executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS)
+
+class ReceiveStream(io.RawIOBase):
+    """
+    wsgi.input for a request whose body is still arriving over ASGI
+    Read from a worker thread; each chunk is awaited on the event loop, so uploads stream instead of being buffered
+    """
+
+    def __init__(self, receive: Callable[[], Awaitable[Dict[str, Any]]], loop: asyncio.AbstractEventLoop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b''
+        self._more = True
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                raise ConnectionError("Client disconnected during upload")
+            self._buffer = message.get('body', b'')
+            self._more = message.get('more_body', False)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+def build_environ(scope: Dict[str, Any], body) -> Dict[str, Any]:
+    """WSGI environ for an ASGI HTTP scope (PEP 3333)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,  # Chunked bodies without Content-Length read until the stream ends
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            key = 'CONTENT_TYPE'
+        elif name == 'CONTENT_LENGTH':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+class WsgiAdapter:
+    """
+    Serves a WSGI app from ASGI
+    The app runs on a worker thread with the request body streamed in; response chunks are sent as the
+    iterable yields them, so streamed responses (batch NDJSON) keep streaming and closing them still
+    runs call_on_close hooks such as admission release
+    """
+
+    def __init__(self, wsgi_app, executor: ThreadPoolExecutor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope: Dict[str, Any], receive, send):
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, io.BufferedReader(ReceiveStream(receive, loop)))
+        await loop.run_in_executor(self.executor, self._run, environ, send, loop)
+
+    def _run(self, environ: Dict[str, Any], send, loop: asyncio.AbstractEventLoop):
+        state = {"status": None, "headers": None, "started": False}
+
+        def send_sync(message: Dict[str, Any]):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            if exc_info and state["started"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["status"] = int(status.split(' ', 1)[0])
+            state["headers"] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return write
+
+        def write(data: bytes):
+            if not state["started"]:
+                send_sync({"type": "http.response.start", "status": state["status"], "headers": state["headers"]})
+                state["started"] = True
+            if data:
+                send_sync({"type": "http.response.body", "body": data, "more_body": True})
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                write(chunk)
+            if not state["started"]:
+                write(b'')
+            send_sync({"type": "http.response.body", "body": b'', "more_body": False})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+async def read_body(receive) -> bytes:
+    """Whole request body, for small JSON requests"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionError("Client disconnected")
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+def _read_uploads(environ: Dict[str, Any]) -> List[AudioSpool]:
+    # Flask's request class streams multipart file parts into AudioSpools with the usual size and format checks;
+    # only an app context is pushed (for MAX_CONTENT_LENGTH), since popping a request context closes the files
+    with flask_app.app_context():
+        return get_audio_uploads('audio', flask_app.request_class(environ))
+
+async def process_sample(scope: Dict[str, Any], receive) -> Tuple[int, Dict[str, Any]]:
+    """
+    Async /api/process-sample
+    PRD: samples: "A CTA to use a sample text (instead of recording) and do the full real processing experience (no simulating)"
+    """
+    try:
+        data = json.loads(await read_body(receive) or b'null')
+    except ValueError:
+        return 400, {"error": "Invalid JSON body"}
+    sample_text = data.get('sample_text', '') if isinstance(data, dict) else ''
+
+    if not sample_text:
+        return 400, {"error": "No sample text provided"}
+
+    try:
+        result = await ANALYSIS_PIPELINE.run_async({"transcription": sample_text, "transcription_confidence": 1.0}, request_deadline())
+    except PipelineAbort as e:
+        return e.status, {"error": e.message}
+
+    response_data = result["response"]
+    response_data["stage_timings_ms"] = result.timings
+    return 200, response_data
+
+async def process_audio(scope: Dict[str, Any], receive) -> Tuple[int, Dict[str, Any]]:
+    """
+    Async /api/process-audio
+    PRD: processing_pipeline: audio_handling -> data_extraction -> web_research -> response_format
+    """
+    loop = asyncio.get_running_loop()
+    environ = build_environ(scope, io.BufferedReader(ReceiveStream(receive, loop)))
+    try:
+        uploads = await loop.run_in_executor(_wsgi_executor, _read_uploads, environ)
+    except UploadRejected as e:
+        return e.status, {"error": e.message}
+
+    if not uploads:
+        return 400, {"error": "No audio file provided"}
+
+    for extra in uploads[1:]:
+        extra.close()
+    audio = uploads[0]
+
+    with audio:
+        try:
+            result = await AUDIO_PIPELINE.run_async({"audio": audio, "transcription_confidence": 0.9}, request_deadline())
+        except PipelineAbort as e:
+            return e.status, {"error": e.message}
+
+    response_data = result["response"]
+    response_data["stage_timings_ms"] = result.timings
+    return 200, response_data
+
+# Served on the event loop; any other method or path goes to Flask
+ASYNC_ROUTES = {
+    ('POST', '/api/process-sample'): process_sample,
+    ('POST', '/api/process-audio'): process_audio
+}
+
+def _headers_of(scope: Dict[str, Any]) -> Dict[str, str]:
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+async def _send_json(send, status: int, payload: Dict[str, Any], headers: List[Tuple[str, str]]) -> int:
+    # Serialized by Flask's JSON provider, so bodies match what the WSGI routes return
+    body = (flask_app.json.dumps(payload) + "\n").encode('utf-8')
+    headers = [('content-type', 'application/json'), ('content-length', str(len(body)))] + headers
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+    return len(body)
+
+async def serve_async_route(handler, scope: Dict[str, Any], receive, send):
+    """Admission control, error handling, CORS and metrics around one async processing endpoint"""
+    started = time.perf_counter()
+    timings = collect_request_timings()
+    request_headers = _headers_of(scope)
+    headers = []
+    # Same answer as flask-cors with its defaults: echo the origin
+    if 'origin' in request_headers:
+        headers += [('access-control-allow-origin', request_headers['origin']), ('vary', 'Origin')]
+
+    if not await async_processing_admission.acquire_async():
+        retry_after = async_processing_admission.retry_after()
+        status = 503
+        payload = {"error": "Server busy processing other requests, please retry shortly", "retry_after": retry_after}
+        headers.append(('retry-after', str(retry_after)))
+    else:
+        admitted = time.monotonic()
+        try:
+            status, payload = await handler(scope, receive)
+        except Exception as e:
+            status, payload = 500, {"error": f"Processing failed: {str(e)}"}
+        finally:
+            async_processing_admission.release(time.monotonic() - admitted)
+
+    elapsed = time.perf_counter() - started
+    headers.append(('server-timing', server_timing_header(timings, elapsed)))
+    response_bytes = await _send_json(send, status, payload, headers)
+    request_bytes = int(request_headers.get('content-length') or 0)
+    record_request(scope['path'], scope['method'], status, elapsed, request_bytes, response_bytes)
+
+async def lifespan(receive, send):
+    """Close the pooled async clients on shutdown"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({"type": "lifespan.startup.complete"})
+        elif message['type'] == 'lifespan.shutdown':
+            await http_cache.close_async_client()
+            await openai_client.close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+wsgi = WsgiAdapter(flask_app, _wsgi_executor)
+
+async def app(scope: Dict[str, Any], receive, send):
+    """ASGI 3 application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+    if handler is not None:
+        await serve_async_route(handler, scope, receive, send)
+    else:
+        await wsgi(scope, receive, send)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='127.0.0.1', port=5000)
\ No newline at end of file
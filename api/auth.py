@@ -1,16 +1,15 @@
 # Authentication endpoints for custom user collection
 # Aligns with existing Firestore users collection schema
+# Users are stored under a document ID derived from the normalized email, so login is one point read and
+# signup one atomic create(); migrate_user_ids.py moves users created under random IDs
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask import Blueprint, request, jsonify
 import hashlib
-import secrets
-from firebase_admin import firestore
-from firebase_config import get_firestore_client
-from datetime import datetime
+from firebase_config import get_firestore_client, server_timestamp, FirestoreCollections
+from metrics import timed
+from session_tokens import issue_token
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint('auth', __name__)
 
 def hash_password(password: str) -> str:
     """Hash password using SHA-256 to match existing schema"""
@@ -20,7 +19,18 @@ def verify_password(password: str, password_hash: str) -> bool:
     """Verify password against hash"""
     return hashlib.sha256(password.encode()).hexdigest() == password_hash
 
-@app.route('/api/auth/login', methods=['POST'])
+def normalize_email(email: str) -> str:
+    return email.lower().strip()
+
+def user_doc_id(email: str) -> str:
+    """
+    Document ID of a user in the users collection
+    A hash rather than the address itself: emails may contain '/', which document IDs cannot, and the ID
+    ends up in session tokens and created_by fields
+    """
+    return hashlib.sha256(normalize_email(email).encode('utf-8')).hexdigest()
+
+@bp.route('/api/auth/login', methods=['POST'])
 def login():
     """
     Login with email and password using custom user collection
@@ -32,30 +42,28 @@ def login():
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({"error": "Email and password required"}), 400
         
-        email = data['email'].lower().strip()
+        email = normalize_email(data['email'])
         password = data['password']
         
         db = get_firestore_client()
         if not db:
             return jsonify({"error": "Database connection failed"}), 500
         
-        # Query user by email
-        users_ref = db.collection('users')
-        query = users_ref.where('email', '==', email).limit(1)
-        docs = list(query.stream())
+        # Point read of the user's document
+        with timed("firestore", "users.get"):
+            user_doc = db.collection(FirestoreCollections.USERS).document(user_doc_id(email)).get()
         
-        if not docs:
+        if not user_doc.exists:
             return jsonify({"error": "Invalid email or password"}), 401
         
-        user_doc = docs[0]
         user_data = user_doc.to_dict()
         
         # Verify password
         if not verify_password(password, user_data.get('password_hash', '')):
             return jsonify({"error": "Invalid email or password"}), 401
         
-        # Generate session token (simplified for demo)
-        session_token = secrets.token_urlsafe(32)
+        # Signed session token, verified on protected routes without a database read
+        session = issue_token(user_doc.id)
         
         # Return user data (excluding password_hash)
         return jsonify({
@@ -66,13 +74,14 @@ def login():
                 "name": user_data['name'],
                 "created_at": user_data['created_at']
             },
-            "token": session_token
+            "token": session["token"],
+            "expires_at": session["expires_at"]
         })
         
     except Exception as e:
         return jsonify({"error": f"Login failed: {str(e)}"}), 500
 
-@app.route('/api/auth/signup', methods=['POST'])
+@bp.route('/api/auth/signup', methods=['POST'])
 def signup():
     """
     Create new user account using custom user collection
@@ -84,7 +93,7 @@ def signup():
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({"error": "Email and password required"}), 400
         
-        email = data['email'].lower().strip()
+        email = normalize_email(data['email'])
         password = data['password']
         name = data.get('name', email.split('@')[0])  # Default name from email
         
@@ -99,42 +108,42 @@ def signup():
         if not db:
             return jsonify({"error": "Database connection failed"}), 500
         
-        # Check if user already exists
-        users_ref = db.collection('users')
-        existing_query = users_ref.where('email', '==', email).limit(1)
-        existing_docs = list(existing_query.stream())
-        
-        if existing_docs:
-            return jsonify({"error": "User with this email already exists"}), 400
-        
         # Create new user following existing schema
         user_data = {
             "email": email,
             "name": name,
             "password_hash": hash_password(password),
-            "created_at": firestore.SERVER_TIMESTAMP
+            "created_at": server_timestamp()
         }
         
-        # Add to Firestore
-        doc_ref = users_ref.add(user_data)
+        # create() fails if the document exists, so two signups for one email cannot both succeed
+        from google.api_core.exceptions import AlreadyExists
+        user_ref = db.collection(FirestoreCollections.USERS).document(user_doc_id(email))
+        try:
+            with timed("firestore", "users.create"):
+                write_result = user_ref.create(user_data)
+        except AlreadyExists:
+            return jsonify({"error": "User with this email already exists"}), 400
         
-        # Generate session token (simplified for demo)
-        session_token = secrets.token_urlsafe(32)
+        # Signed session token, verified on protected routes without a database read
+        session = issue_token(user_ref.id)
         
         # Return user data (excluding password_hash)
         return jsonify({
             "success": True,
             "user": {
-                "id": doc_ref[1].id,
+                "id": user_ref.id,
                 "email": email,
                 "name": name,
-                "created_at": user_data['created_at']
+                "created_at": write_result.update_time  # The server timestamp just written
             },
-            "token": session_token
+            "token": session["token"],
+            "expires_at": session["expires_at"]
         })
         
     except Exception as e:
         return jsonify({"error": f"Signup failed: {str(e)}"}), 500
 
 if __name__ == '__main__':
+    from app import app
     app.run(debug=True)
\ No newline at end of file
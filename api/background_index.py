@@ -0,0 +1,79 @@
+# In-memory views of Firestore collections that are built by a scan and kept current by write-through
+# Used by the SKU typeahead, the location tree and search. A build runs on a background thread; requests keep using
+# the previous view until it finishes, and the first request of a process waits for the first build.
+# Writes made during a build are queued with the ID of the document they concern and replayed onto the new
+# view unless its scan already saw that document (view.seen), so an item is neither missed nor counted twice;
+# idempotent writes pass no ID and are always replayed.
+
+from typing import Any, Callable, List, Optional, Set
+from firebase_config import get_firestore_client
+import threading
+import time
+
+class BackgroundIndex:
+    """
+    build(db) returns a view object with a `seen` set of the document IDs its scan read; the set is
+    dropped once queued writes are replayed. Writes are method calls on the view: apply(doc_id, 'add', ...)
+    """
+
+    def __init__(self, name: str, build: Callable[[Any], Any], refresh_seconds: float):
+        self.name = name
+        self.build = build
+        self.refresh_seconds = refresh_seconds
+        self.index = None
+        self.built_at = 0.0
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._building = False
+        self._pending: List[tuple] = []
+
+    def _build(self):
+        started = time.time()
+        db = get_firestore_client()
+        try:
+            index = self.build(db) if db else None
+        except Exception as e:
+            print(f"{self.name} index build failed: {str(e)}")
+            index = None
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._building = False
+            if index is not None:
+                seen: Set[str] = index.seen or set()
+                for doc_id, method, args in pending:
+                    if doc_id not in seen:
+                        getattr(index, method)(*args)
+                index.seen = None
+                self.index = index
+                self.built_at = started
+            # Under the lock, so it cannot wake the waiters of a retry warm() has just started
+            self.ready.set()
+
+    def warm(self):
+        """Start a build in the background unless one is running"""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            if self.index is None:
+                # Callers without a view wait for this build, not the failed one before it
+                self.ready.clear()
+        threading.Thread(target=self._build, daemon=True).start()
+
+    def current(self, wait_seconds: float = 10.0):
+        """The current view; builds it on first use and refreshes it in the background once stale"""
+        if self.index is None:
+            self.warm()
+            self.ready.wait(wait_seconds)
+        elif time.time() - self.built_at > self.refresh_seconds:
+            self.warm()
+        return self.index
+
+    def apply(self, doc_id: Optional[str], method: str, *args):
+        """Write-through: call view.method(*args) now and on the view being built"""
+        with self._lock:
+            if self._building:
+                self._pending.append((doc_id, method, args))
+            index = self.index
+        if index is not None:
+            getattr(index, method)(*args)
\ No newline at end of file
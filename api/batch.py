@@ -0,0 +1,215 @@
+# Batch processing endpoint for onboarding a whole shelf in one call
+# PRD: processing_pipeline: audio_handling -> data_extraction -> web_research -> response_format, fanned out over many items
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List
+import copy
+import json
+import os
+import time
+from deadline import Deadline
+from process_audio import transcribe_audio, extract_equipment_data_batch, research_equipment_specs, ANALYSIS_PIPELINE
+from pipeline import PipelineAbort
+from singleflight import normalize_query
+from admission import admission_controlled, processing_admission
+from uploads import UploadRejected, get_audio_uploads
+
+bp = Blueprint('batch', __name__)
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_EXTRACTION_SIZE = int(os.getenv('BATCH_EXTRACTION_SIZE', '10'))  # Transcripts per GPT call
+BATCH_DEADLINE_SECONDS = float(os.getenv('BATCH_DEADLINE_SECONDS', '300'))
+
+def research_group_key(extracted_data: Dict[str, Any]) -> str:
+    """Items with the same brand and model share one research run"""
+    brand = normalize_query(extracted_data.get('brand', ''))
+    model = normalize_query(extracted_data.get('model', ''))
+    if brand or model:
+        return f"{brand}|{model}"
+    return normalize_query(extracted_data.get('web_search_query', ''))
+
+def _ndjson(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, default=str) + "\n"
+
+def _transcribe_item(audio, deadline: Deadline) -> str:
+    # Stage deadlines are taken when a worker starts, so queued items keep their full stage budget
+    return transcribe_audio(audio, deadline.stage("transcription"))
+
+def _extract_chunk(transcripts: List[str], deadlines: List[Deadline]) -> List[Dict[str, Any]]:
+    """Several transcripts per GPT call; the chunk shares one extraction budget, so a timeout marks every item"""
+    chunk_deadline = deadlines[0].detached("extraction chunk")
+    results = extract_equipment_data_batch(transcripts, chunk_deadline.stage("extraction"))
+    if chunk_deadline.timed_out_stages:
+        for deadline in deadlines:
+            deadline.stage("extraction").mark_timed_out()
+    return results
+
+def _research_group(extracted_data: Dict[str, Any], deadline: Deadline):
+    """Research for a brand/model group on its first item's deadline; returns (result, timed out)"""
+    research_data = research_equipment_specs(extracted_data.get('web_search_query', ''), deadline.stage("research"))
+    return research_data, "research" in deadline.timed_out_stages
+
+def _finish_item(item: Dict[str, Any], transcript: str, extracted_data: Dict[str, Any], research_data: Dict[str, Any],
+                 research_timed_out: bool, deadline: Deadline) -> Dict[str, Any]:
+    """
+    Run the remaining analysis stages for one item on the shared pipeline
+    Transcript, extraction and the group's research are passed in, so only the per-item stages run
+    """
+    if research_timed_out:
+        # The group's research ran on another item's deadline; this item's result is just as partial
+        deadline.stage("research").mark_timed_out()
+    result = ANALYSIS_PIPELINE.run({
+        "transcription": transcript,
+        "transcription_confidence": 1.0 if item.get('transcript') else 0.9,
+        "extraction": extracted_data,
+        "research": research_data
+    }, deadline)
+    return result["response"]
+
+def run_batch(items: List[Dict[str, Any]], deadline: Deadline):
+    """
+    Generator yielding one NDJSON line per item as soon as it finishes, then a summary line
+    items: [{"index": n, "audio": AudioSpool} or {"index": n, "transcript": ...}]
+    Each item moves on to its next stage as soon as the previous one lands: transcripts are extracted
+    BATCH_EXTRACTION_SIZE at a time (or as they come once no transcription is left), and items of a
+    brand/model group are finished as soon as the group's one research run returns. Every item has its own
+    deadline within the batch's, so one item running out of time does not flag the others partial.
+    """
+    started = time.monotonic()
+    item_deadlines = {item['index']: deadline.detached(f"item {item['index']}") for item in items}
+    transcripts = {}
+    extracted = {}
+    groups = {}  # research group key -> {"members": [index, ...], "research": (result, timed out) once it lands}
+    waiting = []  # Transcribed items not yet sent to extraction
+    running = {}  # future -> (step, item indexes or group key)
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+        def finish(index, research):
+            research_data, timed_out = research
+            future = executor.submit(_finish_item, items[index], transcripts[index], extracted[index],
+                                     copy.deepcopy(research_data), timed_out, item_deadlines[index])
+            running[future] = ("finish", index)
+
+        # Step 1: Transcribe audio items with bounded concurrency
+        for item in items:
+            if item.get('transcript'):
+                transcripts[item['index']] = item['transcript']
+                waiting.append(item['index'])
+            elif item.get('audio'):
+                running[executor.submit(_transcribe_item, item['audio'], item_deadlines[item['index']])] = ("transcription", item['index'])
+
+        while True:
+            # Step 2: Extract equipment data, several transcripts per GPT call
+            transcribing = any(step == "transcription" for step, _ in running.values())
+            while len(waiting) >= BATCH_EXTRACTION_SIZE or (waiting and not transcribing):
+                chunk, waiting = waiting[:BATCH_EXTRACTION_SIZE], waiting[BATCH_EXTRACTION_SIZE:]
+                future = executor.submit(_extract_chunk, [transcripts[i] for i in chunk], [item_deadlines[i] for i in chunk])
+                running[future] = ("extraction", chunk)
+
+            if not running:
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                step, target = running.pop(future)
+
+                if step == "transcription":
+                    transcript = future.result()
+                    if transcript:
+                        transcripts[target] = transcript
+                        waiting.append(target)
+                    else:
+                        failed += 1
+                        yield _ndjson({"index": target, "error": "Failed to transcribe audio"})
+
+                elif step == "extraction":
+                    for index, extracted_data in zip(target, future.result()):
+                        if not extracted_data:
+                            failed += 1
+                            yield _ndjson({"index": index, "error": "Failed to extract equipment data"})
+                            continue
+                        extracted[index] = extracted_data
+                        # Step 3: Research once per brand/model group
+                        key = research_group_key(extracted_data)
+                        group = groups.get(key)
+                        if group is None:
+                            groups[key] = {"members": [index], "research": None}
+                            running[executor.submit(_research_group, extracted_data, item_deadlines[index])] = ("research", key)
+                        elif group["research"] is None:
+                            group["members"].append(index)
+                        else:
+                            finish(index, group["research"])
+
+                elif step == "research":
+                    group = groups[target]
+                    group["research"] = future.result()
+                    # Step 4: Combine results per item, streaming every item of the group as it finishes
+                    for index in group["members"]:
+                        finish(index, group["research"])
+
+                else:
+                    try:
+                        yield _ndjson({"index": target, "result": future.result()})
+                    except PipelineAbort as e:
+                        failed += 1
+                        yield _ndjson({"index": target, "error": e.message})
+
+    yield _ndjson({
+        "done": True,
+        "count": len(items),
+        "failed": failed,
+        "research_runs": len(groups),
+        "elapsed_ms": round((time.monotonic() - started) * 1000)
+    })
+
+@bp.route('/api/process-batch', methods=['POST'])
+@admission_controlled(processing_admission)
+def process_batch():
+    """
+    Process many recordings or sample texts in one call
+    Accepts multipart `audio` files (repeated) or JSON {"sample_texts": [...]}
+    Streams NDJSON: one {"index", "result"} or {"index", "error"} line per item, in completion order
+    """
+    try:
+        items = []
+
+        if request.mimetype == 'multipart/form-data':
+            # PRD: audio_handling: "Save uploaded file temporarily, send to Whisper API"
+            # Every file is size-capped, sniffed and hashed while the upload streams in
+            try:
+                uploads = get_audio_uploads('audio')
+            except UploadRejected as e:
+                return jsonify({"error": e.message}), e.status
+            items = [{"index": index, "audio": audio} for index, audio in enumerate(uploads)]
+        else:
+            data = request.get_json(silent=True) or {}
+            sample_texts = [text for text in data.get('sample_texts', []) if isinstance(text, str) and text.strip()]
+            items = [{"index": index, "transcript": text} for index, text in enumerate(sample_texts)]
+
+        if not items:
+            return jsonify({"error": "No audio files or sample texts provided"}), 400
+
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Batch too large, maximum is {BATCH_MAX_ITEMS} items"}), 400
+
+        deadline = Deadline(BATCH_DEADLINE_SECONDS)
+
+        def generate():
+            try:
+                yield from run_batch(items, deadline)
+            finally:
+                for item in items:
+                    if item.get('audio'):
+                        item['audio'].close()
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({"error": f"Batch processing failed: {str(e)}"}), 500
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
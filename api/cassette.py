@@ -0,0 +1,222 @@
+# Record/replay of outbound HTTP and LLM calls, so the research pipeline can be benchmarked offline
+# CASSETTE_MODE=record writes every exchange to CASSETTE_PATH (one JSON object per line); CASSETTE_MODE=replay
+# serves them back in recorded order without touching the network, sleeping the recorded latency
+# scaled by CASSETTE_LATENCY_SCALE (0 replays as fast as possible)
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')
+CASSETTE_PATH = os.getenv('CASSETTE_PATH', '')
+CASSETTE_LATENCY_SCALE = float(os.getenv('CASSETTE_LATENCY_SCALE', '1.0'))
+
+MODES = ('record', 'replay')
+
+class CassetteMiss(Exception):
+    """Replay was asked for an exchange the cassette does not contain"""
+    pass
+
+class RecordedError(Exception):
+    """A failure that happened while recording, raised again on replay"""
+    pass
+
+class Cassette:
+    """
+    One recording on disk
+    Exchanges are keyed by kind ("http", "llm", ...) and a request key; repeated requests replay
+    in the order they were recorded, and the last one keeps being served once they run out
+    """
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+        if mode == 'replay':
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(f"{entry['kind']} {entry['key']}", deque()).append(entry)
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            open(path, 'w').close()  # A recording always starts from an empty cassette
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+            self.stats["recorded"] += 1
+
+    def _next(self, kind: str, key: str) -> Dict[str, Any]:
+        name = f"{kind} {key}"
+        with self._lock:
+            entries = self._entries.get(name)
+            if entries:
+                entry = self._last[name] = entries.popleft()
+            elif name in self._last:
+                entry = self._last[name]
+            else:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded {kind} exchange for {key}")
+            self.stats["replayed"] += 1
+        return entry
+
+    def _replayed(self, entry: Dict[str, Any], decode: Callable[[Any], Any], error: Callable[[str], Exception]) -> Any:
+        if "error" in entry:
+            raise error(entry["error"])
+        return decode(entry["value"]) if decode else entry["value"]
+
+    def _record(self, kind: str, key: str, started: float, value: Any = None, failure: Exception = None,
+                encode: Callable[[Any], Any] = None):
+        entry = {"kind": kind, "key": key, "latency": round(time.monotonic() - started, 4)}
+        if failure is not None:
+            entry["error"] = f"{type(failure).__name__}: {failure}"
+        else:
+            entry["value"] = encode(value) if encode else value
+        self._append(entry)
+
+    def call(self, kind: str, key: str, fn: Callable[[], Any], encode: Callable[[Any], Any] = None,
+             decode: Callable[[Any], Any] = None, error: Callable[[str], Exception] = RecordedError) -> Any:
+        """
+        Run fn() and record its result, or replay the recorded result for (kind, key)
+        encode/decode convert results to and from JSON-serializable values; failures are recorded
+        too and replayed by raising error(message)
+        """
+        if self.replaying:
+            entry = self._next(kind, key)
+            if self.latency_scale > 0:
+                time.sleep(entry["latency"] * self.latency_scale)
+            return self._replayed(entry, decode, error)
+
+        started = time.monotonic()
+        try:
+            value = fn()
+        except Exception as e:
+            self._record(kind, key, started, failure=e)
+            raise
+        self._record(kind, key, started, value, encode=encode)
+        return value
+
+    async def call_async(self, kind: str, key: str, fn: Callable[[], Awaitable[Any]], encode: Callable[[Any], Any] = None,
+                         decode: Callable[[Any], Any] = None, error: Callable[[str], Exception] = RecordedError) -> Any:
+        """call() for coroutine functions; replayed latency is awaited so other requests keep running"""
+        if self.replaying:
+            entry = self._next(kind, key)
+            if self.latency_scale > 0:
+                await asyncio.sleep(entry["latency"] * self.latency_scale)
+            return self._replayed(entry, decode, error)
+
+        started = time.monotonic()
+        try:
+            value = await fn()
+        except Exception as e:
+            self._record(kind, key, started, failure=e)
+            raise
+        self._record(kind, key, started, value, encode=encode)
+        return value
+
+_active: Optional[Cassette] = None
+
+def active() -> Optional[Cassette]:
+    """The cassette in use, or None when calls go to the network as usual"""
+    return _active
+
+@contextmanager
+def use_cassette(path: str, mode: str, latency_scale: float = 1.0):
+    """Record or replay every outbound call made inside the block, from any thread"""
+    global _active
+    previous = _active
+    _active = Cassette(path, mode, latency_scale)
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+def recorded(kind: str, key: Callable[[], str], fn: Callable[[], Any], encode: Callable[[Any], Any] = None,
+             decode: Callable[[Any], Any] = None, error: Callable[[str], Exception] = RecordedError) -> Any:
+    """fn() through the active cassette; `key` is only computed when one is in use"""
+    tape = _active
+    if tape is None:
+        return fn()
+    return tape.call(kind, key(), fn, encode, decode, error)
+
+async def recorded_async(kind: str, key: Callable[[], str], fn: Callable[[], Awaitable[Any]], encode: Callable[[Any], Any] = None,
+                         decode: Callable[[Any], Any] = None, error: Callable[[str], Exception] = RecordedError) -> Any:
+    """recorded() for coroutine functions; both share one cassette, so either path can replay the other's recording"""
+    tape = _active
+    if tape is None:
+        return await fn()
+    return await tape.call_async(kind, key(), fn, encode, decode, error)
+
+def http_key(url: str, headers: Dict[str, str] = None) -> str:
+    """Cassette key of a GET; ranged requests are keyed separately since servers may answer them with partial content"""
+    key = f"GET {url}"
+    byte_range = (headers or {}).get('Range')
+    if byte_range:
+        key += f" range={byte_range}"
+    return key
+
+def _encode_response(response) -> Dict[str, Any]:
+    return {
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "headers": dict(response.headers),
+        "body": base64.b64encode(response.content).decode('ascii')
+    }
+
+def _decode_response(url: str, value: Dict[str, Any]):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    response = requests.Response()
+    response.url = url
+    response.status_code = value["status_code"]
+    response.reason = value.get("reason")
+    response.headers = CaseInsensitiveDict(value["headers"])
+    response._content = base64.b64decode(value["body"])
+    response._content_consumed = True
+    return response
+
+def http_get(url: str, headers: Dict[str, str] = None, timeout: float = 10, stream: bool = False):
+    """
+    requests.get through the active cassette, returning a requests.Response
+    Recorded exchanges keep the whole body, so streamed reads replay from memory
+    requests is imported on the first fetch, not at startup
+    """
+    import requests
+    if _active is None:
+        return requests.get(url, headers=headers, timeout=timeout, stream=stream)
+
+    return _active.call(
+        "http", http_key(url, headers),
+        lambda: requests.get(url, headers=headers, timeout=timeout),
+        encode=_encode_response,
+        decode=lambda value: _decode_response(url, value),
+        error=requests.ConnectionError
+    )
+
+if CASSETTE_MODE in MODES and CASSETTE_PATH:
+    _active = Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY_SCALE)
+    print(f"Cassette {CASSETTE_MODE} mode: {CASSETTE_PATH}")
\ No newline at end of file
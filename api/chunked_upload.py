@@ -0,0 +1,282 @@
+# Resumable chunked audio upload for poor mobile connections
+# PRD: audio_handling: "Save uploaded file temporarily, send to Whisper API"
+# Create a session, PUT byte ranges at the acknowledged offset, then finalize to run the processing pipeline.
+# A dropped connection only costs the chunk in flight: clients ask for the offset and continue from there.
+
+from flask import Blueprint, request, jsonify
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+import fcntl
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from uploads import AudioSpool, UploadRejected, sniff_audio_format, MAX_AUDIO_BYTES, SNIFF_BYTES
+from admission import admission_controlled, processing_admission
+from process_audio import run_audio_processing
+
+bp = Blueprint('chunked_upload', __name__)
+
+UPLOAD_SESSION_DIR = os.getenv('UPLOAD_SESSION_DIR', os.path.join(tempfile.gettempdir(), 'camo-upload-sessions'))
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv('UPLOAD_SESSION_TTL_SECONDS', '3600'))
+UPLOAD_CHUNK_MAX_BYTES = int(os.getenv('UPLOAD_CHUNK_MAX_BYTES', str(5 * 1024 * 1024)))
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+def _session_dir(upload_id: str) -> Optional[str]:
+    if not _UPLOAD_ID.match(upload_id or ''):
+        return None
+    return os.path.join(UPLOAD_SESSION_DIR, upload_id)
+
+def _load_session(upload_id: str) -> Optional[Dict[str, Any]]:
+    directory = _session_dir(upload_id)
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_session(session: Dict[str, Any]):
+    directory = _session_dir(session['upload_id'])
+    tmp_path = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(session, f)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+def _data_path(upload_id: str) -> str:
+    return os.path.join(_session_dir(upload_id), 'data')
+
+def _received(upload_id: str) -> int:
+    """Bytes durably received so far; the data file is the source of truth for the resume offset"""
+    try:
+        return os.path.getsize(_data_path(upload_id))
+    except OSError:
+        return 0
+
+def _delete_session(upload_id: str):
+    shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+
+@contextmanager
+def _locked_session(upload_id: str):
+    """
+    Serialize chunk writes, finalize and cancel for one session, across worker processes
+    Yields the session as read under the lock, or None once it has been deleted or purged
+    """
+    directory = _session_dir(upload_id)
+    try:
+        f = open(os.path.join(directory, 'lock'), 'w') if directory else None
+    except FileNotFoundError:
+        f = None
+    if f is None:
+        yield None
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield _load_session(upload_id)
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def purge_expired_sessions():
+    """Remove sessions nobody has touched within the TTL"""
+    try:
+        entries = os.listdir(UPLOAD_SESSION_DIR)
+    except OSError:
+        return
+    cutoff = time.time() - UPLOAD_SESSION_TTL_SECONDS
+    for upload_id in entries:
+        directory = _session_dir(upload_id)
+        if directory is None:
+            continue
+        try:
+            if os.path.getmtime(directory) < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+        except OSError:
+            pass
+
+def _parse_content_range(header: str) -> Optional[Tuple[int, int, Optional[int]]]:
+    """'bytes 0-524287/2000000' -> (0, 524287, 2000000); total may be '*' while unknown"""
+    match = _CONTENT_RANGE.match((header or '').strip())
+    if not match:
+        return None
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == '*' else int(match.group(3))
+    if end < start or (total is not None and end >= total):
+        return None
+    return start, end, total
+
+def _session_status(session: Dict[str, Any], offset: int) -> Dict[str, Any]:
+    return {
+        "upload_id": session['upload_id'],
+        "offset": offset,
+        "size": session.get('size'),
+        "format": session.get('format'),
+        "chunk_max_bytes": UPLOAD_CHUNK_MAX_BYTES,
+        "max_bytes": MAX_AUDIO_BYTES
+    }
+
+def _with_offset(response, offset: int):
+    response.headers['Upload-Offset'] = str(offset)
+    return response
+
+@bp.route('/api/uploads', methods=['POST'])
+def create_upload_session():
+    """
+    Start a resumable upload
+    Optional JSON body: {"filename": "recording.webm", "size": total_bytes}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        size = data.get('size')
+
+        if size is not None:
+            if not isinstance(size, int) or size <= 0:
+                return jsonify({"error": "size must be a positive number of bytes"}), 400
+            if size > MAX_AUDIO_BYTES:
+                return jsonify({"error": f"Audio file is too large, maximum is {MAX_AUDIO_BYTES / (1024 * 1024):g} MB"}), 413
+
+        purge_expired_sessions()
+
+        upload_id = uuid.uuid4().hex
+        os.makedirs(_session_dir(upload_id))
+        open(_data_path(upload_id), 'wb').close()
+
+        session = {
+            "upload_id": upload_id,
+            "filename": str(data.get('filename') or 'recording'),
+            "size": size,
+            "format": None,
+            "created_at": time.time()
+        }
+        _save_session(session)
+
+        return _with_offset(jsonify(_session_status(session, 0)), 0), 201
+
+    except Exception as e:
+        return jsonify({"error": f"Failed to create upload session: {str(e)}"}), 500
+
+@bp.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """Current offset, for resuming after a dropped connection"""
+    session = _load_session(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload session not found or expired"}), 404
+    offset = _received(upload_id)
+    return _with_offset(jsonify(_session_status(session, offset)), offset)
+
+@bp.route('/api/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """
+    Append a byte range: body is the raw chunk, Content-Range: bytes start-end/total (or /*)
+    A chunk must start at or before the current offset; bytes already received are skipped, so
+    resending a chunk whose acknowledgement was lost is harmless. Gaps get 409 with the offset to resume from.
+    """
+    try:
+        if _load_session(upload_id) is None:
+            return jsonify({"error": "Upload session not found or expired"}), 404
+
+        content_range = _parse_content_range(request.headers.get('Content-Range'))
+        if content_range is None:
+            return jsonify({"error": "Content-Range header required, e.g. 'bytes 0-524287/2000000'"}), 400
+        start, end, total = content_range
+
+        length = end - start + 1
+        if length > UPLOAD_CHUNK_MAX_BYTES:
+            return jsonify({"error": f"Chunk too large, maximum is {UPLOAD_CHUNK_MAX_BYTES} bytes"}), 413
+        if (total or end + 1) > MAX_AUDIO_BYTES:
+            return jsonify({"error": f"Audio file is too large, maximum is {MAX_AUDIO_BYTES / (1024 * 1024):g} MB"}), 413
+
+        with _locked_session(upload_id) as session:
+            if session is None:
+                return jsonify({"error": "Upload session not found or expired"}), 404
+            offset = _received(upload_id)
+            if start > offset:
+                return _with_offset(jsonify({"error": "Chunk does not start at the current offset", "offset": offset}), offset), 409
+
+            if total is not None and session.get('size') not in (None, total):
+                return jsonify({"error": "Total size does not match the upload session"}), 400
+            if total is not None and session.get('size') is None:
+                session['size'] = total
+
+            chunk = request.get_data(cache=False)
+            if len(chunk) != length:
+                return _with_offset(jsonify({"error": "Body length does not match Content-Range", "offset": offset}), offset), 400
+
+            # Only the part past the current offset is new
+            new_bytes = chunk[offset - start:]
+            if new_bytes:
+                with open(_data_path(upload_id), 'ab') as f:
+                    f.write(new_bytes)
+                    f.flush()
+                    os.fsync(f.fileno())
+                offset += len(new_bytes)
+
+            # Reject non-audio as soon as the header bytes are in, not after the whole file
+            if session.get('format') is None and offset >= SNIFF_BYTES:
+                with open(_data_path(upload_id), 'rb') as f:
+                    session['format'] = sniff_audio_format(f.read(SNIFF_BYTES))
+                if session['format'] is None:
+                    _delete_session(upload_id)
+                    return jsonify({"error": f"Audio file {session['filename']} is not a supported audio format"}), 415
+
+            _save_session(session)
+
+        return _with_offset(jsonify(_session_status(session, offset)), offset)
+
+    except Exception as e:
+        return jsonify({"error": f"Failed to store chunk: {str(e)}"}), 500
+
+@bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload_session(upload_id):
+    """Abandon an upload and free its disk space"""
+    with _locked_session(upload_id) as session:
+        if session is None:
+            return jsonify({"error": "Upload session not found or expired"}), 404
+        _delete_session(upload_id)
+    return jsonify({"success": True})
+
+@bp.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+@admission_controlled(processing_admission)
+def finalize_upload(upload_id):
+    """
+    Complete the upload and run the same processing as /api/process-audio
+    The session is kept if processing fails, so finalize can be retried without re-uploading
+    """
+    try:
+        with _locked_session(upload_id) as session:
+            if session is None:
+                return jsonify({"error": "Upload session not found or expired"}), 404
+            offset = _received(upload_id)
+            if session.get('size') is not None and offset != session['size']:
+                return _with_offset(jsonify({"error": "Upload incomplete", "offset": offset, "size": session['size']}), offset), 409
+
+            # Re-read through an AudioSpool for the same size/format checks and content hash as direct uploads
+            audio = AudioSpool(session['filename'])
+            try:
+                with open(_data_path(upload_id), 'rb') as f:
+                    for chunk in iter(lambda: f.read(64 * 1024), b''):
+                        audio.write(chunk)
+                audio.finish()
+            except UploadRejected as e:
+                audio.close()
+                _delete_session(upload_id)
+                return jsonify({"error": e.message}), e.status
+
+            response = run_audio_processing(audio)
+            status = response[1] if isinstance(response, tuple) else response.status_code
+            if status < 400:
+                _delete_session(upload_id)
+            return response
+
+    except Exception as e:
+        return jsonify({"error": f"Processing failed: {str(e)}"}), 500
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
\ No newline at end of file
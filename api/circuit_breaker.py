@@ -0,0 +1,149 @@
+# Circuit breakers for the external backends used by the processing pipeline
+# When Google, Scrapegraphai or OpenAI start failing, requests skip them immediately instead of waiting for each failure
+
+from flask import Blueprint, jsonify
+from collections import deque
+from typing import Dict, Any
+import os
+import threading
+import time
+
+bp = Blueprint('circuit_breaker', __name__)
+
+# Rolling window and thresholds, shared by all backends unless overridden
+BREAKER_WINDOW_SECONDS = float(os.getenv('BREAKER_WINDOW_SECONDS', '60'))
+BREAKER_MIN_REQUESTS = int(os.getenv('BREAKER_MIN_REQUESTS', '5'))
+BREAKER_ERROR_RATE = float(os.getenv('BREAKER_ERROR_RATE', '0.5'))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """
+    Rolling error-rate circuit breaker
+    closed: calls flow, outcomes are recorded in a time window
+    open: calls are rejected until open_seconds have passed
+    half_open: a single probe call is let through; its outcome closes or re-opens the breaker
+    """
+
+    def __init__(self, name: str, window_seconds: float = BREAKER_WINDOW_SECONDS, min_requests: int = BREAKER_MIN_REQUESTS,
+                 error_rate: float = BREAKER_ERROR_RATE, open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, succeeded)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at = None
+        self._rejected = 0
+        self._last_error = None
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_started_at = None
+        print(f"Circuit breaker '{self.name}' opened")
+
+    def allow_request(self) -> bool:
+        """Whether a call to this backend should be attempted right now"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._probe_started_at = None
+
+            if self._state == HALF_OPEN:
+                # Only one probe at a time; a probe that never reported back is retried after open_seconds
+                if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                    self._probe_started_at = now
+                    return True
+                self._rejected += 1
+                return False
+
+            if self._state == OPEN:
+                self._rejected += 1
+                return False
+
+            return True
+
+    def record_success(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                print(f"Circuit breaker '{self.name}' closed")
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self, error: Any = None):
+        now = time.monotonic()
+        with self._lock:
+            self._last_error = str(error)[:200] if error else None
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+
+            self._outcomes.append((now, False))
+            self._trim(now)
+
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if self._state == CLOSED and len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.error_rate:
+                self._open(now)
+
+    def release_probe(self):
+        """For a call given up without an outcome (e.g. out of request time): the next request may probe"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_started_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state for ops dashboards"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            total = len(self._outcomes)
+            return {
+                "state": self._state,
+                "window_requests": total,
+                "window_failures": failures,
+                "error_rate": round(failures / total, 3) if total else 0.0,
+                "rejected": self._rejected,
+                "retry_in_seconds": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if self._state == OPEN else 0,
+                "last_error": self._last_error
+            }
+
+# One breaker per external backend
+BREAKERS = {
+    "scrapegraphai": CircuitBreaker("scrapegraphai"),
+    "google": CircuitBreaker("google"),
+    "openai": CircuitBreaker("openai")
+}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the breaker for a backend, creating one with default settings if needed"""
+    if name not in BREAKERS:
+        BREAKERS[name] = CircuitBreaker(name)
+    return BREAKERS[name]
+
+@bp.route('/api/ops/breakers', methods=['GET'])
+def get_breaker_states():
+    """Expose circuit breaker state for ops"""
+    return jsonify({
+        "breakers": {name: breaker.snapshot() for name, breaker in BREAKERS.items()}
+    })
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
@@ -0,0 +1,92 @@
+# Per-request deadlines and stage time budgets for the processing pipeline
+# Keeps process_audio / process_sample inside the serverless execution limit so finished work is returned
+
+from typing import Optional
+import os
+import time
+
+# Overall wall-clock budget for one processing request, below the serverless function limit
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '25'))
+
+# Time kept back at the end of a request for combining results and serializing the response
+RESPONSE_RESERVE_SECONDS = 1.0
+
+# Upper bound for each pipeline stage; a stage never gets more than what is left of the request
+STAGE_BUDGETS = {
+    "transcription": 10.0,
+    "extraction": 8.0,
+    "research": 12.0,
+    "images": 4.0
+}
+
+# Fetches are not attempted with less time than this
+MIN_FETCH_SECONDS = 0.5
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage has no time left to start"""
+    pass
+
+class Deadline:
+    """
+    Absolute point in time a request (or one of its stages) must finish by
+    Stages derive child deadlines so a slow stage cannot eat the budget of the ones after it
+    """
+
+    def __init__(self, seconds: float, parent: Optional['Deadline'] = None, name: str = 'request'):
+        expires_at = time.monotonic() + max(0.0, seconds)
+        if parent is not None:
+            expires_at = min(expires_at, parent.expires_at)
+        self.expires_at = expires_at
+        self.name = name
+        # Stages that ran out of time are recorded on the request-level deadline
+        self.root = parent.root if parent is not None else self
+        self.timed_out_stages = []
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for one blocking call: the smaller of `cap` and the remaining time"""
+        return min(cap, self.remaining())
+
+    def split(self, parts: int, cap: float = None) -> float:
+        """Share of the remaining time for each of `parts` sequential calls"""
+        share = self.remaining() / max(1, parts)
+        return min(cap, share) if cap is not None else share
+
+    def stage(self, name: str) -> 'Deadline':
+        """Child deadline for a named stage from STAGE_BUDGETS, leaving the response reserve untouched"""
+        budget = min(STAGE_BUDGETS.get(name, self.remaining()), self.remaining() - RESPONSE_RESERVE_SECONDS)
+        return Deadline(budget, parent=self, name=name)
+
+    def detached(self, name: str) -> 'Deadline':
+        """
+        A request-level deadline ending when this one does, but recording its own timed-out stages
+        For work that shares one deadline and is reported separately, like the items of a batch
+        """
+        deadline = Deadline(self.remaining(), name=name)
+        deadline.expires_at = self.expires_at
+        return deadline
+
+    def mark_timed_out(self):
+        """Record that this stage was cut short so the response can be flagged as partial"""
+        if self.name not in self.root.timed_out_stages:
+            self.root.timed_out_stages.append(self.name)
+
+    def check(self, what: str = "stage"):
+        """Raise DeadlineExceeded if there is no time left to start `what`"""
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+def request_deadline() -> Deadline:
+    """Create the deadline for one incoming processing request"""
+    return Deadline(REQUEST_DEADLINE_SECONDS)
+
+def unbounded() -> Deadline:
+    """Deadline for callers outside a request (scripts, tests) that should not be cut short"""
+    return Deadline(float('inf'))
@@ -0,0 +1,78 @@
+# Streaming NDJSON and CSV exports of a Firestore query, for accounting and insurance
+# Documents go from query.stream() to the client in chunks of about EXPORT_CHUNK_BYTES, so memory stays flat
+# however many match. The first document is read before the response starts: a failing query (bad filter,
+# missing index) is still a JSON 500, and only a failure part-way through truncates the transfer.
+
+from flask import Response
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+from metrics import timed
+import csv
+import io
+import itertools
+import json
+import os
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', str(64 * 1024)))
+
+# Spreadsheets evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def csv_cell(value: Any) -> str:
+    """A value as CSV text: nested values as JSON, timestamps as ISO 8601, formula-like text quoted"""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return str(value)
+
+def _chunks(snapshots: Iterable, export_format: str, columns: List[str], name: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == 'csv':
+        writer.writerow(columns)
+    exported = 0
+    try:
+        for snapshot in snapshots:
+            row: Dict[str, Any] = {"id": snapshot.id, **snapshot.to_dict()}
+            if export_format == 'csv':
+                writer.writerow([csv_cell(row.get(column)) for column in columns])
+            else:
+                buffer.write(json.dumps(row, default=_json_default) + "\n")
+            exported += 1
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+    except Exception as e:
+        # Headers are sent; ending without the final chunk tells the client the file is incomplete
+        print(f"{name} export failed after {exported} rows: {str(e)}")
+        raise
+    yield buffer.getvalue().encode('utf-8')
+
+def export_response(query, export_format: str, columns: List[str], name: str) -> Response:
+    """
+    Streaming attachment of the query's documents
+    export_format: ndjson (every field, one JSON object per line) or csv (the given columns, id first)
+    """
+    snapshots = query.stream()
+    with timed("firestore", f"{name}.export"):
+        first = next(snapshots, None)
+    rows = snapshots if first is None else itertools.chain([first], snapshots)
+
+    filename = f"{name}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    response = Response(_chunks(rows, export_format, columns, name), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # Proxies pass chunks on as they arrive
+    return response
\ No newline at end of file
@@ -1,13 +1,23 @@
 # Firebase Admin SDK configuration for backend operations
 # PRD: firebase_auth: "Use Firebase service account JSON for admin SDK initialization"
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+import asyncio
 import os
 import json
+import weakref
+
+# One google.cloud.firestore.AsyncClient per event loop; its gRPC channel belongs to the loop
+_async_clients = weakref.WeakKeyDictionary()
 
 def initialize_firebase():
-    """Initialize Firebase Admin SDK with service account"""
+    """
+    Initialize Firebase Admin SDK with service account
+    The SDK (with gRPC and the Firestore client) is imported here rather than at module load,
+    so routes that never touch the database do not pay for it on a cold start
+    """
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     if not firebase_admin._apps:
         try:
             # Load service account from JSON file
@@ -38,6 +48,32 @@ def get_firestore_client():
     """Get Firestore client instance"""
     return initialize_firebase()
 
+def get_async_firestore_client():
+    """
+    Async Firestore client for the running event loop, sharing the Admin SDK's project and credentials
+    None when the database is unavailable or is not a Cloud Firestore client; callers then fall back
+    to the blocking client on a worker thread
+    """
+    loop = asyncio.get_running_loop()
+    if loop in _async_clients:
+        return _async_clients[loop]
+
+    client = None
+    db = get_firestore_client()
+    try:
+        from google.cloud.firestore import AsyncClient, Client
+        if isinstance(db, Client):
+            client = AsyncClient(project=db.project, credentials=db._credentials, database=db._database)
+    except Exception as e:
+        print(f"Async Firestore client error: {e}")
+    _async_clients[loop] = client
+    return client
+
+def server_timestamp():
+    """Firestore's SERVER_TIMESTAMP sentinel, for created_at fields"""
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
+
 # PRD Database Schema Collections
 class FirestoreCollections:
     """
@@ -47,4 +83,6 @@ class FirestoreCollections:
     """
     SKUS = 'skus'
     INVENTORY = 'inventory'
-    USERS = 'users'
\ No newline at end of file
+    USERS = 'users'
+    INVENTORY_LOOKUP = 'inventory_lookup'
+    REVOKED_TOKENS = 'revoked_tokens'
\ No newline at end of file
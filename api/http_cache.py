@@ -0,0 +1,286 @@
+# Disk-backed HTTP cache for scraped manufacturer and retailer pages
+# PRD: rate_limiting: "Add delays between requests to avoid being blocked"
+# Repeated research for related models revalidates with conditional GETs instead of re-downloading pages
+# The ASGI app fetches through cached_get_async, which shares the cache with the blocking path
+
+from typing import Dict, Any, Optional, Tuple
+from email.utils import parsedate_to_datetime
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+import cassette
+
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'camo-inv-http-cache'))
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# Without explicit freshness, a page is fresh for 10% of its Last-Modified age, capped at one day
+HEURISTIC_FRESHNESS_FRACTION = 0.1
+HEURISTIC_FRESHNESS_MAX = 24 * 60 * 60
+
+STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'expires', 'date')
+
+_eviction_lock = threading.Lock()
+
+# One pooled async client per event loop; its connections cannot be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+
+class CachedResponse:
+    """Minimal response object with the parts of requests.Response the scraper uses"""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, from_cache: bool = False):
+        from requests.structures import CaseInsensitiveDict  # Deferred with the rest of requests
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+def parse_cache_control(value: str) -> Dict[str, Any]:
+    """Parse a Cache-Control header into {directive: value or True}"""
+    directives = {}
+    for part in (value or '').split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if '=' in part:
+            name, _, arg = part.partition('=')
+            directives[name.strip()] = arg.strip().strip('"')
+        else:
+            directives[part] = True
+    return directives
+
+def freshness_lifetime(headers: Dict[str, str], now: float) -> float:
+    """Seconds a stored response stays fresh, following RFC 9111 precedence"""
+    directives = parse_cache_control(headers.get('cache-control', ''))
+
+    if 'no-cache' in directives:
+        return 0
+
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except ValueError:
+                return 0
+
+    try:
+        if headers.get('expires'):
+            return max(0, parsedate_to_datetime(headers['expires']).timestamp() - now)
+        if headers.get('last-modified'):
+            age = now - parsedate_to_datetime(headers['last-modified']).timestamp()
+            return min(HEURISTIC_FRESHNESS_MAX, max(0, age * HEURISTIC_FRESHNESS_FRACTION))
+    except (TypeError, ValueError):
+        return 0
+
+    return 0
+
+def _paths(url: str):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(HTTP_CACHE_DIR, f"{key}.json"), os.path.join(HTTP_CACHE_DIR, f"{key}.body")
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _load(url: str) -> Optional[Dict[str, Any]]:
+    meta_path, body_path = _paths(url)
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            meta['content'] = f.read()
+        # Body mtime doubles as the LRU access time
+        os.utime(body_path)
+        return meta
+    except (OSError, ValueError):
+        return None
+
+def _store(url: str, status_code: int, headers: Dict[str, str], content: Optional[bytes], now: float):
+    """Persist metadata (and the body when given) and trigger LRU eviction"""
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    meta_path, body_path = _paths(url)
+
+    meta = {
+        "url": url,
+        "status_code": status_code,
+        "headers": headers,
+        "stored_at": now,
+        "fresh_until": now + freshness_lifetime(headers, now)
+    }
+
+    if content is not None:
+        _atomic_write(body_path, content)
+    else:
+        os.utime(body_path)
+    _atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+
+    evict_lru()
+
+def evict_lru(max_bytes: int = None):
+    """Delete least recently used entries until the cache fits in max_bytes"""
+    max_bytes = HTTP_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    with _eviction_lock:
+        try:
+            entries = []
+            total = 0
+            for name in os.listdir(HTTP_CACHE_DIR):
+                if not name.endswith('.body'):
+                    continue
+                stat = os.stat(os.path.join(HTTP_CACHE_DIR, name))
+                entries.append((stat.st_mtime, stat.st_size, name[:-5]))
+                total += stat.st_size
+        except OSError:
+            return
+
+        if total <= max_bytes:
+            return
+
+        for _, size, key in sorted(entries):
+            for suffix in ('.body', '.json'):
+                try:
+                    os.unlink(os.path.join(HTTP_CACHE_DIR, key + suffix))
+                except OSError:
+                    pass
+            total -= size
+            if total <= max_bytes:
+                break
+
+def _before_fetch(url: str, headers: Dict[str, str]) -> Tuple[float, Any, Optional[Dict[str, Any]], Dict[str, str]]:
+    """Cache lookup shared by both fetch paths: (now, cassette, stored entry, request headers with validators)"""
+    now = time.time()
+    tape = cassette.active()
+    cached = _load(url) if tape is None else None
+    request_headers = dict(headers or {})
+
+    if cached:
+        if cached['headers'].get('etag'):
+            request_headers['If-None-Match'] = cached['headers']['etag']
+        if cached['headers'].get('last-modified'):
+            request_headers['If-Modified-Since'] = cached['headers']['last-modified']
+
+    return now, tape, cached, request_headers
+
+def _after_fetch(url: str, now: float, tape, cached: Optional[Dict[str, Any]], response) -> CachedResponse:
+    """Store or revalidate the entry from a network response (requests.Response or CachedResponse)"""
+    if response.status_code == 304 and cached:
+        # Merge refreshed validators and freshness into the stored entry
+        merged = dict(cached['headers'])
+        merged.update({k.lower(): v for k, v in response.headers.items() if k.lower() in STORED_HEADERS})
+        try:
+            _store(url, cached['status_code'], merged, None, now)
+        except OSError as e:
+            print(f"HTTP cache write failed for {url}: {e}")
+        return CachedResponse(url, cached['status_code'], merged, cached['content'], from_cache=True)
+
+    stored_headers = {k.lower(): v for k, v in response.headers.items() if k.lower() in STORED_HEADERS}
+    directives = parse_cache_control(stored_headers.get('cache-control', ''))
+
+    if response.status_code == 200 and 'no-store' not in directives and tape is None:
+        try:
+            _store(url, response.status_code, stored_headers, response.content, now)
+        except OSError as e:
+            print(f"HTTP cache write failed for {url}: {e}")
+
+    return CachedResponse(url, response.status_code, stored_headers, response.content)
+
+def cached_get(url: str, headers: Dict[str, str] = None, timeout: float = 10, delay: float = 0) -> CachedResponse:
+    """
+    GET through the disk cache
+    Fresh entries are served from disk; stale entries with validators are revalidated with a
+    conditional GET so an unchanged page costs a 304 instead of a full download
+    `delay` is slept only before going to the network, so cache hits skip the rate-limit pause
+    With a cassette in use the disk cache is bypassed so every fetch is recorded or replayed,
+    and replays skip the rate-limit pause since nothing reaches the site
+    """
+    now, tape, cached, request_headers = _before_fetch(url, headers)
+    if cached and now < cached['fresh_until']:
+        return CachedResponse(url, cached['status_code'], cached['headers'], cached['content'], from_cache=True)
+
+    if delay and not (tape and tape.replaying):
+        time.sleep(delay)
+
+    response = cassette.http_get(url, headers=request_headers, timeout=timeout)
+    return _after_fetch(url, now, tape, cached, response)
+
+def get_async_client():
+    """
+    Shared httpx2.AsyncClient for the running event loop
+    httpx2 is the HTTP client the OpenAI SDK is built on, so the async path adds no dependency of its own;
+    it is imported with the first async fetch
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx2
+        client = httpx2.AsyncClient(
+            follow_redirects=True,
+            limits=httpx2.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the running loop's client, for ASGI shutdown"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def _encode_cached(response: CachedResponse) -> Dict[str, Any]:
+    return {
+        "status_code": response.status_code,
+        "reason": None,
+        "headers": dict(response.headers),
+        "body": base64.b64encode(response.content).decode('ascii')
+    }
+
+async def fetch_async(url: str, headers: Dict[str, str] = None, timeout: float = 10, max_bytes: int = None) -> CachedResponse:
+    """
+    Async GET without the disk cache, reading at most `max_bytes` of the body when given
+    Goes through the active cassette like cassette.http_get, under the same keys
+    """
+    async def fetch() -> CachedResponse:
+        async with get_async_client().stream('GET', url, headers=headers, timeout=timeout) as response:
+            body = b''
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if max_bytes is not None and len(body) >= max_bytes:
+                    break
+            return CachedResponse(url, response.status_code, dict(response.headers), body)
+
+    def decode(value: Dict[str, Any]) -> CachedResponse:
+        body = base64.b64decode(value["body"])
+        return CachedResponse(url, value["status_code"], value["headers"], body[:max_bytes] if max_bytes else body)
+
+    return await cassette.recorded_async(
+        "http", lambda: cassette.http_key(url, headers), fetch, encode=_encode_cached, decode=decode, error=ConnectionError
+    )
+
+async def cached_get_async(url: str, headers: Dict[str, str] = None, timeout: float = 10, delay: float = 0) -> CachedResponse:
+    """cached_get for the event loop: the rate-limit pause and the fetch are awaited instead of blocking a thread"""
+    now, tape, cached, request_headers = _before_fetch(url, headers)
+    if cached and now < cached['fresh_until']:
+        return CachedResponse(url, cached['status_code'], cached['headers'], cached['content'], from_cache=True)
+
+    if delay and not (tape and tape.replaying):
+        await asyncio.sleep(delay)
+
+    response = await fetch_async(url, headers=request_headers, timeout=timeout)
+    return _after_fetch(url, now, tape, cached, response)
\ No newline at end of file
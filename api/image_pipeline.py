@@ -0,0 +1,332 @@
+# Image candidate pipeline for web-scraped product images
+# PRD: image_handling: "Show web-scraped images, allow remove/upload/undo, set primary image"
+
+from flask import Blueprint, jsonify, send_from_directory
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from deadline import Deadline, unbounded, MIN_FETCH_SECONDS
+from cassette import http_get
+from http_cache import fetch_async
+import asyncio
+import hashlib
+import importlib.util
+import io
+import os
+import re
+import struct
+import tempfile
+
+# Pillow is optional: without it candidates are still validated and sized,
+# but perceptual dedup and thumbnails are skipped. It is imported when the first image is decoded.
+PIL_AVAILABLE = importlib.util.find_spec('PIL') is not None
+if not PIL_AVAILABLE:
+    print("Pillow not available, image thumbnails and perceptual dedup disabled")
+
+bp = Blueprint('image_pipeline', __name__)
+
+# Local content-addressed thumbnail cache, served by /api/images/<digest>.jpg
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'camo-inv-images'))
+
+PROBE_BYTES = 64 * 1024  # Enough to reach the JPEG SOF marker past most EXIF blocks
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+MIN_DIMENSION = 100  # Smaller images are icons, spacers or tracking pixels
+THUMBNAIL_SIZE = (320, 320)
+PHASH_DISTANCE = 6  # Max differing bits for two images to count as duplicates
+MAX_WORKERS = 6
+
+PLACEHOLDER_PREFIX = "https://via.placeholder.com/"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+_DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def read_image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from the first bytes of a PNG, GIF, WebP or JPEG file
+    Returns None when the format is unknown or the header is truncated
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+
+    if data[:2] == b'\xff\xd8':
+        # Walk JPEG segments until a start-of-frame marker
+        offset = 2
+        while offset + 9 < len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                offset += 2
+                continue
+            segment_length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + segment_length
+
+    return None
+
+def probe_image(url: str, timeout: float = 5) -> Optional[Dict[str, Any]]:
+    """
+    Validate one candidate URL with a ranged GET and read its dimensions from the header bytes
+    Servers that ignore Range still only have the first PROBE_BYTES read off the socket
+    """
+    if not _is_candidate(url):
+        return None
+
+    try:
+        headers = dict(HEADERS, Range=f'bytes=0-{PROBE_BYTES - 1}')
+        with http_get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code not in (200, 206):
+                return None
+
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type and not content_type.startswith('image/'):
+                return None
+
+            head = b''
+            for chunk in response.iter_content(chunk_size=8192):
+                head += chunk
+                if len(head) >= PROBE_BYTES:
+                    break
+
+        return _probed(url, head, content_type)
+
+    except Exception as e:
+        print(f"Image probe failed for {url}: {e}")
+        return None
+
+def _probed(url: str, head: bytes, content_type: str) -> Optional[Dict[str, Any]]:
+    """Candidate entry from the header bytes, or None when they are not a large enough image"""
+    dimensions = read_image_dimensions(head)
+    if not dimensions:
+        return None
+
+    width, height = dimensions
+    if width < MIN_DIMENSION or height < MIN_DIMENSION:
+        return None
+
+    return {"url": url, "width": width, "height": height, "content_type": content_type}
+
+def _is_candidate(url: Any) -> bool:
+    return isinstance(url, str) and url.startswith('http') and not url.startswith(PLACEHOLDER_PREFIX)
+
+def download_image(url: str, timeout: float = 10) -> Optional[bytes]:
+    """Download a validated image, refusing anything over MAX_IMAGE_BYTES"""
+    try:
+        with http_get(url, headers=HEADERS, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            body = b''
+            for chunk in response.iter_content(chunk_size=65536):
+                body += chunk
+                if len(body) > MAX_IMAGE_BYTES:
+                    return None
+            return body
+    except Exception as e:
+        print(f"Image download failed for {url}: {e}")
+        return None
+
+def perceptual_hash(image) -> int:
+    """64-bit difference hash: compares adjacent pixels of a 9x8 grayscale reduction"""
+    from PIL import Image
+    pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return bits
+
+def store_thumbnail(digest: str, image) -> str:
+    """Write a resized JPEG into the content-addressed cache and return its API path"""
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    path = os.path.join(IMAGE_CACHE_DIR, f"{digest}.jpg")
+
+    if not os.path.exists(path):
+        thumbnail = image.convert('RGB')
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        # A temp file of its own per writer: concurrent requests may store the same image
+        fd, tmp_path = tempfile.mkstemp(dir=IMAGE_CACHE_DIR, prefix=f"{digest}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                thumbnail.save(tmp_file, 'JPEG', quality=85, optimize=True)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    return f"/api/images/{digest}.jpg"
+
+def _fingerprint(candidate: Dict[str, Any], timeout: float = 10) -> Dict[str, Any]:
+    """Download one probed candidate, hash it and cache its thumbnail"""
+    body = download_image(candidate['url'], timeout=timeout)
+    return _fingerprint_body(candidate['url'], body) if body else {}
+
+def _fingerprint_body(url: str, body: bytes) -> Dict[str, Any]:
+    """Content digest, perceptual hash and cached thumbnail of a downloaded image; {} when it does not decode"""
+    fingerprint = {"digest": hashlib.sha256(body).hexdigest(), "phash": None, "thumbnail": None}
+
+    if PIL_AVAILABLE:
+        from PIL import Image
+        try:
+            image = Image.open(io.BytesIO(body))
+            image.load()
+            fingerprint["phash"] = perceptual_hash(image)
+            fingerprint["thumbnail"] = store_thumbnail(fingerprint["digest"], image)
+        except Exception as e:
+            print(f"Image decode failed for {url}: {e}")
+            return {}
+
+    return fingerprint
+
+def process_image_candidates(urls: List[str], limit: int = 3, deadline: Deadline = None) -> List[Dict[str, Any]]:
+    """
+    Image stage: validate candidates concurrently, drop broken, tiny and duplicate images
+    Returns up to `limit` dicts with url, width, height and a local thumbnail path, in candidate order
+    Probing gets at most half of the remaining budget so downloads still have time
+    """
+    deadline = deadline or unbounded()
+    candidates = _unique_candidates(urls)
+
+    if not candidates or deadline.remaining() < MIN_FETCH_SECONDS:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(candidates))) as executor:
+        probe_timeout = min(5, deadline.remaining() / 2)
+        probed = [result for result in executor.map(lambda url: probe_image(url, timeout=probe_timeout), candidates) if result]
+
+        download_timeout = deadline.timeout(10)
+        if download_timeout < MIN_FETCH_SECONDS:
+            return []
+        fingerprints = list(executor.map(lambda candidate: _fingerprint(candidate, timeout=download_timeout), probed))
+
+    return _select(probed, fingerprints, limit)
+
+def _unique_candidates(urls: List[str]) -> List[str]:
+    candidates = []
+    for url in urls or []:
+        if url not in candidates:
+            candidates.append(url)
+    return candidates
+
+def _select(probed: List[Dict[str, Any]], fingerprints: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Drop failed downloads and exact or perceptual duplicates, keeping candidate order"""
+    accepted = []
+    seen_digests = set()
+    seen_phashes = []
+
+    for candidate, fingerprint in zip(probed, fingerprints):
+        if not fingerprint or fingerprint['digest'] in seen_digests:
+            continue
+
+        phash = fingerprint['phash']
+        if phash is not None and any(bin(phash ^ other).count('1') <= PHASH_DISTANCE for other in seen_phashes):
+            continue
+
+        seen_digests.add(fingerprint['digest'])
+        if phash is not None:
+            seen_phashes.append(phash)
+
+        accepted.append({
+            "url": candidate['url'],
+            "width": candidate['width'],
+            "height": candidate['height'],
+            "thumbnail": fingerprint['thumbnail']
+        })
+
+        if len(accepted) >= limit:
+            break
+
+    return accepted
+
+async def probe_image_async(url: str, timeout: float = 5) -> Optional[Dict[str, Any]]:
+    """probe_image() with the async client; reading stops after PROBE_BYTES"""
+    if not _is_candidate(url):
+        return None
+
+    try:
+        headers = dict(HEADERS, Range=f'bytes=0-{PROBE_BYTES - 1}')
+        response = await fetch_async(url, headers=headers, timeout=timeout, max_bytes=PROBE_BYTES)
+        if response.status_code not in (200, 206):
+            return None
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and not content_type.startswith('image/'):
+            return None
+
+        return _probed(url, response.content, content_type)
+
+    except Exception as e:
+        print(f"Image probe failed for {url}: {e}")
+        return None
+
+async def _fingerprint_async(candidate: Dict[str, Any], timeout: float = 10) -> Dict[str, Any]:
+    """_fingerprint() with an async download; decoding and thumbnailing run on a worker thread"""
+    try:
+        response = await fetch_async(candidate['url'], headers=HEADERS, timeout=timeout, max_bytes=MAX_IMAGE_BYTES + 1)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Image download failed for {candidate['url']}: {e}")
+        return {}
+
+    if not response.content or len(response.content) > MAX_IMAGE_BYTES:
+        return {}
+    return await asyncio.to_thread(_fingerprint_body, candidate['url'], response.content)
+
+async def process_image_candidates_async(urls: List[str], limit: int = 3, deadline: Deadline = None) -> List[Dict[str, Any]]:
+    """process_image_candidates() for the event loop: probes and downloads run concurrently as coroutines"""
+    deadline = deadline or unbounded()
+    candidates = _unique_candidates(urls)
+
+    if not candidates or deadline.remaining() < MIN_FETCH_SECONDS:
+        return []
+
+    probe_timeout = min(5, deadline.remaining() / 2)
+    probes = await asyncio.gather(*(probe_image_async(url, timeout=probe_timeout) for url in candidates))
+    probed = [result for result in probes if result]
+
+    download_timeout = deadline.timeout(10)
+    if download_timeout < MIN_FETCH_SECONDS:
+        return []
+    fingerprints = await asyncio.gather(*(_fingerprint_async(candidate, timeout=download_timeout) for candidate in probed))
+
+    return _select(probed, list(fingerprints), limit)
+
+@bp.route('/api/images/<digest>.jpg', methods=['GET'])
+def get_image_thumbnail(digest):
+    """
+    Serve a cached thumbnail by content digest
+    Digests never change content, so responses can be cached indefinitely
+    """
+    if not _DIGEST_RE.match(digest):
+        return jsonify({"error": "Invalid image id"}), 400
+
+    if not os.path.exists(os.path.join(IMAGE_CACHE_DIR, f"{digest}.jpg")):
+        return jsonify({"error": "Image not found"}), 404
+
+    response = send_from_directory(IMAGE_CACHE_DIR, f"{digest}.jpg", mimetype='image/jpeg')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
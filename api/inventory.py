@@ -1,17 +1,127 @@
 # Inventory management endpoints
 # PRD: "/api/inventory": "GET/POST - List inventory items with filters, create new inventory items"
+# Barcodes and brand+serial numbers are unique: each claims a document in inventory_lookup, created in the
+# same transaction as the item, which also holds a copy of the item so a scan resolves with one point read
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from firebase_admin import firestore
+from flask import Blueprint, request, jsonify, g
 from datetime import datetime
-from firebase_admin import firestore
-from firebase_config import get_firestore_client, FirestoreCollections
+from typing import Dict, Any, Optional
+from urllib.parse import quote
+from firebase_config import get_firestore_client, server_timestamp, FirestoreCollections
+from metrics import timed
+from exports import EXPORT_FORMATS, export_response
+from session_tokens import require_auth
+from search import index_document
+from sku_suggest import suggest_service
+import locations
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint('inventory', __name__)
 
-@app.route('/api/inventory', methods=['GET'])
+IDENTIFIER_LABELS = {"barcode": "Barcode", "serial_number": "Serial number"}
+
+INVENTORY_EXPORT_COLUMNS = ["id", "sku_id", "serial_number", "barcode", "condition", "status", "location",
+                            "location_zone", "location_cabinet", "location_shelf",
+                            "purchase_price", "current_value", "notes", "created_at", "created_by"]
+
+class DuplicateIdentifier(Exception):
+    """The barcode or brand+serial number already belongs to another inventory item"""
+
+    def __init__(self, field: str, value: str, existing_id: str):
+        super().__init__(f"{IDENTIFIER_LABELS[field]} {value} is already assigned to inventory item {existing_id}")
+        self.field = field
+        self.value = value
+        self.existing_id = existing_id
+
+def barcode_lookup_id(barcode: str) -> Optional[str]:
+    code = str(barcode or '').strip().upper()
+    return f"barcode:{quote(code, safe='')}" if code else None
+
+def serial_lookup_id(brand: str, serial_number: str) -> Optional[str]:
+    serial = str(serial_number or '').strip().upper()
+    if not serial:
+        return None
+    return f"serial:{quote(str(brand or '').strip().lower(), safe='')}:{quote(serial, safe='')}"
+
+def lookup_ids(item: Dict[str, Any], brand: str) -> Dict[str, str]:
+    """Lookup document IDs an item claims, by field"""
+    ids = {"barcode": barcode_lookup_id(item.get('barcode')),
+           "serial_number": serial_lookup_id(brand, item.get('serial_number'))}
+    return {field: lookup_id for field, lookup_id in ids.items() if lookup_id}
+
+def sku_summary(db, sku_id: str) -> Dict[str, Any]:
+    """The SKU fields stored with lookups; brand scopes serial numbers"""
+    if not sku_id:
+        return {}
+    with timed("firestore", "skus.get"):
+        snapshot = db.collection(FirestoreCollections.SKUS).document(sku_id).get()
+    if not snapshot.exists:
+        return {}
+    sku = snapshot.to_dict()
+    return {"id": sku_id, "name": sku.get('name', ''), "brand": sku.get('brand', ''), "model": sku.get('model', '')}
+
+def create_item_with_lookups(db, item: Dict[str, Any], item_id: str = None) -> str:
+    """
+    Create an inventory item and its lookup documents atomically; returns the item ID
+    Raises DuplicateIdentifier when the barcode or brand+serial number is taken
+    """
+    from firebase_admin import firestore
+    from google.api_core.exceptions import AlreadyExists
+
+    sku = sku_summary(db, item.get('sku_id'))
+    ids = lookup_ids(item, sku.get('brand', ''))
+    item_ref = db.collection(FirestoreCollections.INVENTORY).document(item_id)
+    lookups = db.collection(FirestoreCollections.INVENTORY_LOOKUP)
+    refs = {field: lookups.document(lookup_id) for field, lookup_id in ids.items()}
+
+    def raise_duplicate(field: str, existing_id: str):
+        raise DuplicateIdentifier(field, item.get(field), existing_id)
+
+    @firestore.transactional
+    def create(transaction):
+        for snapshot in transaction.get_all(list(refs.values())):
+            if snapshot.exists:
+                field = next(field for field, ref in refs.items() if ref.id == snapshot.id)
+                raise_duplicate(field, snapshot.to_dict().get('inventory_id'))
+        transaction.create(item_ref, item)
+        for field, ref in refs.items():
+            transaction.create(ref, {"field": field, "inventory_id": item_ref.id, "item": item, "sku": sku})
+
+    try:
+        with timed("firestore", "inventory.create"):
+            create(db.transaction())
+    except AlreadyExists:
+        # A concurrent create claimed the identifier between our read and commit
+        for field, ref in refs.items():
+            snapshot = ref.get()
+            if snapshot.exists and snapshot.to_dict().get('inventory_id') != item_ref.id:
+                raise_duplicate(field, snapshot.to_dict().get('inventory_id'))
+        raise
+    return item_ref.id
+
+def inventory_query(db, args):
+    """
+    Inventory query with the list filters from query parameters: status, condition, sku_id, location_prefix
+    location_prefix is a location tree path ("studio-b/rack-c/") or a location ("Studio B, Rack C")
+    """
+    query = db.collection(FirestoreCollections.INVENTORY)
+    
+    status_filter = args.get('status')
+    condition_filter = args.get('condition')
+    sku_id_filter = args.get('sku_id')
+    location_prefix = args.get('location_prefix', '').strip()
+    
+    if status_filter:
+        query = query.where('status', '==', status_filter)
+    if condition_filter:
+        query = query.where('condition', '==', condition_filter)
+    if sku_id_filter:
+        query = query.where('sku_id', '==', sku_id_filter)
+    if location_prefix:
+        query = locations.filter_by_location(query, location_prefix)
+    return query
+
+@bp.route('/api/inventory', methods=['GET'])
+@require_auth
 def get_inventory():
     """
     Get inventory items with optional filters
@@ -22,30 +132,16 @@ def get_inventory():
         if not db:
             return jsonify({"error": "Database connection failed", "inventory": [], "count": 0}), 500
         
-        inventory_ref = db.collection(FirestoreCollections.INVENTORY)
-        
-        # Apply filters from query parameters
-        status_filter = request.args.get('status')
-        condition_filter = request.args.get('condition')
-        sku_id_filter = request.args.get('sku_id')
-        
-        query = inventory_ref
-        
-        if status_filter:
-            query = query.where('status', '==', status_filter)
-        if condition_filter:
-            query = query.where('condition', '==', condition_filter)
-        if sku_id_filter:
-            query = query.where('sku_id', '==', sku_id_filter)
+        query = inventory_query(db, request.args)
         
         # Execute query
-        docs = query.stream()
         inventory_items = []
         
-        for doc in docs:
-            item_data = doc.to_dict()
-            item_data['id'] = doc.id
-            inventory_items.append(item_data)
+        with timed("firestore", "inventory.list"):
+            for doc in query.stream():
+                item_data = doc.to_dict()
+                item_data['id'] = doc.id
+                inventory_items.append(item_data)
         
         return jsonify({
             "inventory": inventory_items,
@@ -55,7 +151,29 @@ def get_inventory():
     except Exception as e:
         return jsonify({"error": f"Failed to fetch inventory: {str(e)}"}), 500
 
-@app.route('/api/inventory', methods=['POST'])
+@bp.route('/api/inventory/export', methods=['GET'])
+@require_auth
+def export_inventory():
+    """
+    Stream inventory as NDJSON or CSV (format=ndjson|csv) with the list filters
+    Rows are sent as they are read, so exports of any size run in constant memory
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        db = get_firestore_client()
+        if not db:
+            return jsonify({"error": "Database connection failed"}), 500
+        
+        return export_response(inventory_query(db, request.args), export_format, INVENTORY_EXPORT_COLUMNS, "inventory")
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to export inventory: {str(e)}"}), 500
+
+@bp.route('/api/inventory', methods=['POST'])
+@require_auth
 def create_inventory_item():
     """
     Create new inventory item
@@ -88,21 +206,63 @@ def create_inventory_item():
             "purchase_price": data.get('purchase_price', 0),
             "current_value": data.get('current_value', 0),
             "notes": data.get('notes', ''),
-            "created_at": firestore.SERVER_TIMESTAMP,
-            "created_by": data.get('created_by', 'system')  # User ID who added the item
+            "created_at": server_timestamp(),
+            "created_by": g.user_id or data.get('created_by', 'system')  # User ID who added the item
         }
+        inventory_item.update(locations.location_fields(inventory_item["location"]))
         
-        # Add to Firestore
-        doc_ref = db.collection(FirestoreCollections.INVENTORY).add(inventory_item)
+        # Add to Firestore, claiming the barcode and serial number
+        try:
+            inventory_id = create_item_with_lookups(db, inventory_item)
+        except DuplicateIdentifier as e:
+            return jsonify({"error": str(e), "field": e.field, "existing_id": e.existing_id}), 409
+        index_document("inventory", inventory_id, inventory_item)
+        suggest_service.item_created(inventory_id, inventory_item.get('sku_id'))
+        locations.item_created(inventory_id, inventory_item)
         
         return jsonify({
             "success": True,
-            "inventory_id": doc_ref[1].id,
+            "inventory_id": inventory_id,
             "message": "Inventory item created successfully"
         })
         
     except Exception as e:
         return jsonify({"error": f"Failed to create inventory item: {str(e)}"}), 500
 
+@bp.route('/api/inventory/lookup', methods=['GET'])
+@require_auth
+def lookup_inventory_item():
+    """
+    Resolve a scanned barcode, or a brand and serial number, to its inventory item with one point read
+    Returns the item (with its id) and a summary of its SKU
+    """
+    try:
+        barcode = request.args.get('barcode', '')
+        serial_number = request.args.get('serial_number', '')
+        if barcode:
+            lookup_id = barcode_lookup_id(barcode)
+        elif serial_number:
+            lookup_id = serial_lookup_id(request.args.get('brand', ''), serial_number)
+        else:
+            return jsonify({"error": "barcode or serial_number (with brand) required"}), 400
+        
+        db = get_firestore_client()
+        if not db:
+            return jsonify({"error": "Database connection failed"}), 500
+        
+        with timed("firestore", "inventory_lookup.get"):
+            snapshot = db.collection(FirestoreCollections.INVENTORY_LOOKUP).document(lookup_id).get()
+        
+        if not snapshot.exists:
+            return jsonify({"error": "No inventory item found"}), 404
+        
+        lookup = snapshot.to_dict()
+        item = dict(lookup['item'], id=lookup['inventory_id'])
+        return jsonify({"item": item, "sku": lookup.get('sku') or None})
+        
+    except Exception as e:
+        return jsonify({"error": f"Lookup failed: {str(e)}"}), 500
+
 if __name__ == '__main__':
+    from app import app
     app.run(debug=True)
\ No newline at end of file
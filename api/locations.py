@@ -0,0 +1,220 @@
+# Storage locations as a zone > cabinet > shelf hierarchy
+# Free-text locations ("Cabinet A, Shelf 2", "Studio B > Rack C > Shelf 4") are parsed when an item is saved into
+# display labels (location_zone, location_cabinet, location_shelf) and a normalized location_path such as
+# "studio-b/rack-c/shelf-4/", with "_" for a level that was not given ("_/cabinet-a/shelf-2/"). Every node of the
+# tree is a prefix of location_path, so GET /api/inventory?location_prefix= is an indexed range query.
+# Combining location_prefix with status, condition or sku_id needs a composite index on (that field, location_path).
+# GET /api/inventory/locations serves the tree with item counts and values per node from an in-memory rollup,
+# built by a projected scan and kept current by create_inventory_item.
+
+from flask import Blueprint, request, jsonify
+from typing import Dict, Any, Optional, Set, Tuple
+from firebase_config import FirestoreCollections
+from background_index import BackgroundIndex
+from metrics import timed
+from session_tokens import require_auth
+import os
+import re
+import threading
+
+bp = Blueprint('locations', __name__)
+
+LOCATION_TREE_REFRESH_SECONDS = float(os.getenv('LOCATION_TREE_REFRESH_SECONDS', '300'))
+
+LEVELS = ("zone", "cabinet", "shelf")
+UNASSIGNED = "_"
+
+# Leading words that name a level; the word is kept in the node key, so "Rack A" and "Cabinet A" stay apart
+LEVEL_KEYWORDS = {
+    "zone": ("zone", "room", "studio", "warehouse", "store", "area", "floor", "office", "godown"),
+    "cabinet": ("cabinet", "cab", "rack", "cupboard", "almirah", "locker", "bay", "unit", "case"),
+    "shelf": ("shelf", "drawer", "bin", "tray", "slot", "row", "level", "compartment")
+}
+KEYWORD_ALIASES = {"cab": "cabinet"}
+_KEYWORDS = sorted(((keyword, level) for level, keywords in LEVEL_KEYWORDS.items() for keyword in keywords),
+                   key=lambda entry: -len(entry[0]))
+
+_PART_SEPARATORS = re.compile(r'\s*(?:[,>|;/\\]|\s-\s)\s*')
+_NON_SLUG = re.compile(r'[^a-z0-9]+')
+_PATH = re.compile(r'^[a-z0-9_-]+(/[a-z0-9_-]+)*/?$')
+
+def _slug(text: str) -> str:
+    return _NON_SLUG.sub('-', text.lower()).strip('-')
+
+def _classify(part: str) -> Tuple[Optional[str], str]:
+    """(level, node key) of one comma/arrow separated part; level is None without a level keyword"""
+    lowered = part.lower()
+    for keyword, level in _KEYWORDS:
+        if lowered.startswith(keyword) and not lowered[len(keyword):len(keyword) + 1].isalpha():
+            ident = lowered[len(keyword):].strip(' #:.-')
+            return level, _slug(f"{KEYWORD_ALIASES.get(keyword, keyword)} {ident}")
+    return None, _slug(part)
+
+def parse_location(location: Any) -> Dict[str, Tuple[str, str]]:
+    """
+    level -> (node key, display label) for the levels a location names
+    Parts with a level keyword go to that level; others fill the level after the last one assigned,
+    and parts beyond the shelf are appended to it ("Cabinet A, Shelf 2, Left" -> shelf "Shelf 2, Left")
+    """
+    levels: Dict[str, Tuple[str, str]] = {}
+    next_level = 0
+    for part in _PART_SEPARATORS.split(' '.join(str(location or '').split())):
+        if not part:
+            continue
+        level, key = _classify(part)
+        if not key:
+            continue
+        if level is None or level in levels:
+            if next_level >= len(LEVELS):
+                deepest = LEVELS[-1]
+                deepest_key, deepest_label = levels[deepest]
+                levels[deepest] = (f"{deepest_key}-{key}", f"{deepest_label}, {part}")
+                continue
+            level = LEVELS[next_level]
+        levels[level] = (key, part)
+        next_level = max(next_level, LEVELS.index(level) + 1)
+    return levels
+
+def location_fields(location: Any) -> Dict[str, str]:
+    """Indexed fields stored with an inventory item: location_path plus a display label per level"""
+    levels = parse_location(location)
+    depth = max((LEVELS.index(level) + 1 for level in levels), default=1)
+    path = ''.join(f"{levels[level][0] if level in levels else UNASSIGNED}/" for level in LEVELS[:depth])
+    fields = {"location_path": path}
+    for level in LEVELS:
+        fields[f"location_{level}"] = levels[level][1] if level in levels else ''
+    return fields
+
+def location_prefix_path(prefix: str) -> str:
+    """A location_prefix parameter as a path prefix: a tree node path as is, anything else parsed as a location"""
+    text = prefix.strip()
+    if _PATH.match(text) and '/' in text:
+        return text if text.endswith('/') else text + '/'
+    return location_fields(text)["location_path"]
+
+def filter_by_location(query, prefix: str):
+    """Range query for items at or under a node: location_path in [prefix, prefix + U+F8FF)"""
+    path = location_prefix_path(prefix)
+    return query.where('location_path', '>=', path).where('location_path', '<', path + '\uf8ff')
+
+class LocationNode:
+    __slots__ = ('key', 'label', 'path', 'level', 'item_count', 'total_value', 'purchase_value', 'children')
+
+    def __init__(self, key: str, label: str, path: str, level: Optional[str]):
+        self.key = key
+        self.label = label
+        self.path = path
+        self.level = level
+        self.item_count = 0
+        self.total_value = 0.0
+        self.purchase_value = 0.0
+        self.children: Dict[str, 'LocationNode'] = {}
+
+    def to_dict(self, depth: int) -> Dict[str, Any]:
+        node = {
+            "name": self.label,
+            "path": self.path,
+            "level": self.level,
+            "item_count": self.item_count,
+            "total_value": self.total_value,
+            "purchase_value": self.purchase_value
+        }
+        if depth > 0:
+            children = sorted(self.children.values(), key=lambda child: (child.key == UNASSIGNED, child.label.lower()))
+            node["children"] = [child.to_dict(depth - 1) for child in children]
+        return node
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+class LocationRollup:
+    """Item counts and value totals for every node of the location tree"""
+
+    def __init__(self):
+        self.root = LocationNode('', 'All locations', '', None)
+        self.seen: Optional[Set[str]] = None  # Inventory IDs read by the build scan
+        self._lock = threading.Lock()
+
+    def add_item(self, item: Dict[str, Any]):
+        path = item.get('location_path')
+        if path is None:
+            # Saved before locations were parsed; backfill_inventory_locations.py stores the fields
+            item = dict(item, **location_fields(item.get('location')))
+            path = item['location_path']
+        current_value = _number(item.get('current_value'))
+        purchase_value = _number(item.get('purchase_price'))
+
+        with self._lock:
+            node = self.root
+            nodes = [node]
+            for level, key in zip(LEVELS, path.rstrip('/').split('/')):
+                child = node.children.get(key)
+                if child is None:
+                    label = 'Unassigned' if key == UNASSIGNED else item.get(f"location_{level}") or key
+                    child = node.children[key] = LocationNode(key, label, f"{node.path}{key}/", level)
+                node = child
+                nodes.append(node)
+            for node in nodes:
+                node.item_count += 1
+                node.total_value += current_value
+                node.purchase_value += purchase_value
+
+    def find(self, path: str) -> Optional[LocationNode]:
+        node = self.root
+        for key in path.rstrip('/').split('/') if path else []:
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def to_dict(self, path: str = '', depth: int = len(LEVELS)) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            node = self.find(path)
+            return node.to_dict(depth) if node is not None else None
+
+ROLLUP_FIELDS = ['location', 'location_path', 'location_zone', 'location_cabinet', 'location_shelf',
+                 'current_value', 'purchase_price']
+
+def build_rollup(db) -> LocationRollup:
+    """Full build from a scan of only the location and value fields of every item"""
+    rollup = LocationRollup()
+    rollup.seen = set()
+    with timed("firestore", "locations.scan"):
+        for doc in db.collection(FirestoreCollections.INVENTORY).select(ROLLUP_FIELDS).stream():
+            rollup.seen.add(doc.id)
+            rollup.add_item(doc.to_dict())
+    return rollup
+
+location_rollups = BackgroundIndex("Location tree", build_rollup, LOCATION_TREE_REFRESH_SECONDS)
+
+def item_created(item_id: str, item: Dict[str, Any]):
+    location_rollups.apply(item_id, 'add_item', item)
+
+@bp.route('/api/inventory/locations', methods=['GET'])
+@require_auth
+def get_location_tree():
+    """
+    Location tree with item counts, total current value and purchase value per node
+    path: subtree root (a node path or a location like "Studio B, Rack C"); depth: levels of children (default all)
+    """
+    try:
+        path = location_prefix_path(request.args['path']) if request.args.get('path', '').strip() else ''
+        try:
+            depth = max(0, int(request.args.get('depth', len(LEVELS))))
+        except ValueError:
+            return jsonify({"error": "depth must be a number"}), 400
+
+        rollup = location_rollups.current()
+        if rollup is None:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        tree = rollup.to_dict(path, depth)
+        if tree is None:
+            return jsonify({"error": f"No items at location {path}"}), 404
+        return jsonify({"tree": tree})
+
+    except Exception as e:
+        return jsonify({"error": f"Failed to build location tree: {str(e)}"}), 500
\ No newline at end of file
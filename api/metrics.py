@@ -0,0 +1,216 @@
+# Lightweight request instrumentation
+# Timers around Whisper, GPT, research backends, scraping fetches and Firestore queries feed
+# a per-request Server-Timing header and Prometheus histograms; per-endpoint counts and payload sizes
+# are recorded for every request. Exposed in Prometheus text format at /api/metrics.
+
+from flask import Blueprint, Response, request, g
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+import bisect
+import inspect
+import threading
+import time
+
+bp = Blueprint('metrics', __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                base = _format_labels(self.label_names, labels)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{_with_le(base, _format_number(bound))} {cumulative}')
+                lines.append(f'{self.name}_bucket{_with_le(base, "+Inf")} {count}')
+                lines.append(f'{self.name}_sum{base} {_format_number(total)}')
+                lines.append(f'{self.name}_count{base} {count}')
+        return lines
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}')
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+def _with_le(base: str, le: str) -> str:
+    return f'{base[:-1]},le="{le}"}}' if base else f'{{le="{le}"}}'
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+DEPENDENCY_LATENCY = Histogram(
+    "camo_dependency_duration_seconds", "Time spent in external calls and pipeline steps",
+    ("dependency", "operation"), LATENCY_BUCKETS
+)
+DEPENDENCY_ERRORS = Counter("camo_dependency_errors_total", "Timed calls that raised", ("dependency", "operation"))
+REQUEST_LATENCY = Histogram(
+    "camo_http_request_duration_seconds", "Request handling time per endpoint", ("endpoint", "method"), LATENCY_BUCKETS
+)
+REQUESTS = Counter("camo_http_requests_total", "Requests per endpoint and status", ("endpoint", "method", "status"))
+REQUEST_SIZE = Histogram("camo_http_request_size_bytes", "Request body size per endpoint", ("endpoint",), SIZE_BUCKETS)
+RESPONSE_SIZE = Histogram("camo_http_response_size_bytes", "Response body size per endpoint", ("endpoint",), SIZE_BUCKETS)
+
+REGISTRY = [DEPENDENCY_LATENCY, DEPENDENCY_ERRORS, REQUEST_LATENCY, REQUESTS, REQUEST_SIZE, RESPONSE_SIZE]
+
+# Timings for the current request; shared with worker threads that run under a copied context
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_timings', default=None)
+
+class timed(ContextDecorator):
+    """
+    Time a block or function: `with timed("firestore", "inventory.list"):` or `@timed("gpt")`
+    Records the latency histogram and, inside a request, a Server-Timing entry named after the dependency
+    Coroutine functions are timed until they finish, not until they return their coroutine
+    """
+
+    def __init__(self, dependency: str, operation: str = ''):
+        self.dependency = dependency
+        self.operation = operation
+        self._started = None
+
+    def _recreate_cm(self):
+        # Fresh instance per decorated call, so concurrent calls don't share a start time
+        return timed(self.dependency, self.operation)
+
+    def __call__(self, func):
+        if not inspect.iscoroutinefunction(func):
+            return super().__call__(func)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            with self._recreate_cm():
+                return await func(*args, **kwargs)
+        return inner
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        DEPENDENCY_LATENCY.observe(elapsed, self.dependency, self.operation)
+        if exc_type is not None:
+            DEPENDENCY_ERRORS.inc(self.dependency, self.operation)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.dependency, elapsed))
+        return False
+
+def server_timing_header(timings: List[Tuple[str, float]], total_seconds: float) -> str:
+    """Aggregate timings by name: `whisper;dur=812.3, fetch;dur=640.1;desc="3 calls", total;dur=1530.2`"""
+    aggregated: Dict[str, List[float]] = {}
+    for name, elapsed in timings:
+        entry = aggregated.setdefault(name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+
+    parts = []
+    for name, (elapsed, calls) in aggregated.items():
+        part = f"{name};dur={elapsed * 1000:.1f}"
+        if calls > 1:
+            part += f';desc="{calls} calls"'
+        parts.append(part)
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+def record_request(endpoint: str, method: str, status: int, elapsed: float, request_bytes: int, response_bytes: Optional[int]):
+    """Per-endpoint latency, count and payload sizes for one finished request"""
+    REQUEST_LATENCY.observe(elapsed, endpoint, method)
+    REQUESTS.inc(endpoint, method, str(status))
+    REQUEST_SIZE.observe(request_bytes, endpoint)
+    if response_bytes is not None:
+        RESPONSE_SIZE.observe(response_bytes, endpoint)
+
+def collect_request_timings() -> List[Tuple[str, float]]:
+    """Start collecting timed() entries in the current context, for requests served outside Flask (the ASGI app)"""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_timings = []
+    _request_timings.set(g.metrics_timings)
+
+def _after_request(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    record_request(endpoint, request.method, response.status_code, elapsed, request.content_length or 0, response.content_length)
+
+    # Streamed responses (batch NDJSON) send headers before their work happens
+    if not response.is_streamed:
+        response.headers['Server-Timing'] = server_timing_header(g.metrics_timings, elapsed)
+    return response
+
+def _teardown_request(exc):
+    _request_timings.set(None)
+
+def install_metrics(flask_app):
+    """Record per-endpoint counts, latency and payload sizes, and add Server-Timing headers"""
+    flask_app.before_request(_before_request)
+    flask_app.after_request(_after_request)
+    flask_app.teardown_request(_teardown_request)
+
+@bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of all counters and histograms"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,341 @@
+# Unified OpenAI client layer for Whisper, GPT-4o-mini and the Scrapegraphai LLM config
+# PRD: ai_processing: OpenAI API for Whisper speech-to-text and GPT-4o-mini for data extraction
+# One pooled client with bounded retries, deadline-driven timeouts and per-call-type token/cost/latency counters
+# The ASGI processing path uses the *_async variants, which share retries, accounting and cassettes
+
+from flask import Blueprint, jsonify
+from typing import Dict, Any, List, IO, Tuple, Union
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from deadline import Deadline, DeadlineExceeded, unbounded, MIN_FETCH_SECONDS
+from cassette import recorded, recorded_async
+
+bp = Blueprint('openai_client', __name__)
+
+# Point at a local stand-in server for benchmarks, e.g. http://127.0.0.1:8900/v1
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_BACKOFF_BASE = 0.5
+OPENAI_BACKOFF_MAX = 4.0
+OPENAI_DEFAULT_TIMEOUT = 30.0
+
+# USD per unit: per 1M tokens for chat models, per minute of audio for Whisper
+PRICING = {
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "whisper-1": {"minute": 0.006}
+}
+
+class MalformedReply(ValueError):
+    """The API answered, but not with the JSON object asked for; for circuit breakers the call succeeded"""
+    pass
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # One openai.AsyncOpenAI per event loop
+_usage_lock = threading.Lock()
+_usage: Dict[str, Dict[str, float]] = {}
+
+def get_client():
+    """
+    Shared openai.OpenAI client; reusing one instance keeps the SDK's HTTP connection pool warm across requests
+    Retries are handled here, not by the SDK
+    The SDK is imported on first use: its type modules are the largest part of a cold start
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            import openai
+            _client = openai.OpenAI(
+                api_key=os.getenv('OPENAI_API_KEY'),
+                base_url=OPENAI_BASE_URL,
+                max_retries=0,
+                timeout=OPENAI_DEFAULT_TIMEOUT
+            )
+        return _client
+
+def get_async_client():
+    """openai.AsyncOpenAI for the running event loop, configured like get_client()"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import openai
+        client = openai.AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            base_url=OPENAI_BASE_URL,
+            max_retries=0,
+            timeout=OPENAI_DEFAULT_TIMEOUT
+        )
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the running loop's client, for ASGI shutdown"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+def _record(call_type: str, latency_ms: float, error: bool = False, retries: int = 0,
+            prompt_tokens: int = 0, completion_tokens: int = 0, audio_seconds: float = 0.0, cost: float = 0.0):
+    with _usage_lock:
+        stats = _usage.setdefault(call_type, {
+            "calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "audio_seconds": 0.0, "cost_usd": 0.0, "latency_ms_total": 0.0, "latency_ms_max": 0.0
+        })
+        stats["calls"] += 1
+        stats["errors"] += 1 if error else 0
+        stats["retries"] += retries
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["audio_seconds"] += audio_seconds
+        stats["cost_usd"] += cost
+        stats["latency_ms_total"] += latency_ms
+        stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+
+def usage_snapshot() -> Dict[str, Dict[str, float]]:
+    """Counters per call type, with average latency"""
+    with _usage_lock:
+        snapshot = {}
+        for call_type, stats in _usage.items():
+            entry = dict(stats)
+            entry["cost_usd"] = round(entry["cost_usd"], 6)
+            entry["latency_ms_avg"] = round(stats["latency_ms_total"] / stats["calls"], 1) if stats["calls"] else 0.0
+            snapshot[call_type] = entry
+        return snapshot
+
+def _is_retryable(error: Exception) -> bool:
+    import openai  # Already loaded by get_client()
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def _backoff(error: Exception, attempt: int) -> float:
+    """Exponential backoff with jitter, honoring Retry-After on 429s"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return min(OPENAI_BACKOFF_MAX, float(response.headers.get('retry-after')))
+        except (TypeError, ValueError):
+            pass
+    return min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+def _give_up(call_type: str, started: float, retries: int, error: Exception, timeout: float):
+    """
+    Account for a failed call before it is re-raised
+    A timeout shorter than the client default was imposed by our stage cap or request deadline, not a sign
+    of OpenAI failing, so it is raised as DeadlineExceeded and circuit breakers leave it out
+    """
+    _record(call_type, (time.monotonic() - started) * 1000, error=True, retries=retries)
+    import openai  # Already loaded by get_client()
+    if isinstance(error, openai.APITimeoutError) and timeout < OPENAI_DEFAULT_TIMEOUT:
+        raise DeadlineExceeded(f"OpenAI {call_type} cut off by its {timeout:.1f}s budget") from error
+
+def _call(call_type: str, deadline: Deadline, cap: float, fn):
+    """
+    Run one API call with bounded retries on 429/5xx/connection errors
+    Each attempt's timeout is what is left of the deadline; no retry starts without time to finish
+    Returns (response, retries, latency_ms)
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        timeout = deadline.timeout(cap)
+        try:
+            response = fn(timeout)
+            return response, attempt, (time.monotonic() - started) * 1000
+        except Exception as e:
+            if attempt >= OPENAI_MAX_RETRIES or not _is_retryable(e):
+                _give_up(call_type, started, attempt, e, timeout)
+                raise
+            delay = _backoff(e, attempt)
+            if deadline.remaining() < delay + MIN_FETCH_SECONDS:
+                _give_up(call_type, started, attempt, e, timeout)
+                raise
+            print(f"OpenAI {call_type} attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+async def _call_async(call_type: str, deadline: Deadline, cap: float, fn):
+    """_call() for coroutine attempts; backoff is awaited instead of slept"""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        timeout = deadline.timeout(cap)
+        try:
+            response = await fn(timeout)
+            return response, attempt, (time.monotonic() - started) * 1000
+        except Exception as e:
+            if attempt >= OPENAI_MAX_RETRIES or not _is_retryable(e):
+                _give_up(call_type, started, attempt, e, timeout)
+                raise
+            delay = _backoff(e, attempt)
+            if deadline.remaining() < delay + MIN_FETCH_SECONDS:
+                _give_up(call_type, started, attempt, e, timeout)
+                raise
+            print(f"OpenAI {call_type} attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+def _transcription_text(response, retries: int, latency_ms: float, model: str) -> str:
+    audio_seconds = float(getattr(response, 'duration', 0) or 0)
+    cost = audio_seconds / 60 * PRICING.get(model, {}).get("minute", 0)
+    _record("transcription", latency_ms, retries=retries, audio_seconds=audio_seconds, cost=cost)
+    return response.text
+
+def _transcription_key(audio: Union[str, Tuple[str, IO[bytes]]], model: str, language: str) -> str:
+    digest = hashlib.sha256(f"{model} {language} ".encode('utf-8'))
+    if isinstance(audio, str):
+        with open(audio, 'rb') as audio_file:
+            digest.update(audio_file.read())
+    else:
+        audio[1].seek(0)
+        digest.update(audio[1].read())
+    return digest.hexdigest()
+
+def _chat_content(response, retries: int, latency_ms: float, model: str, call_type: str) -> Dict[str, Any]:
+    usage = response.usage
+    prompt_tokens = usage.prompt_tokens if usage else 0
+    completion_tokens = usage.completion_tokens if usage else 0
+    price = PRICING.get(model, {})
+    cost = (prompt_tokens * price.get("input", 0) + completion_tokens * price.get("output", 0)) / 1_000_000
+    _record(call_type, latency_ms, retries=retries, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost=cost)
+    try:
+        content = json.loads(response.choices[0].message.content)
+    except (TypeError, ValueError) as e:
+        raise MalformedReply(f"OpenAI {call_type} reply is not valid JSON: {e}") from e
+    if not isinstance(content, dict):
+        raise MalformedReply(f"OpenAI {call_type} reply is not a JSON object")
+    return content
+
+def _chat_key(messages: List[Dict[str, str]], model: str) -> str:
+    # Recorded by prompt, so a replayed run gets the same answers for the same transcripts
+    return hashlib.sha256(json.dumps([model, messages], sort_keys=True).encode('utf-8')).hexdigest()
+
+def transcribe(audio: Union[str, Tuple[str, IO[bytes]]], deadline: Deadline = None, cap: float = OPENAI_DEFAULT_TIMEOUT,
+               model: str = "whisper-1", language: str = "en") -> str:
+    """
+    Speech-to-text with Whisper
+    audio is a file path or a (filename, file) pair; the file is rewound for every attempt
+    PRD: whisper_usage: endpoint: "https://api.openai.com/v1/audio/transcriptions", model: "whisper-1"
+    """
+    deadline = deadline or unbounded()
+
+    def create(audio_file, timeout: float):
+        return get_client().audio.transcriptions.create(
+            model=model,
+            file=audio_file,
+            language=language,
+            response_format="verbose_json",  # Includes duration for cost accounting
+            timeout=timeout
+        )
+
+    def attempt(timeout: float):
+        if isinstance(audio, str):
+            with open(audio, 'rb') as audio_file:
+                return create(audio_file, timeout)
+        filename, audio_file = audio
+        audio_file.seek(0)
+        return create((filename, audio_file), timeout)
+
+    def run() -> str:
+        response, retries, latency_ms = _call("transcription", deadline, cap, attempt)
+        return _transcription_text(response, retries, latency_ms, model)
+
+    return recorded("llm", lambda: _transcription_key(audio, model, language), run)
+
+async def transcribe_async(audio: Union[str, Tuple[str, IO[bytes]]], deadline: Deadline = None, cap: float = OPENAI_DEFAULT_TIMEOUT,
+                           model: str = "whisper-1", language: str = "en") -> str:
+    """transcribe() with the async client"""
+    deadline = deadline or unbounded()
+
+    async def create(audio_file, timeout: float):
+        return await get_async_client().audio.transcriptions.create(
+            model=model,
+            file=audio_file,
+            language=language,
+            response_format="verbose_json",
+            timeout=timeout
+        )
+
+    async def attempt(timeout: float):
+        if isinstance(audio, str):
+            with open(audio, 'rb') as audio_file:
+                return await create(audio_file, timeout)
+        filename, audio_file = audio
+        audio_file.seek(0)
+        return await create((filename, audio_file), timeout)
+
+    async def run() -> str:
+        response, retries, latency_ms = await _call_async("transcription", deadline, cap, attempt)
+        return _transcription_text(response, retries, latency_ms, model)
+
+    return await recorded_async("llm", lambda: _transcription_key(audio, model, language), run)
+
+def chat_json(messages: List[Dict[str, str]], deadline: Deadline = None, cap: float = OPENAI_DEFAULT_TIMEOUT,
+              model: str = "gpt-4o-mini", call_type: str = "extraction") -> Dict[str, Any]:
+    """
+    Chat completion forced to a JSON object, parsed
+    Raises MalformedReply when the reply does not parse; the HTTP call itself went through
+    PRD: model: "gpt-4o-mini"
+    """
+    deadline = deadline or unbounded()
+
+    def attempt(timeout: float):
+        return get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},  # PRD: Force JSON output
+            timeout=timeout
+        )
+
+    def run() -> Dict[str, Any]:
+        response, retries, latency_ms = _call(call_type, deadline, cap, attempt)
+        return _chat_content(response, retries, latency_ms, model, call_type)
+
+    return recorded("llm", lambda: _chat_key(messages, model), run)
+
+async def chat_json_async(messages: List[Dict[str, str]], deadline: Deadline = None, cap: float = OPENAI_DEFAULT_TIMEOUT,
+                          model: str = "gpt-4o-mini", call_type: str = "extraction") -> Dict[str, Any]:
+    """chat_json() with the async client"""
+    deadline = deadline or unbounded()
+
+    async def attempt(timeout: float):
+        return await get_async_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            timeout=timeout
+        )
+
+    async def run() -> Dict[str, Any]:
+        response, retries, latency_ms = await _call_async(call_type, deadline, cap, attempt)
+        return _chat_content(response, retries, latency_ms, model, call_type)
+
+    return await recorded_async("llm", lambda: _chat_key(messages, model), run)
+
+def scrapegraph_llm_config(model: str = "gpt-4o", temperature: float = 0.0) -> Dict[str, Any]:
+    """LLM section of a Scrapegraphai graph config, sharing the key and base URL used here"""
+    config = {
+        "model": model,
+        "api_key": os.getenv('OPENAI_API_KEY'),
+        "temperature": temperature
+    }
+    if OPENAI_BASE_URL:
+        config["base_url"] = OPENAI_BASE_URL
+    return config
+
+@bp.route('/api/ops/openai-usage', methods=['GET'])
+def get_openai_usage():
+    """Token, cost and latency counters per OpenAI call type"""
+    return jsonify({"usage": usage_snapshot()})
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
@@ -0,0 +1,243 @@
+# Small DAG executor for the processing pipeline
+# PRD: processing_pipeline: audio_handling -> data_extraction -> web_research -> response_format
+# Stages declare their inputs; stages whose inputs are ready run concurrently, each one timed and optionally cached
+# run() drives stages on a thread pool; run_async() drives them as tasks on the ASGI event loop
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import contextvars
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from deadline import Deadline, unbounded
+from profiling import profile_worker
+
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '16'))
+STAGE_CACHE_TTL_SECONDS = float(os.getenv('STAGE_CACHE_TTL_SECONDS', '600'))
+STAGE_CACHE_MAX_ENTRIES = int(os.getenv('STAGE_CACHE_MAX_ENTRIES', '256'))
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS)
+
+class PipelineAbort(Exception):
+    """Raised by a stage to stop the pipeline and fail the request with `message`"""
+
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+class StageCache:
+    """Per-stage LRU cache with a TTL; values are deep-copied in and out so callers can mutate them"""
+
+    def __init__(self, ttl_seconds: float = STAGE_CACHE_TTL_SECONDS, max_entries: int = STAGE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class Stage:
+    """
+    One pipeline step
+    fn is called as fn(deadline=..., **inputs) where inputs are the results of the named stages
+    (or initial values). `budget` names the STAGE_BUDGETS entry for its deadline, defaulting to the stage name.
+    With cache=True results are cached by a hash of the inputs, or by cache_key(inputs) when given.
+    Results flagged as stand-ins ("partial" or "degraded" set in a dict result) are never cached.
+    async_fn is an optional coroutine function with the same signature, used by run_async().
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], inputs: List[str] = None, budget: str = None,
+                 cache: bool = False, cache_key: Callable[[Dict[str, Any]], Any] = None,
+                 async_fn: Callable[..., Awaitable[Any]] = None):
+        self.name = name
+        self.fn = fn
+        self.async_fn = async_fn
+        self.inputs = list(inputs or [])
+        self.budget = budget or name
+        self.cache = StageCache() if cache else None
+        self.cache_key = cache_key
+
+    def key_for(self, inputs: Dict[str, Any]) -> str:
+        raw = self.cache_key(inputs) if self.cache_key else inputs
+        return hashlib.sha256(json.dumps(raw, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class PipelineResult:
+    """Values produced by every stage plus per-stage wall time in milliseconds"""
+
+    def __init__(self, values: Dict[str, Any], timings: Dict[str, float], cache_hits: List[str]):
+        self.values = values
+        self.timings = timings
+        self.cache_hits = cache_hits
+
+    def __getitem__(self, name: str):
+        return self.values[name]
+
+class Pipeline:
+    """
+    A set of stages forming a DAG
+    Initial values count as already-finished stages, so callers can skip stages they have results for.
+    Adding parallelism means changing stage inputs, not handlers.
+    """
+
+    def __init__(self, name: str, stages: List[Stage]):
+        self.name = name
+        self.stages = stages
+        names = {stage.name for stage in stages}
+        if len(names) != len(stages):
+            raise ValueError(f"Duplicate stage names in pipeline {name}")
+
+    def extend(self, name: str, stages: List[Stage]) -> 'Pipeline':
+        """New pipeline with extra stages in front of (or alongside) these ones"""
+        return Pipeline(name, stages + self.stages)
+
+    def _cached(self, stage: Stage, inputs: Dict[str, Any]):
+        """(cache key, cached value); both None when the stage is uncached or missed"""
+        if stage.cache is None:
+            return None, None
+        key = stage.key_for(inputs)
+        return key, stage.cache.get(key)
+
+    def _store(self, stage: Stage, key: Optional[str], value: Any, deadline: Deadline):
+        # Results from stages that ran out of time are partial, and fallbacks stand in for a backend that
+        # failed or was skipped; reusing either would keep serving them after the backend is back
+        if key is None or value is None or stage.budget in deadline.root.timed_out_stages:
+            return
+        if isinstance(value, dict) and (value.get('partial') or value.get('degraded')):
+            return
+        stage.cache.put(key, value)
+
+    def _run_stage(self, stage: Stage, inputs: Dict[str, Any], deadline: Deadline):
+        started = time.monotonic()
+        stage_deadline = deadline.stage(stage.budget)
+
+        key, cached = self._cached(stage, inputs)
+        if cached is not None:
+            return cached, (time.monotonic() - started) * 1000, True
+
+        with profile_worker():
+            value = stage.fn(deadline=stage_deadline, **inputs)
+
+        self._store(stage, key, value, deadline)
+        return value, (time.monotonic() - started) * 1000, False
+
+    async def _run_stage_async(self, stage: Stage, inputs: Dict[str, Any], deadline: Deadline):
+        if stage.async_fn is None:
+            # Blocking stage: the pool thread runs it under a copy of this task's context
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                _executor, context.run, self._run_stage, stage, inputs, deadline
+            )
+
+        started = time.monotonic()
+        stage_deadline = deadline.stage(stage.budget)
+
+        key, cached = self._cached(stage, inputs)
+        if cached is not None:
+            return cached, (time.monotonic() - started) * 1000, True
+
+        value = await stage.async_fn(deadline=stage_deadline, **inputs)
+
+        self._store(stage, key, value, deadline)
+        return value, (time.monotonic() - started) * 1000, False
+
+    def run(self, initial: Dict[str, Any], deadline: Optional[Deadline] = None, serial: bool = False) -> PipelineResult:
+        """
+        Run every stage not covered by `initial`, as soon as its inputs are available
+        With serial=True stages run one at a time on the calling thread, so benchmarks can attribute
+        CPU time and allocations to individual stages
+        """
+        deadline = deadline or unbounded()
+        values = dict(initial)
+        timings = {}
+        cache_hits = []
+        pending = [stage for stage in self.stages if stage.name not in values]
+        running = {}
+
+        while pending or running:
+            ready = [stage for stage in pending if all(name in values for name in stage.inputs)]
+            finished = []
+            for stage in ready:
+                pending.remove(stage)
+                inputs = {name: values[name] for name in stage.inputs}
+                if serial:
+                    finished.append((stage, self._run_stage(stage, inputs, deadline)))
+                    continue
+                # Stages run under a copy of the caller's context, so per-request timers still see the request
+                context = contextvars.copy_context()
+                running[_executor.submit(context.run, self._run_stage, stage, inputs, deadline)] = stage
+
+            if not running and not finished:
+                missing = sorted({name for stage in pending for name in stage.inputs if name not in values})
+                raise ValueError(f"Pipeline {self.name} cannot make progress, missing inputs: {missing}")
+
+            if running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                # PipelineAbort propagates to the caller; stages still running finish in the background
+                finished.extend((running.pop(future), future.result()) for future in done)
+
+            for stage, (value, elapsed_ms, cache_hit) in finished:
+                values[stage.name] = value
+                timings[stage.name] = round(elapsed_ms, 1)
+                if cache_hit:
+                    cache_hits.append(stage.name)
+
+        return PipelineResult(values, timings, cache_hits)
+
+    async def run_async(self, initial: Dict[str, Any], deadline: Optional[Deadline] = None) -> PipelineResult:
+        """
+        run() on the event loop: stages with an async_fn are awaited as tasks, the rest go to the stage
+        thread pool, so one worker process can keep many pipelines in flight
+        On PipelineAbort (or cancellation) the stages still running are cancelled
+        """
+        deadline = deadline or unbounded()
+        values = dict(initial)
+        timings = {}
+        cache_hits = []
+        pending = [stage for stage in self.stages if stage.name not in values]
+        running = {}
+
+        try:
+            while pending or running:
+                ready = [stage for stage in pending if all(name in values for name in stage.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    inputs = {name: values[name] for name in stage.inputs}
+                    running[asyncio.ensure_future(self._run_stage_async(stage, inputs, deadline))] = stage
+
+                if not running:
+                    missing = sorted({name for stage in pending for name in stage.inputs if name not in values})
+                    raise ValueError(f"Pipeline {self.name} cannot make progress, missing inputs: {missing}")
+
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    value, elapsed_ms, cache_hit = task.result()
+                    values[stage.name] = value
+                    timings[stage.name] = round(elapsed_ms, 1)
+                    if cache_hit:
+                        cache_hits.append(stage.name)
+        finally:
+            for task in running:
+                task.cancel()
+
+        return PipelineResult(values, timings, cache_hits)
@@ -1,50 +1,143 @@
 # Audio processing endpoint - implements PRD step_2_processing workflow
 # PRD: "/api/process-audio": "POST - Accept audio file, transcribe with Whisper, extract with GPT, research web, return structured data"
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import openai
+from flask import Blueprint, request, jsonify
 import os
-import tempfile
-import requests
-from typing import Dict, Any
-import json
-from bs4 import BeautifulSoup
+from typing import Dict, Any, List, Optional
 import urllib.parse
-import time
+import copy
+import importlib.util
+import asyncio
+from image_pipeline import process_image_candidates, process_image_candidates_async, PLACEHOLDER_PREFIX
+from http_cache import cached_get, cached_get_async
+from deadline import Deadline, DeadlineExceeded, request_deadline, unbounded, STAGE_BUDGETS, MIN_FETCH_SECONDS
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from circuit_breaker import get_breaker
+from openai_client import transcribe, transcribe_async, chat_json, chat_json_async, scrapegraph_llm_config, MalformedReply
+from singleflight import pipeline_flights, research_key, transcript_key, normalize_query
+from pipeline import Pipeline, PipelineAbort, Stage
+from skus import match_existing_sku, match_existing_sku_async
+from admission import admission_controlled, processing_admission
+from uploads import AudioSpool, UploadRejected, get_audio_uploads
+from metrics import timed
+from cassette import recorded
 
 # PRD: web_research: Python requests with Scrapegraphai for open-source web scraping
-try:
-    from scrapegraphai.graphs import SmartScraperGraph
-    SCRAPEGRAPHAI_AVAILABLE = True
-except ImportError:
-    SCRAPEGRAPHAI_AVAILABLE = False
+# Only checked for here; the package itself is imported by the first research run
+SCRAPEGRAPHAI_AVAILABLE = importlib.util.find_spec('scrapegraphai') is not None
+if not SCRAPEGRAPHAI_AVAILABLE:
     print("Scrapegraphai not available, falling back to basic scraping")
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint('process_audio', __name__)
 
-# Initialize OpenAI client
-# PRD: ai_processing: OpenAI API for Whisper speech-to-text and GPT-4o-mini for data extraction
-openai.api_key = os.getenv('OPENAI_API_KEY')
+# Search results page used by basic scraping; point at a local fixture server for benchmarks
+SEARCH_BASE_URL = os.getenv('SEARCH_BASE_URL', 'https://www.google.com/search')
 
-def transcribe_audio(audio_file_path: str) -> str:
+# Scrapegraphai runs are blocking and cannot be given a timeout, so they run here and are abandoned on deadline
+_research_executor = ThreadPoolExecutor(max_workers=4)
+
+def fallback_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flag a result that stands in for a backend that failed, timed out or was skipped by its breaker
+    Stage caches do not keep degraded results, so the next request tries the backend again
+    """
+    result["degraded"] = True
+    return result
+
+def openai_call_failed(breaker, error: Exception):
+    """
+    Report a failed OpenAI call to its breaker; every call let through gets an outcome, so a half-open probe
+    is never left hanging. A reply that is not JSON still means the API answered, and running out of our
+    own time says nothing about OpenAI, so that only frees the probe.
+    """
+    if isinstance(error, MalformedReply):
+        breaker.record_success()
+    elif isinstance(error, DeadlineExceeded):
+        breaker.release_probe()
+    else:
+        breaker.record_failure(error)
+
+def coalesced(key: str, fn, deadline: Deadline, budget: str):
+    """
+    Run fn() through pipeline_flights and return the caller's own copy of the result
+    Callers sharing a leader's result also share its outcome: if the leader's stage ran out of time,
+    each caller's stage is marked timed out too, so every response sharing the result is flagged partial
+    """
+    def lead():
+        return fn(), deadline.name in deadline.root.timed_out_stages
+    result, timed_out = pipeline_flights.do(key, lead, timeout=deadline.timeout(STAGE_BUDGETS[budget]))
+    if timed_out:
+        deadline.mark_timed_out()
+    return copy.deepcopy(result)
+
+async def coalesced_async(key: str, fn, deadline: Deadline, budget: str):
+    """coalesced() for coroutine functions"""
+    async def lead():
+        return await fn(), deadline.name in deadline.root.timed_out_stages
+    result, timed_out = await pipeline_flights.do_async(key, lead, timeout=deadline.timeout(STAGE_BUDGETS[budget]))
+    if timed_out:
+        deadline.mark_timed_out()
+    return copy.deepcopy(result)
+
+def openai_configured() -> bool:
+    api_key = os.getenv('OPENAI_API_KEY')
+    return bool(api_key) and api_key not in ("your-openai-api-key-here", "test-key-fallback-mode")
+
+def openai_circuit_open(instead: str) -> bool:
+    """Whether the OpenAI breaker turns this call away; logs what is done instead"""
+    if get_breaker("openai").allow_request():
+        return False
+    print(f"OpenAI circuit open, {instead}")
+    return True
+
+# The blocking and async variants below share everything around the backend call: the *_skipped helpers
+# answer before any I/O, the *_failed ones map an error to the stage's fallback result
+
+def transcription_failed(error: Exception, deadline: Deadline) -> str:
+    openai_call_failed(get_breaker("openai"), error)
+    if deadline.expired:
+        deadline.mark_timed_out()
+    print(f"Whisper transcription error: {error}")
+    return ""
+
+@timed("whisper")
+def transcribe_audio(audio: AudioSpool, deadline: Deadline = None) -> str:
     """
     Step 1: Convert speech to text using OpenAI Whisper
     PRD: audio_transcription: "Send audio to OpenAI Whisper API for speech-to-text"
     PRD: whisper_usage: endpoint: "https://api.openai.com/v1/audio/transcriptions", model: "whisper-1"
     """
+    deadline = deadline or unbounded()
+    if openai_circuit_open("skipping transcription"):
+        return ""
+    
     try:
-        with open(audio_file_path, 'rb') as audio_file:
-            transcript = openai.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language="en"  # PRD: Auto-detect, primarily English and Hindi support
-            )
-        return transcript.text
+        deadline.check("transcription")
+        transcript = transcribe(
+            audio.as_file(),
+            deadline,
+            cap=STAGE_BUDGETS["transcription"],
+            language="en"  # PRD: Auto-detect, primarily English and Hindi support
+        )
     except Exception as e:
-        print(f"Whisper transcription error: {e}")
+        return transcription_failed(e, deadline)
+    get_breaker("openai").record_success()
+    return transcript
+
+@timed("whisper")
+async def transcribe_audio_async(audio: AudioSpool, deadline: Deadline = None) -> str:
+    """transcribe_audio() with the async OpenAI client"""
+    deadline = deadline or unbounded()
+    if openai_circuit_open("skipping transcription"):
         return ""
+    
+    try:
+        deadline.check("transcription")
+        transcript = await transcribe_async(audio.as_file(), deadline, cap=STAGE_BUDGETS["transcription"], language="en")
+    except Exception as e:
+        return transcription_failed(e, deadline)
+    get_breaker("openai").record_success()
+    return transcript
 
 def get_known_specifications(brand: str, model: str) -> dict:
     """
@@ -210,65 +303,186 @@ def map_equipment_type_to_category(equipment_type: str) -> str:
     }
     return mapping.get(equipment_type.lower(), 'Cameras')  # Default to Cameras
 
-def extract_equipment_data(transcript: str) -> Dict[str, Any]:
+def extract_with_patterns(transcript: str) -> Dict[str, Any]:
+    """
+    Simple pattern-based extraction, used when GPT is not configured or ran out of time
+    PRD: extraction_fields: "equipment_type, brand, model, condition, description, estimated_value, web_search_query"
+    """
+    transcript_lower = transcript.lower()
+    
+    # Extract brand
+    brand = ""
+    known_brands = ["canon", "sony", "nikon", "fuji", "panasonic", "olympus", "blackmagic", "red", "arri"]
+    for b in known_brands:
+        if b in transcript_lower:
+            brand = b.title()
+            break
+    
+    # Extract model (look for alphanumeric patterns after brand)
+    model = ""
+    if brand:
+        brand_pos = transcript_lower.find(brand.lower())
+        after_brand = transcript[brand_pos + len(brand):].strip()
+        import re
+        model_match = re.search(r'[A-Za-z0-9\-]+', after_brand)
+        if model_match:
+            model = model_match.group()
+    
+    # Extract equipment type
+    equipment_type = "camera"  # Default
+    if "lens" in transcript_lower:
+        equipment_type = "lens"
+    elif "light" in transcript_lower:
+        equipment_type = "lighting"
+    elif "microphone" in transcript_lower or "audio" in transcript_lower:
+        equipment_type = "audio"
+    
+    # Add sample product images based on brand/model
+    sample_images = get_sample_product_images(brand, model, equipment_type)
+    
+    return {
+        "equipment_type": equipment_type,
+        "brand": brand,
+        "model": model,
+        "condition": "good",
+        "description": transcript,
+        "estimated_value": 50000,  # Default value
+        "web_search_query": f"{brand} {model} specifications",
+        "sample_images": sample_images
+    }
+
+# PRD: system_prompt: "You are an equipment cataloger. Extract structured data from equipment descriptions and return only valid JSON."
+EXTRACTION_SYSTEM_PROMPT = """You are an equipment cataloger. Extract structured data from equipment descriptions and return only valid JSON.
+
+Extract the following fields from the equipment description:
+- equipment_type: Type of equipment (camera, lens, lighting, etc.)
+- brand: Manufacturer name (Canon, Sony, Nikon, etc.)
+- model: Model identifier
+- condition: Equipment condition (new, good, fair, damaged)
+- description: Detailed description
+- estimated_value: Estimated value in INR
+- web_search_query: Search query for finding specifications
+
+Return only valid JSON with these exact field names."""
+
+def extraction_messages(transcript: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Extract equipment data from: {transcript}"}
+    ]
+
+def extraction_skipped(transcript: str) -> Optional[Dict[str, Any]]:
+    """Pattern-based extraction when no OpenAI key is configured; None when GPT is to be asked"""
+    if openai_configured():
+        return None
+    print("OpenAI API key not configured, using pattern-based extraction")
+    return extract_with_patterns(transcript)
+
+def gpt_extraction_skipped(transcript: str) -> Optional[Dict[str, Any]]:
+    if openai_circuit_open("using pattern-based extraction"):
+        return fallback_result(extract_with_patterns(transcript))
+    return None
+
+def gpt_extraction_failed(transcript: str, error: Exception, deadline: Deadline) -> Dict[str, Any]:
+    openai_call_failed(get_breaker("openai"), error)
+    print(f"GPT extraction error: {error}")
+    if deadline.expired:
+        # Out of time: a pattern-based form is better than failing the whole request
+        deadline.mark_timed_out()
+        return fallback_result(extract_with_patterns(transcript))
+    return {}
+
+@timed("extraction")
+def extract_equipment_data(transcript: str, deadline: Deadline = None) -> Dict[str, Any]:
     """
     Step 2: Extract structured equipment data using GPT-4o-mini
     PRD: ai_extraction: "Use GPT-4o-mini to extract structured equipment data from transcript"
     PRD: extraction_fields: "equipment_type, brand, model, condition, description, estimated_value, web_search_query"
     """
+    deadline = deadline or unbounded()
     
     # Check if OpenAI API key is configured
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key or api_key == "your-openai-api-key-here" or api_key == "test-key-fallback-mode":
-        print("OpenAI API key not configured, using pattern-based extraction")
-        # Simple pattern-based extraction for testing
-        transcript_lower = transcript.lower()
-        
-        # Extract brand
-        brand = ""
-        known_brands = ["canon", "sony", "nikon", "fuji", "panasonic", "olympus", "blackmagic", "red", "arri"]
-        for b in known_brands:
-            if b in transcript_lower:
-                brand = b.title()
-                break
-        
-        # Extract model (look for alphanumeric patterns after brand)
-        model = ""
-        if brand:
-            brand_pos = transcript_lower.find(brand.lower())
-            after_brand = transcript[brand_pos + len(brand):].strip()
-            import re
-            model_match = re.search(r'[A-Za-z0-9\-]+', after_brand)
-            if model_match:
-                model = model_match.group()
-        
-        # Extract equipment type
-        equipment_type = "camera"  # Default
-        if "lens" in transcript_lower:
-            equipment_type = "lens"
-        elif "light" in transcript_lower:
-            equipment_type = "lighting"
-        elif "microphone" in transcript_lower or "audio" in transcript_lower:
-            equipment_type = "audio"
-        
-        # Add sample product images based on brand/model
-        sample_images = get_sample_product_images(brand, model, equipment_type)
-        
-        return {
-            "equipment_type": equipment_type,
-            "brand": brand,
-            "model": model,
-            "condition": "good",
-            "description": transcript,
-            "estimated_value": 50000,  # Default value
-            "web_search_query": f"{brand} {model} specifications",
-            "sample_images": sample_images
-        }
+    skipped = extraction_skipped(transcript)
+    if skipped is not None:
+        return skipped
+    
+    # Identical concurrent transcripts share one GPT call; callers get their own copy to mutate
+    return coalesced(transcript_key(transcript), lambda: extract_with_gpt(transcript, deadline), deadline, "extraction")
+
+def extract_with_gpt(transcript: str, deadline: Deadline) -> Dict[str, Any]:
+    """
+    GPT-4o-mini extraction call behind the OpenAI circuit breaker
+    PRD: model: "gpt-4o-mini"
+    """
+    skipped = gpt_extraction_skipped(transcript)
+    if skipped is not None:
+        return skipped
+    
+    try:
+        deadline.check("extraction")
+        extracted_data = chat_json(
+            extraction_messages(transcript),
+            deadline,
+            cap=STAGE_BUDGETS["extraction"],
+            model="gpt-4o-mini"  # PRD: model: "gpt-4o-mini"
+        )
+    except Exception as e:
+        return gpt_extraction_failed(transcript, e, deadline)
+    get_breaker("openai").record_success()
+    return extracted_data
+
+@timed("extraction")
+async def extract_equipment_data_async(transcript: str, deadline: Deadline = None) -> Dict[str, Any]:
+    """extract_equipment_data() with the async OpenAI client"""
+    deadline = deadline or unbounded()
+    
+    skipped = extraction_skipped(transcript)
+    if skipped is not None:
+        return skipped
+    
+    return await coalesced_async(transcript_key(transcript), lambda: extract_with_gpt_async(transcript, deadline),
+                                 deadline, "extraction")
+
+async def extract_with_gpt_async(transcript: str, deadline: Deadline) -> Dict[str, Any]:
+    """extract_with_gpt() with the async OpenAI client"""
+    skipped = gpt_extraction_skipped(transcript)
+    if skipped is not None:
+        return skipped
+    
+    try:
+        deadline.check("extraction")
+        extracted_data = await chat_json_async(
+            extraction_messages(transcript),
+            deadline,
+            cap=STAGE_BUDGETS["extraction"],
+            model="gpt-4o-mini"
+        )
+    except Exception as e:
+        return gpt_extraction_failed(transcript, e, deadline)
+    get_breaker("openai").record_success()
+    return extracted_data
+
+def extract_equipment_data_batch(transcripts: List[str], deadline: Deadline = None) -> List[Dict[str, Any]]:
+    """
+    Extract structured data for several transcripts with one GPT-4o-mini call
+    PRD: ai_extraction: "Use GPT-4o-mini to extract structured equipment data from transcript"
+    Items missing from the batched answer are extracted one by one
+    """
+    deadline = deadline or unbounded()
+    
+    if not openai_configured():
+        return [extract_with_patterns(transcript) for transcript in transcripts]
+    
+    if len(transcripts) == 1:
+        return [extract_equipment_data(transcripts[0], deadline)]
+    
+    breaker = get_breaker("openai")
+    if openai_circuit_open("using pattern-based extraction"):
+        return [fallback_result(extract_with_patterns(transcript)) for transcript in transcripts]
     
-    # PRD: system_prompt: "You are an equipment cataloger. Extract structured data from equipment descriptions and return only valid JSON."
     system_prompt = """You are an equipment cataloger. Extract structured data from equipment descriptions and return only valid JSON.
 
-Extract the following fields from the equipment description:
+You will receive several numbered equipment descriptions. For each one extract:
 - equipment_type: Type of equipment (camera, lens, lighting, etc.)
 - brand: Manufacturer name (Canon, Sony, Nikon, etc.)
 - model: Model identifier
@@ -277,66 +491,143 @@ Extract the following fields from the equipment description:
 - estimated_value: Estimated value in INR
 - web_search_query: Search query for finding specifications
 
-Return only valid JSON with these exact field names."""
-
+Return only valid JSON of the form {"items": [{"index": <number>, ...fields}]} with one entry per description and these exact field names."""
+    
+    numbered = "\n\n".join(f"[{index}] {transcript}" for index, transcript in enumerate(transcripts))
+    results = [None] * len(transcripts)
+    batch_data = {}
+    
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",  # PRD: model: "gpt-4o-mini"
-            messages=[
+        deadline.check("extraction")
+        batch_data = chat_json(
+            [
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Extract equipment data from: {transcript}"}
+                {"role": "user", "content": f"Extract equipment data from:\n\n{numbered}"}
             ],
-            response_format={"type": "json_object"}  # PRD: Force JSON output
+            deadline,
+            cap=STAGE_BUDGETS["extraction"] * 2,
+            model="gpt-4o-mini",  # PRD: model: "gpt-4o-mini"
+            call_type="batch_extraction"
         )
-        
-        extracted_data = json.loads(response.choices[0].message.content)
-        return extracted_data
+        breaker.record_success()
     except Exception as e:
-        print(f"GPT extraction error: {e}")
-        return {}
+        openai_call_failed(breaker, e)
+        print(f"GPT batch extraction error: {e}")
+    
+    # A malformed answer only costs the items it leaves out
+    items = batch_data.get('items') if isinstance(batch_data, dict) else None
+    for item in items if isinstance(items, list) else []:
+        index = item.pop('index', None) if isinstance(item, dict) else None
+        if isinstance(index, int) and 0 <= index < len(results):
+            results[index] = item
+    
+    return [result if result else extract_equipment_data(transcripts[index], deadline) for index, result in enumerate(results)]
+
+def research_timed_out_result(search_query: str) -> Dict[str, Any]:
+    """Partial research result returned when the research budget runs out before anything was found"""
+    return {
+        "specifications": {"note": "Research timed out", "search_query": search_query},
+        "pricing": {"market_price": "Contact manufacturer for pricing"},
+        "images": [],
+        "confidence": 0.1,
+        "partial": True
+    }
 
-def research_equipment_specs(search_query: str) -> Dict[str, Any]:
+def research_unavailable_result(search_query: str, backend: str) -> Dict[str, Any]:
+    """Research result returned immediately when a backend's circuit breaker is open"""
+    return fallback_result({
+        "specifications": {"note": f"Web research temporarily unavailable ({backend})", "search_query": search_query},
+        "pricing": {"market_price": "Contact manufacturer for pricing"},
+        "images": [],
+        "confidence": 0.1
+    })
+
+def research_failed_result(error: Any) -> Dict[str, Any]:
+    """Research result when every backend failed"""
+    return fallback_result({
+        "specifications": {"error": f"Web research failed: {str(error)}"},
+        "pricing": {"market_price": "Unable to fetch pricing"},
+        "images": ["https://via.placeholder.com/300x200?text=Error+Loading+Image"],
+        "confidence": 0.1
+    })
+
+def research_skipped(search_query: str, deadline: Deadline) -> Optional[Dict[str, Any]]:
+    """Result for a query that is not worth a research run (none given, or no time left); None otherwise"""
+    if not search_query:
+        return {"specifications": {}, "pricing": {}, "images": [], "confidence": 0.1}
+    if deadline.remaining() < MIN_FETCH_SECONDS:
+        deadline.mark_timed_out()
+        return research_timed_out_result(search_query)
+    return None
+
+def research_failed(error: Exception) -> Dict[str, Any]:
+    print(f"Web research error: {error}")
+    return research_failed_result(error)
+
+def research_equipment_specs(search_query: str, deadline: Deadline = None) -> Dict[str, Any]:
     """
     Step 3: Research equipment specifications using Scrapegraphai
     PRD: web_research: "Python requests with Scrapegraphai for open-source web scraping"
     PRD: target_sites: "Search Google for '[brand] [model] specifications' and scrape first 3 results"
     PRD: data_extraction: "Extract specifications, pricing, images from manufacturer and retailer sites"
     """
+    deadline = deadline or unbounded()
     try:
-        if not search_query:
-            return {"specifications": {}, "pricing": {}, "images": [], "confidence": 0.1}
-        
-        # PRD: Use Scrapegraphai for intelligent web scraping if available
-        if SCRAPEGRAPHAI_AVAILABLE:
-            return research_with_scrapegraphai(search_query)
-        else:
-            # Fallback to basic scraping
-            return research_with_basic_scraping(search_query)
+        skipped = research_skipped(search_query, deadline)
+        if skipped is not None:
+            return skipped
+        
+        # Identical concurrent queries share one research run; callers get their own copy to mutate
+        return coalesced(research_key(search_query), lambda: research_with_backends(search_query, deadline),
+                         deadline, "research")
             
     except Exception as e:
-        print(f"Web research error: {e}")
-        return {
-            "specifications": {"error": f"Web research failed: {str(e)}"},
-            "pricing": {"market_price": "Unable to fetch pricing"},
-            "images": ["https://via.placeholder.com/300x200?text=Error+Loading+Image"],
-            "confidence": 0.1
-        }
+        return research_failed(e)
+
+def research_with_backends(search_query: str, deadline: Deadline) -> Dict[str, Any]:
+    """Pick the research backend for one query"""
+    # PRD: Use Scrapegraphai for intelligent web scraping if available
+    if not SCRAPEGRAPHAI_AVAILABLE:
+        return research_with_basic_scraping(search_query, deadline)
+    if get_breaker("scrapegraphai").allow_request():
+        return research_with_scrapegraphai(search_query, deadline)
+    # An open breaker skips straight to basic scraping instead of waiting for another failure
+    return fallback_result(research_with_basic_scraping(search_query, deadline))
 
-def research_with_scrapegraphai(search_query: str) -> Dict[str, Any]:
+async def research_equipment_specs_async(search_query: str, deadline: Deadline = None) -> Dict[str, Any]:
+    """research_equipment_specs() for the event loop"""
+    deadline = deadline or unbounded()
+    try:
+        skipped = research_skipped(search_query, deadline)
+        if skipped is not None:
+            return skipped
+        
+        return await coalesced_async(research_key(search_query), lambda: research_with_backends_async(search_query, deadline),
+                                     deadline, "research")
+            
+    except Exception as e:
+        return research_failed(e)
+
+async def research_with_backends_async(search_query: str, deadline: Deadline) -> Dict[str, Any]:
+    """research_with_backends() for the event loop; Scrapegraphai has no async API, so it keeps a worker thread"""
+    if not SCRAPEGRAPHAI_AVAILABLE:
+        return await research_with_basic_scraping_async(search_query, deadline)
+    if get_breaker("scrapegraphai").allow_request():
+        return await asyncio.to_thread(research_with_scrapegraphai, search_query, deadline)
+    return fallback_result(await research_with_basic_scraping_async(search_query, deadline))
+
+@timed("scrapegraphai")
+def research_with_scrapegraphai(search_query: str, deadline: Deadline = None) -> Dict[str, Any]:
     """
     Research equipment specifications using Scrapegraphai
     PRD: approach: "Use Python requests and Scrapegraphai for open-source web scraping"
     """
+    deadline = deadline or unbounded()
+    breaker = get_breaker("scrapegraphai")
     try:
         # Configure Scrapegraphai with OpenAI
-        api_key = os.getenv('OPENAI_API_KEY')
-        
         graph_config = {
-            "llm": {
-                "model": "gpt-4o",  # Use full GPT-4o for better results
-                "api_key": api_key,
-                "temperature": 0.0
-            },
+            "llm": scrapegraph_llm_config(model="gpt-4o"),  # Use full GPT-4o for better results
             "verbose": False,  # Reduce noise
             "headless": True,
         }
@@ -363,19 +654,37 @@ def research_with_scrapegraphai(search_query: str) -> Dict[str, Any]:
         Make sure to return valid JSON only.
         """
         
-        # Create a SmartScraperGraph instance
-        smart_scraper_graph = SmartScraperGraph(
-            prompt=simple_prompt,
-            source=source_url,
-            config=graph_config
-        )
+        def scrape():
+            # Scrapegraphai pulls in an LLM and browser stack, so it is imported on first use, inside the
+            # worker: a slow first import counts against the research budget instead of blocking past it
+            from scrapegraphai.graphs import SmartScraperGraph
+            
+            # Create a SmartScraperGraph instance
+            smart_scraper_graph = SmartScraperGraph(
+                prompt=simple_prompt,
+                source=source_url,
+                config=graph_config
+            )
+            return smart_scraper_graph.run()
         
-        # Run the scraper
-        result = smart_scraper_graph.run()
+        # Run the scraper, giving up once the research budget is spent
+        # Its page fetches and LLM calls happen inside the graph, so a cassette records the graph's result
+        try:
+            scrape_key = lambda: f"{graph_config['llm']['model']} {source_url} {' '.join(simple_prompt.split())}"
+            result = _research_executor.submit(recorded, "scrapegraph", scrape_key, scrape).result(
+                timeout=deadline.timeout(STAGE_BUDGETS["research"])
+            )
+        except FutureTimeoutError:
+            print("Scrapegraphai timed out, falling back to basic scraping")
+            breaker.record_failure("timeout")
+            deadline.mark_timed_out()
+            return fallback_result(research_with_basic_scraping(search_query, deadline))
         print(f"Scrapegraphai result: {result}")
         
         # Process the result
         if result and isinstance(result, dict):
+            breaker.record_success()
+            
             # Handle nested 'content' structure from Scrapegraphai
             if 'content' in result:
                 content = result['content']
@@ -443,116 +752,136 @@ def research_with_scrapegraphai(search_query: str) -> Dict[str, Any]:
             }
         
         # If Scrapegraphai doesn't return expected format, fallback
-        return research_with_basic_scraping(search_query)
+        breaker.record_failure("unexpected result format")
+        return fallback_result(research_with_basic_scraping(search_query, deadline))
         
     except Exception as e:
+        breaker.record_failure(e)
         print(f"Scrapegraphai error: {e}")
         # Fallback to basic scraping
-        return research_with_basic_scraping(search_query)
+        return fallback_result(research_with_basic_scraping(search_query, deadline))
+
+SCRAPER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
-def research_with_basic_scraping(search_query: str) -> Dict[str, Any]:
+@timed("fetch")
+def fetch_page(url: str, timeout: float, delay: float = 0):
     """
-    Fallback web scraping using basic requests and BeautifulSoup
+    Fetch a page for scraping through the disk-backed HTTP cache
+    PRD: rate_limiting: "Add delays between requests to avoid being blocked"
+    The delay only applies when the request actually goes to the network
     """
-    try:
-        # Search Google for equipment specifications
-        search_url = f"https://www.google.com/search?q={urllib.parse.quote(search_query + ' specifications')}"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # PRD: rate_limiting: "Add delays between requests to avoid being blocked"
-        time.sleep(1)
+    return cached_get(url, headers=SCRAPER_HEADERS, timeout=timeout, delay=delay)
+
+@timed("fetch")
+async def fetch_page_async(url: str, timeout: float, delay: float = 0):
+    """fetch_page() for the event loop"""
+    return await cached_get_async(url, headers=SCRAPER_HEADERS, timeout=timeout, delay=delay)
+
+def search_url_for(search_query: str) -> str:
+    # Search Google for equipment specifications
+    return f"{SEARCH_BASE_URL}?q={urllib.parse.quote(search_query + ' specifications')}"
+
+def check_search_response(response):
+    """Raise for error statuses and for Google's CAPTCHA interstitial"""
+    response.raise_for_status()
+    if b'unusual traffic' in response.content or b'/sorry/index' in response.content:
+        import requests
+        raise requests.HTTPError("Google returned a CAPTCHA page")
+
+def parse_search_results(content: bytes) -> List[str]:
+    """Links worth scraping from a search results page"""
+    # Only research needs an HTML parser; it is kept off the cold-start path
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    links = []
+    # Look for structured data in search results
+    for div in soup.find_all('div', class_='g')[:3]:  # First 3 results
+        # Extract links for further scraping
+        link_element = div.find('a')
+        if link_element and 'href' in link_element.attrs:
+            link = link_element['href']
+            # Skip non-HTTP links
+            if link.startswith('http'):
+                links.append(link)
+    return links
+
+class ScrapedResearch:
+    """Specifications, images and pricing collected from the result pages of one search"""
+
+    def __init__(self, search_query: str):
+        self.search_query = search_query
+        self.specifications = {}
+        self.images = []
+        self.pricing_info = {}
+        self.partial = False
+
+    def add_page(self, link: str, content: bytes):
+        """Parse one result page"""
+        from bs4 import BeautifulSoup
+        search_query = self.search_query
+        page_soup = BeautifulSoup(content, 'html.parser')
         
-        response = requests.get(search_url, headers=headers, timeout=10)
-        response.raise_for_status()
+        # Extract images with better filtering
+        img_tags = page_soup.find_all('img')
+        for img in img_tags:
+            src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+            alt = img.get('alt', '').lower()
+            
+            # Better image filtering
+            if src and (
+                'product' in src.lower() or 
+                'camera' in src.lower() or 
+                any(word in alt for word in search_query.lower().split()) or
+                any(word in src.lower() for word in search_query.lower().split()) or
+                # Look for high-res indicators
+                any(size in src.lower() for size in ['large', 'big', 'full', 'detail', '1000', '800']) or
+                # Common product image patterns
+                any(pattern in src.lower() for pattern in ['prod', 'item', 'goods'])
+            ):
+                # Skip obvious non-product images
+                if any(skip in src.lower() for skip in ['logo', 'icon', 'thumb', 'avatar', 'banner', 'ad', 'pixel']):
+                    continue
+                    
+                # Make absolute URL
+                if src.startswith('//'):
+                    src = 'https:' + src
+                elif src.startswith('/'):
+                    src = urllib.parse.urljoin(link, src)
+                
+                if src.startswith('http') and src not in self.images and len(self.images) < 5:
+                    self.images.append(src)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Extract basic specifications from text
+        text_content = page_soup.get_text().lower()
         
-        # Extract specifications and images
-        specifications = {}
-        images = []
-        pricing_info = {}
+        # Look for common specifications
+        if 'weight' in text_content:
+            weight_match = page_soup.find(text=lambda text: text and 'weight' in text.lower())
+            if weight_match:
+                self.specifications['weight'] = str(weight_match)[:100]
         
-        # Look for structured data in search results
-        result_divs = soup.find_all('div', class_='g')[:3]  # First 3 results
+        if 'dimension' in text_content:
+            dim_match = page_soup.find(text=lambda text: text and 'dimension' in text.lower())
+            if dim_match:
+                self.specifications['dimensions'] = str(dim_match)[:100]
         
-        for div in result_divs:
-            # Extract links for further scraping
-            link_element = div.find('a')
-            if link_element and 'href' in link_element.attrs:
-                link = link_element['href']
-                
-                # Skip non-HTTP links
-                if not link.startswith('http'):
-                    continue
-                
-                try:
-                    # PRD: rate_limiting: "Add delays between requests to avoid being blocked"
-                    time.sleep(0.5)
-                    
-                    page_response = requests.get(link, headers=headers, timeout=5)
-                    page_soup = BeautifulSoup(page_response.content, 'html.parser')
-                    
-                    # Extract images with better filtering
-                    img_tags = page_soup.find_all('img')
-                    for img in img_tags:
-                        src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                        alt = img.get('alt', '').lower()
-                        
-                        # Better image filtering
-                        if src and (
-                            'product' in src.lower() or 
-                            'camera' in src.lower() or 
-                            any(word in alt for word in search_query.lower().split()) or
-                            any(word in src.lower() for word in search_query.lower().split()) or
-                            # Look for high-res indicators
-                            any(size in src.lower() for size in ['large', 'big', 'full', 'detail', '1000', '800']) or
-                            # Common product image patterns
-                            any(pattern in src.lower() for pattern in ['prod', 'item', 'goods'])
-                        ):
-                            # Skip obvious non-product images
-                            if any(skip in src.lower() for skip in ['logo', 'icon', 'thumb', 'avatar', 'banner', 'ad', 'pixel']):
-                                continue
-                                
-                            # Make absolute URL
-                            if src.startswith('//'):
-                                src = 'https:' + src
-                            elif src.startswith('/'):
-                                src = urllib.parse.urljoin(link, src)
-                            
-                            if src.startswith('http') and src not in images and len(images) < 5:
-                                images.append(src)
-                    
-                    # Extract basic specifications from text
-                    text_content = page_soup.get_text().lower()
-                    
-                    # Look for common specifications
-                    if 'weight' in text_content:
-                        weight_match = page_soup.find(text=lambda text: text and 'weight' in text.lower())
-                        if weight_match:
-                            specifications['weight'] = str(weight_match)[:100]
-                    
-                    if 'dimension' in text_content:
-                        dim_match = page_soup.find(text=lambda text: text and 'dimension' in text.lower())
-                        if dim_match:
-                            specifications['dimensions'] = str(dim_match)[:100]
-                    
-                    # Look for pricing information
-                    price_elements = page_soup.find_all(text=lambda text: text and ('$' in text or '₹' in text or 'price' in text.lower()))
-                    if price_elements:
-                        pricing_info['market_price'] = str(price_elements[0])[:100]
-                
-                except Exception as e:
-                    print(f"Error scraping {link}: {e}")
-                    continue
+        # Look for pricing information
+        price_elements = page_soup.find_all(text=lambda text: text and ('$' in text or '₹' in text or 'price' in text.lower()))
+        if price_elements:
+            self.pricing_info['market_price'] = str(price_elements[0])[:100]
+
+    def result(self) -> Dict[str, Any]:
+        specifications = self.specifications
+        images = self.images
         
         # Fallback specifications if nothing found
         if not specifications:
             specifications = {
                 "note": "Specifications not found in search results",
-                "search_query": search_query
+                "search_query": self.search_query
             }
         
         # Fallback image if none found
@@ -561,97 +890,357 @@ def research_with_basic_scraping(search_query: str) -> Dict[str, Any]:
         
         return {
             "specifications": specifications,
-            "pricing": pricing_info if pricing_info else {"market_price": "Contact manufacturer for pricing"},
+            "pricing": self.pricing_info if self.pricing_info else {"market_price": "Contact manufacturer for pricing"},
             "images": images[:3],  # Limit to first 3 images
-            "confidence": 0.6 if specifications and images else 0.4
+            "confidence": 0.6 if specifications and images else 0.4,
+            "partial": self.partial
         }
+
+def basic_scraping_skipped(search_query: str, deadline: Deadline) -> Optional[Dict[str, Any]]:
+    if deadline.remaining() < MIN_FETCH_SECONDS:
+        deadline.mark_timed_out()
+        return research_timed_out_result(search_query)
+    if not get_breaker("google").allow_request():
+        print("Google circuit open, skipping web search")
+        return research_unavailable_result(search_query, "google")
+    return None
+
+def search_timing(deadline: Deadline):
+    """(timeout, delay) of the search request; it gets half of the budget at most so result pages still have time"""
+    search_budget = min(11, deadline.remaining() / 2)
+    # PRD: rate_limiting: "Add delays between requests to avoid being blocked"
+    delay = min(1, search_budget / 4)
+    return search_budget - delay, delay
+
+def basic_scraping_failed(search_query: str, error: Exception, deadline: Deadline) -> Dict[str, Any]:
+    print(f"Basic scraping error: {error}")
+    if deadline.expired:
+        deadline.mark_timed_out()
+        return research_timed_out_result(search_query)
+    return research_failed_result(error)
+
+@timed("basic_scraping")
+def research_with_basic_scraping(search_query: str, deadline: Deadline = None) -> Dict[str, Any]:
+    """
+    Fallback web scraping using basic requests and BeautifulSoup
+    The remaining research budget is split across the search and result page fetches
+    """
+    deadline = deadline or unbounded()
+    try:
+        skipped = basic_scraping_skipped(search_query, deadline)
+        if skipped is not None:
+            return skipped
+        
+        google_breaker = get_breaker("google")
+        timeout, delay = search_timing(deadline)
+        try:
+            response = fetch_page(search_url_for(search_query), timeout=timeout, delay=delay)
+            check_search_response(response)
+        except Exception as e:
+            google_breaker.record_failure(e)
+            raise
+        google_breaker.record_success()
+        
+        links = parse_search_results(response.content)
+        research = ScrapedResearch(search_query)
+        
+        for index, link in enumerate(links):
+            # Split what is left evenly over the remaining result pages
+            fetch_budget = deadline.split(len(links) - index, cap=5.5)
+            if fetch_budget < MIN_FETCH_SECONDS + 0.5:
+                deadline.mark_timed_out()
+                research.partial = True
+                break
+            
+            try:
+                # PRD: rate_limiting: "Add delays between requests to avoid being blocked"
+                page_response = fetch_page(link, timeout=fetch_budget - 0.5, delay=0.5)
+                research.add_page(link, page_response.content)
+            except Exception as e:
+                print(f"Error scraping {link}: {e}")
+                continue
+        
+        return research.result()
         
     except Exception as e:
-        print(f"Basic scraping error: {e}")
-        return {
-            "specifications": {"error": f"Web research failed: {str(e)}"},
-            "pricing": {"market_price": "Unable to fetch pricing"},
-            "images": ["https://via.placeholder.com/300x200?text=Error+Loading+Image"],
-            "confidence": 0.1
-        }
+        return basic_scraping_failed(search_query, e, deadline)
 
-@app.route('/api/process-audio', methods=['POST'])
-def process_audio():
+@timed("basic_scraping")
+async def research_with_basic_scraping_async(search_query: str, deadline: Deadline = None) -> Dict[str, Any]:
     """
-    Main processing endpoint implementing the 4-step pipeline:
-    PRD: processing_pipeline: audio_handling -> data_extraction -> web_research -> response_format
+    research_with_basic_scraping() for the event loop
+    Result pages are fetched concurrently, each within what is left of the research budget;
+    HTML parsing runs on a worker thread so it does not hold up other requests
     """
-    
+    deadline = deadline or unbounded()
     try:
-        # Check if audio file is present
-        if 'audio' not in request.files:
-            return jsonify({"error": "No audio file provided"}), 400
+        skipped = basic_scraping_skipped(search_query, deadline)
+        if skipped is not None:
+            return skipped
         
-        audio_file = request.files['audio']
+        google_breaker = get_breaker("google")
+        timeout, delay = search_timing(deadline)
+        try:
+            response = await fetch_page_async(search_url_for(search_query), timeout=timeout, delay=delay)
+            check_search_response(response)
+        except Exception as e:
+            google_breaker.record_failure(e)
+            raise
+        google_breaker.record_success()
         
-        # Save audio file temporarily
-        # PRD: audio_handling: "Save uploaded file temporarily, send to Whisper API"
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
-            audio_file.save(tmp_file.name)
-            
-            # Step 1: Transcribe audio
-            transcript = transcribe_audio(tmp_file.name)
-            if not transcript:
-                return jsonify({"error": "Failed to transcribe audio"}), 500
-            
-            # Step 2: Extract equipment data
-            extracted_data = extract_equipment_data(transcript)
-            if not extracted_data:
-                return jsonify({"error": "Failed to extract equipment data"}), 500
+        links = await asyncio.to_thread(parse_search_results, response.content)
+        research = ScrapedResearch(search_query)
+        
+        fetch_budget = deadline.timeout(5.5)
+        if links and fetch_budget < MIN_FETCH_SECONDS + 0.5:
+            deadline.mark_timed_out()
+            research.partial = True
+            return research.result()
+        
+        async def fetch(link: str):
+            try:
+                return await fetch_page_async(link, timeout=fetch_budget - 0.5, delay=0.5)
+            except Exception as e:
+                print(f"Error scraping {link}: {e}")
+                return None
+        
+        pages = await asyncio.gather(*(fetch(link) for link in links))
+        for link, page_response in zip(links, pages):
+            if page_response is None:
+                continue
+            try:
+                # Pages are parsed in result order, so images keep the same priority as the blocking path
+                await asyncio.to_thread(research.add_page, link, page_response.content)
+            except Exception as e:
+                print(f"Error scraping {link}: {e}")
+        
+        return research.result()
+        
+    except Exception as e:
+        return basic_scraping_failed(search_query, e, deadline)
+
+def research_image_candidates(research_data: Dict[str, Any]) -> List[str]:
+    return [img for img in research_data.get('images', []) if isinstance(img, str) and not img.startswith(PLACEHOLDER_PREFIX)]
+
+def form_images_skipped(research_images: List[str], sample_images: List[str], deadline: Deadline) -> Optional[Dict[str, Any]]:
+    if deadline.remaining() >= MIN_FETCH_SECONDS:
+        return None
+    # No time left to validate: pass candidates through unchecked rather than dropping them
+    deadline.mark_timed_out()
+    images = (research_images or sample_images)[:3]
+    return {"images": images, "primary_image": images[0] if images else None, "image_thumbnails": {}}
+
+def form_images_result(validated: List[Dict[str, Any]]) -> Dict[str, Any]:
+    images = [image['url'] for image in validated]
+    return {
+        "images": images,
+        "primary_image": images[0] if images else None,
+        "image_thumbnails": {image['url']: image['thumbnail'] for image in validated if image['thumbnail']}
+    }
+
+def prepare_form_images(research_data: Dict[str, Any], sample_images: List[str], deadline: Deadline = None) -> Dict[str, Any]:
+    """
+    Run image candidates through the image stage so the form only receives images that resolve
+    PRD: image_handling: "Show web-scraped images, allow remove/upload/undo, set primary image"
+    Scraped images are preferred; sample images are only validated when none of them survive
+    """
+    deadline = deadline or unbounded()
+    research_images = research_image_candidates(research_data)
+
+    skipped = form_images_skipped(research_images, sample_images, deadline)
+    if skipped is not None:
+        return skipped
+
+    validated = process_image_candidates(research_images, deadline=deadline)
+
+    if not validated and sample_images != research_images:
+        validated = process_image_candidates(sample_images, deadline=deadline)
+
+    return form_images_result(validated)
+
+async def prepare_form_images_async(research_data: Dict[str, Any], sample_images: List[str], deadline: Deadline = None) -> Dict[str, Any]:
+    """prepare_form_images() for the event loop"""
+    deadline = deadline or unbounded()
+    research_images = research_image_candidates(research_data)
+
+    skipped = form_images_skipped(research_images, sample_images, deadline)
+    if skipped is not None:
+        return skipped
+
+    validated = await process_image_candidates_async(research_images, deadline=deadline)
+
+    if not validated and sample_images != research_images:
+        validated = await process_image_candidates_async(sample_images, deadline=deadline)
+
+    return form_images_result(validated)
+
+def build_processing_response(transcript: str, extracted_data: Dict[str, Any], research_data: Dict[str, Any],
+                              form_images: Dict[str, Any], transcription_confidence: float, deadline: Deadline,
+                              category: str = None, sku_match: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Step 4: Combine results
+    PRD: response_format: "Return JSON with extracted data, web research results, and confidence scores"
+    """
+    if category is None:
+        category = map_equipment_type_to_category(extracted_data.get('equipment_type', ''))
+    
+    return {
+        "transcript": transcript,
+        "extracted_data": extracted_data,
+        "research_data": research_data,
+        "confidence_scores": {
+            "transcription": transcription_confidence,
+            "extraction": 0.8,
+            "research": research_data.get('confidence', 0.6)
+        },
+        "form_data": {
+            # Equipment ID section
+            "name": extracted_data.get('brand', '') + ' ' + extracted_data.get('model', ''),
+            "brand": extracted_data.get('brand', ''),
+            "model": extracted_data.get('model', ''),
+            "category": category,
             
-            # Step 3: Research specifications
-            web_search_query = extracted_data.get('web_search_query', '')
-            research_data = research_equipment_specs(web_search_query)
+            # Condition section  
+            "condition": extracted_data.get('condition', 'good'),
+            "description": extracted_data.get('description', ''),
             
-            # Step 4: Combine results
-            # PRD: response_format: "Return JSON with extracted data, web research results, and confidence scores"
-            response_data = {
-                "transcript": transcript,
-                "extracted_data": extracted_data,
-                "research_data": research_data,
-                "confidence_scores": {
-                    "transcription": 0.9,
-                    "extraction": 0.8,
-                    "research": research_data.get('confidence', 0.6)
-                },
-                "form_data": {
-                    # Equipment ID section
-                    "name": extracted_data.get('brand', '') + ' ' + extracted_data.get('model', ''),
-                    "brand": extracted_data.get('brand', ''),
-                    "model": extracted_data.get('model', ''),
-                    "category": map_equipment_type_to_category(extracted_data.get('equipment_type', '')),
-                    
-                    # Condition section  
-                    "condition": extracted_data.get('condition', 'good'),
-                    "description": extracted_data.get('description', ''),
-                    
-                    # Specifications section
-                    "specifications": research_data.get('specifications', {}),
-                    
-                    # Financial section
-                    "estimated_value": extracted_data.get('estimated_value', 0),
-                    "current_value": extracted_data.get('estimated_value', 0),
-                    
-                    # Image data from web research or sample images
-                    "images": research_data.get('images', []) if research_data.get('images') and research_data.get('images') != ["https://via.placeholder.com/300x200?text=No+Image+Found"] else extracted_data.get('sample_images', []),
-                    "primary_image": (research_data.get('images', []) if research_data.get('images') and research_data.get('images') != ["https://via.placeholder.com/300x200?text=No+Image+Found"] else extracted_data.get('sample_images', []))[0] if (research_data.get('images', []) if research_data.get('images') and research_data.get('images') != ["https://via.placeholder.com/300x200?text=No+Image+Found"] else extracted_data.get('sample_images', [])) else None
-                }
-            }
+            # Specifications section
+            "specifications": research_data.get('specifications', {}),
             
-            # Clean up temporary file
-            os.unlink(tmp_file.name)
+            # Financial section
+            "estimated_value": extracted_data.get('estimated_value', 0),
+            "current_value": extracted_data.get('estimated_value', 0),
             
-            return jsonify(response_data)
+            # Image data from web research or sample images, validated by the image stage
+            "images": form_images['images'],
+            "primary_image": form_images['primary_image'],
+            "image_thumbnails": form_images['image_thumbnails']
+        },
+        # PRD: database_operations: "automatic SKU linking or creation" - existing SKU this item would link to
+        "sku_match": sku_match,
+        # Stages cut short by the request deadline; the rest of the result is still usable
+        "partial": bool(deadline.root.timed_out_stages),
+        "timed_out_stages": list(deadline.root.timed_out_stages)
+    }
+
+def _required(result, message: str):
+    if not result:
+        raise PipelineAbort(message)
+    return result
+
+def _stage_transcription(audio: AudioSpool, deadline: Deadline) -> str:
+    return _required(transcribe_audio(audio, deadline), "Failed to transcribe audio")
+
+def _stage_extraction(transcription: str, deadline: Deadline) -> Dict[str, Any]:
+    return _required(extract_equipment_data(transcription, deadline), "Failed to extract equipment data")
+
+def _stage_category(extraction: Dict[str, Any], deadline: Deadline) -> str:
+    return map_equipment_type_to_category(extraction.get('equipment_type', ''))
+
+def _stage_sample_images(extraction: Dict[str, Any], deadline: Deadline) -> List[str]:
+    return extraction.get('sample_images') or get_sample_product_images(
+        extraction.get('brand', ''),
+        extraction.get('model', ''),
+        extraction.get('equipment_type', '')
+    )
+
+def _stage_sku_match(extraction: Dict[str, Any], deadline: Deadline):
+    return match_existing_sku(extraction.get('brand', ''), extraction.get('model', ''))
+
+def _stage_research(extraction: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+    return research_equipment_specs(extraction.get('web_search_query', ''), deadline)
+
+def _stage_images(research: Dict[str, Any], sample_images: List[str], deadline: Deadline) -> Dict[str, Any]:
+    return prepare_form_images(research, sample_images, deadline)
+
+def _stage_response(transcription: str, transcription_confidence: float, extraction: Dict[str, Any], research: Dict[str, Any],
+                    images: Dict[str, Any], category: str, sku_match, deadline: Deadline) -> Dict[str, Any]:
+    return build_processing_response(transcription, extraction, research, images, transcription_confidence, deadline,
+                                     category=category, sku_match=sku_match)
+
+async def _stage_transcription_async(audio: AudioSpool, deadline: Deadline) -> str:
+    return _required(await transcribe_audio_async(audio, deadline), "Failed to transcribe audio")
+
+async def _stage_extraction_async(transcription: str, deadline: Deadline) -> Dict[str, Any]:
+    return _required(await extract_equipment_data_async(transcription, deadline), "Failed to extract equipment data")
+
+async def _stage_sku_match_async(extraction: Dict[str, Any], deadline: Deadline):
+    return await match_existing_sku_async(extraction.get('brand', ''), extraction.get('model', ''))
+
+async def _stage_research_async(extraction: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+    return await research_equipment_specs_async(extraction.get('web_search_query', ''), deadline)
+
+async def _stage_images_async(research: Dict[str, Any], sample_images: List[str], deadline: Deadline) -> Dict[str, Any]:
+    return await prepare_form_images_async(research, sample_images, deadline)
+
+def _extraction_key(inputs: Dict[str, Any]):
+    extraction = inputs['extraction']
+    return [extraction.get('brand', ''), extraction.get('model', ''), extraction.get('equipment_type', '')]
+
+# PRD: processing_pipeline: audio_handling -> data_extraction -> web_research -> response_format
+# After extraction, SKU match, sample images, category mapping and research run concurrently
+# Network-bound stages have async variants for the ASGI app (asgi.py); the rest run on the stage pool there
+ANALYSIS_PIPELINE = Pipeline("analysis", [
+    Stage("extraction", _stage_extraction, inputs=["transcription"], cache=True, async_fn=_stage_extraction_async),
+    Stage("category", _stage_category, inputs=["extraction"]),
+    Stage("sample_images", _stage_sample_images, inputs=["extraction"], cache=True, cache_key=_extraction_key),
+    Stage("sku_match", _stage_sku_match, inputs=["extraction"], async_fn=_stage_sku_match_async),
+    Stage("research", _stage_research, inputs=["extraction"], cache=True,
+          cache_key=lambda inputs: normalize_query(inputs['extraction'].get('web_search_query', '')),
+          async_fn=_stage_research_async),
+    Stage("images", _stage_images, inputs=["research", "sample_images"], cache=True, async_fn=_stage_images_async),
+    Stage("response", _stage_response, inputs=[
+        "transcription", "transcription_confidence", "extraction", "research", "images", "category", "sku_match"
+    ])
+])
+
+AUDIO_PIPELINE = ANALYSIS_PIPELINE.extend("audio", [
+    # Keyed by the upload's content hash, so a re-submitted recording skips Whisper
+    Stage("transcription", _stage_transcription, inputs=["audio"], cache=True,
+          cache_key=lambda inputs: inputs['audio'].sha256, async_fn=_stage_transcription_async)
+])
+
+def run_audio_processing(audio: AudioSpool):
+    """Run the full audio pipeline on a validated upload and build the endpoint response; closes the upload"""
+    deadline = request_deadline()
+    
+    with audio:
+        try:
+            result = AUDIO_PIPELINE.run({"audio": audio, "transcription_confidence": 0.9}, deadline)
+        except PipelineAbort as e:
+            return jsonify({"error": e.message}), e.status
+        
+    response_data = result["response"]
+    response_data["stage_timings_ms"] = result.timings
+    
+    return jsonify(response_data)
+
+@bp.route('/api/process-audio', methods=['POST'])
+@admission_controlled(processing_admission)
+def process_audio():
+    """
+    Main processing endpoint implementing the 4-step pipeline:
+    PRD: processing_pipeline: audio_handling -> data_extraction -> web_research -> response_format
+    """
+    
+    try:
+        # PRD: audio_handling: "Save uploaded file temporarily, send to Whisper API"
+        # Size, format and hash are checked while the upload streams in
+        try:
+            uploads = get_audio_uploads('audio')
+        except UploadRejected as e:
+            return jsonify({"error": e.message}), e.status
+
+        if not uploads:
+            return jsonify({"error": "No audio file provided"}), 400
+        
+        return run_audio_processing(uploads[0])
             
     except Exception as e:
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
-@app.route('/api/process-sample', methods=['POST'])
+@bp.route('/api/process-sample', methods=['POST'])
+@admission_controlled(processing_admission)
 def process_sample():
     """
     Process sample text instead of audio for testing
@@ -664,70 +1253,22 @@ def process_sample():
         if not sample_text:
             return jsonify({"error": "No sample text provided"}), 400
         
-        # Step 1: Use sample text as transcript (skip Whisper)
-        transcript = sample_text
+        deadline = request_deadline()
         
-        # Step 2: Extract equipment data
-        extracted_data = extract_equipment_data(transcript)
-        if not extracted_data:
-            return jsonify({"error": "Failed to extract equipment data"}), 500
+        # Use sample text as transcript (skip Whisper); confidence is perfect since it's text input
+        try:
+            result = ANALYSIS_PIPELINE.run({"transcription": sample_text, "transcription_confidence": 1.0}, deadline)
+        except PipelineAbort as e:
+            return jsonify({"error": e.message}), e.status
         
-        # Step 3: Research specifications
-        web_search_query = extracted_data.get('web_search_query', '')
-        research_data = research_equipment_specs(web_search_query)
-        
-        # Step 4: Add sample images if no real images found
-        if not research_data.get('images') or research_data.get('images') == ["https://via.placeholder.com/300x200?text=No+Image+Found"]:
-            sample_images = get_sample_product_images(
-                extracted_data.get('brand', ''),
-                extracted_data.get('model', ''),
-                extracted_data.get('equipment_type', '')
-            )
-            research_data['images'] = sample_images
-            
-        # Step 4: Combine results
-        response_data = {
-            "transcript": transcript,
-            "extracted_data": extracted_data,
-            "research_data": research_data,
-            "confidence_scores": {
-                "transcription": 1.0,  # Perfect since it's text input
-                "extraction": 0.8,
-                "research": research_data.get('confidence', 0.6)
-            },
-            "form_data": {
-                # Equipment ID section
-                "name": extracted_data.get('brand', '') + ' ' + extracted_data.get('model', ''),
-                "brand": extracted_data.get('brand', ''),
-                "model": extracted_data.get('model', ''),
-                "category": map_equipment_type_to_category(extracted_data.get('equipment_type', '')),
-                
-                # Condition section  
-                "condition": extracted_data.get('condition', 'good'),
-                "description": extracted_data.get('description', ''),
-                
-                # Specifications section
-                "specifications": research_data.get('specifications', {}),
-                
-                # Financial section
-                "estimated_value": extracted_data.get('estimated_value', 0),
-                "current_value": extracted_data.get('estimated_value', 0),
-                
-                # Image data from web research or sample images
-                "images": research_data.get('images', []) if research_data.get('images') and research_data.get('images') != ["https://via.placeholder.com/300x200?text=No+Image+Found"] else extracted_data.get('sample_images', []),
-                "primary_image": (research_data.get('images', []) if research_data.get('images') and research_data.get('images') != ["https://via.placeholder.com/300x200?text=No+Image+Found"] else extracted_data.get('sample_images', []))[0] if (research_data.get('images', []) if research_data.get('images') and research_data.get('images') != ["https://via.placeholder.com/300x200?text=No+Image+Found"] else extracted_data.get('sample_images', [])) else None
-            }
-        }
+        response_data = result["response"]
+        response_data["stage_timings_ms"] = result.timings
         
         return jsonify(response_data)
         
     except Exception as e:
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "audio-processing"})
-
 if __name__ == '__main__':
+    from app import app
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,221 @@
+# Opt-in per-request profiling for staging
+# With PROFILING_ENABLED=true, a request sent with the X-Profile header runs under cProfile and the
+# profile is written to PROFILE_DIR as <timestamp>-<request id>-<endpoint>.prof (load with pstats or snakeviz).
+# Pipeline stages run in worker threads, so each stage is profiled separately and merged into the request's profile.
+# From Python 3.12 cProfile sits on sys.monitoring: one profiler per process, seeing every thread. The request's
+# profile then already covers its stages, only one request is profiled at a time, and a profile taken while other
+# requests were in flight includes their work too; it is saved as <...>.process.prof and labelled scope "process".
+
+from flask import Blueprint, request, jsonify, make_response, send_from_directory
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+import cProfile
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+bp = Blueprint('profiling', __name__)
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')  # When set, the X-Profile header must carry this value
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'camo-profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+_PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+PROCESS_SCOPE_SUFFIX = '.process.prof'
+
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+_process_profiler_lock = threading.Lock()  # Held by the one request being profiled when the profiler is process-wide
+
+# Requests in flight and started so far, to tell whether a process-wide profile saw other requests' work
+_requests_lock = threading.Lock()
+_requests = {"in_flight": 0, "started": 0}
+
+class RequestProfile:
+    """cProfile data for one request: the request thread plus any worker threads it fanned out to"""
+
+    def __init__(self, request_id: str, endpoint: str):
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.main = cProfile.Profile()
+        self.overlapping_requests = 0
+        self._workers = []
+        self._lock = threading.Lock()
+
+    @property
+    def scope(self) -> str:
+        """"process" when the profile also holds other requests' work"""
+        return "process" if PROCESS_WIDE_PROFILER and self.overlapping_requests else "request"
+
+    @contextmanager
+    def worker(self):
+        if PROCESS_WIDE_PROFILER:
+            # The request's profile already sees this thread, and a second profiler cannot be enabled
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._workers.append(profile)
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        endpoint = re.sub(r'[^\w-]', '_', self.endpoint or 'unknown')
+        suffix = PROCESS_SCOPE_SUFFIX if self.scope == "process" else '.prof'
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{self.request_id}-{endpoint}{suffix}"
+        stats = pstats.Stats(self.main)
+        with self._lock:
+            for profile in self._workers:
+                stats.add(profile)
+        stats.dump_stats(os.path.join(directory, name))
+        return name
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar('active_profile', default=None)
+
+@contextmanager
+def profile_worker():
+    """Profile this worker thread into the active request's profile, if the request is being profiled"""
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.worker():
+        yield
+
+def _profiling_requested() -> bool:
+    value = request.headers.get(PROFILING_HEADER)
+    if not value:
+        return False
+    return PROFILING_TOKEN is None or value == PROFILING_TOKEN
+
+def _prune_profiles(directory: str):
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.prof'))
+    except OSError:
+        return
+    for name in names[:-PROFILE_MAX_FILES]:
+        try:
+            os.unlink(os.path.join(directory, name))
+        except OSError:
+            pass
+
+def _unprofiled(view, reason: str, *args, **kwargs):
+    response = make_response(view(*args, **kwargs))
+    response.headers['X-Profile-Skipped'] = reason
+    return response
+
+def _run_profiled(view, *args, **kwargs):
+    request_id = re.sub(r'[^A-Za-z0-9]', '', request.headers.get('X-Request-ID', ''))[:32] or uuid.uuid4().hex[:12]
+    profile = RequestProfile(request_id, request.endpoint)
+
+    if PROCESS_WIDE_PROFILER and not _process_profiler_lock.acquire(blocking=False):
+        return _unprofiled(view, "another request is being profiled", *args, **kwargs)
+    try:
+        try:
+            profile.main.enable()
+        except ValueError as e:
+            # Another profiling tool (a debugger, coverage) holds the process-wide hook
+            return _unprofiled(view, str(e), *args, **kwargs)
+
+        with _requests_lock:
+            others_in_flight, started = _requests["in_flight"] - 1, _requests["started"]
+        token = _active_profile.set(profile)
+        try:
+            response = make_response(view(*args, **kwargs))
+        finally:
+            profile.main.disable()
+            _active_profile.reset(token)
+            with _requests_lock:
+                profile.overlapping_requests = others_in_flight + _requests["started"] - started
+    finally:
+        if PROCESS_WIDE_PROFILER:
+            _process_profiler_lock.release()
+
+    try:
+        name = profile.save(PROFILE_DIR)
+        _prune_profiles(PROFILE_DIR)
+        response.headers['X-Profile-Id'] = name
+        response.headers['X-Profile-Scope'] = profile.scope
+        if profile.scope == "process":
+            response.headers['X-Profile-Overlapping-Requests'] = str(profile.overlapping_requests)
+        print(f"Saved request profile {name}")
+    except Exception as e:
+        print(f"Failed to save request profile: {e}")
+    return response
+
+def profiled(view):
+    """Wrap a view so requests carrying the X-Profile header run under cProfile"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with _requests_lock:
+            _requests["in_flight"] += 1
+            _requests["started"] += 1
+        try:
+            if not _profiling_requested():
+                return view(*args, **kwargs)
+            return _run_profiled(view, *args, **kwargs)
+        finally:
+            with _requests_lock:
+                _requests["in_flight"] -= 1
+    return wrapper
+
+def install_profiler(flask_app):
+    """Wrap every registered view; call after all routes are added"""
+    for endpoint, view in list(flask_app.view_functions.items()):
+        if endpoint != 'static':
+            flask_app.view_functions[endpoint] = profiled(view)
+
+@bp.route('/api/ops/profiles', methods=['GET'])
+def list_profiles():
+    """Captured request profiles, newest first"""
+    if not PROFILING_ENABLED:
+        return jsonify({"error": "Profiling is disabled"}), 404
+
+    profiles = []
+    try:
+        names = sorted((name for name in os.listdir(PROFILE_DIR) if _PROFILE_NAME.match(name)), reverse=True)
+    except OSError:
+        names = []
+
+    for name in names:
+        parts = name[:-len('.prof')].split('-', 2)
+        if len(parts) != 3:
+            continue
+        timestamp, request_id, endpoint = parts
+        path = os.path.join(PROFILE_DIR, name)
+        process_scope = name.endswith(PROCESS_SCOPE_SUFFIX)
+        profiles.append({
+            "name": name,
+            "request_id": request_id,
+            "endpoint": endpoint[:-len('.process')] if process_scope else endpoint,
+            "scope": "process" if process_scope else "request",
+            "captured_at": timestamp,
+            "bytes": os.path.getsize(path)
+        })
+
+    return jsonify({"profiles": profiles, "count": len(profiles)})
+
+@bp.route('/api/ops/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Download one profile in pstats format"""
+    if not PROFILING_ENABLED:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    if not _PROFILE_NAME.match(name):
+        return jsonify({"error": "Invalid profile name"}), 400
+    return send_from_directory(PROFILE_DIR, name, mimetype='application/octet-stream', as_attachment=True)
+
+if __name__ == '__main__':
+    from app import app
+    app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,142 @@
+# Response layer: fast JSON, compression and conditional GETs
+# jsonify goes through orjson when it is installed (same output as Flask's encoder: sorted keys, HTTP dates).
+# GET JSON responses carry a strong ETag, a hash of the body, and If-None-Match answers 304 without a body.
+# Bodies of at least COMPRESS_MIN_BYTES are sent brotli (when the brotli package is installed) or gzip
+# encoded, as the client accepts; encoded representations get their own ETag ("<hash>-gzip"), as a strong
+# validator must. StaticJSON precomputes all of this once for payloads that never change, like categories.
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+from typing import Any, Dict, Optional, Tuple
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BROTLI_AVAILABLE = importlib.util.find_spec('brotli') is not None
+
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))  # Smaller bodies fit a packet anyway
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '1'))  # Per request: most of level 6's ratio for a third of the CPU
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))  # Per request; StaticJSON uses 11 once
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/csv', 'text/html'}
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                   | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+_COMPACT = {"separators": (",", ":")}  # What jsonify asks for outside debug mode
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider with orjson doing the encoding
+    Types orjson does not handle like Flask does (datetimes, dataclasses, Firestore values) go through Flask's
+    default(), so responses match what jsonify produced before, except that non-ASCII text is not escaped
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and kwargs in ({}, _COMPACT):
+            option = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits; the standard encoder handles them
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+def strong_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def choose_encoding() -> Optional[str]:
+    """The best content coding the request accepts: br, then gzip, else None"""
+    accepted = request.accept_encodings
+    if BROTLI_AVAILABLE and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(body, quality=11 if static else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if static else GZIP_LEVEL, mtime=0)
+
+def _not_modified(response: Response, etag: str) -> Response:
+    not_modified = Response(status=304)
+    for header in ('Cache-Control', 'Vary', 'Expires'):
+        if header in response.headers:
+            not_modified.headers[header] = response.headers[header]
+    not_modified.set_etag(etag)
+    return not_modified
+
+def _conditional_and_compressed(response: Response) -> Response:
+    # Streamed bodies (exports, batch NDJSON) and files are passed through as they are
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    body = response.get_data()
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+
+    etag = None
+    if request.method in ('GET', 'HEAD') and response.status_code == 200 and 'ETag' not in response.headers:
+        etag = strong_etag(body) + (f"-{encoding}" if encoding else "")
+        response.headers.setdefault('Cache-Control', 'private, no-cache')
+        if request.if_none_match.contains(etag):
+            return _not_modified(response, etag)
+        response.set_etag(etag)
+
+    if encoding:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+class StaticJSON:
+    """
+    A JSON payload fixed for the life of the process, encoded, hashed and compressed once
+    response() answers with the precomputed representation the client accepts, or 304 if it has it
+    """
+
+    def __init__(self, payload: Dict[str, Any], max_age: int):
+        self.body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.etag = strong_etag(self.body)
+        self.cache_control = f"public, max-age={max_age}, stale-while-revalidate={max_age}"
+        self._encoded: Dict[str, Tuple[bytes, str]] = {}
+
+    def _variant(self, encoding: Optional[str]) -> Tuple[bytes, str]:
+        if encoding is None:
+            return self.body, self.etag
+        if encoding not in self._encoded:
+            self._encoded[encoding] = (compress(self.body, encoding, static=True), f"{self.etag}-{encoding}")
+        return self._encoded[encoding]
+
+    def response(self) -> Response:
+        encoding = choose_encoding() if len(self.body) >= COMPRESS_MIN_BYTES else None
+        body, etag = self._variant(encoding)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+            if body is not self.body:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+def install_responses(flask_app):
+    """orjson for jsonify plus ETags, 304s and compression on every response; call after install_metrics"""
+    flask_app.json = FastJSONProvider(flask_app)
+    flask_app.after_request(_conditional_and_compressed)
\ No newline at end of file
@@ -0,0 +1,347 @@
+# Full-text search over SKUs and inventory
+# PRD: inventory_list: "with search and filters"
+# A per-process inverted index: token -> {document: field weight}. Query tokens match exactly, by prefix
+# (a sorted vocabulary, so a prefix is a bisect) or within one typo (single-deletion neighbourhoods of word
+# tokens); documents must match every query token and are ranked by IDF-weighted field scores.
+# The index is built from Firestore once, kept current by the create endpoints in this process, rebuilt in
+# the background when older than SEARCH_INDEX_REFRESH_SECONDS (other instances' writes) and snapshotted
+# to SEARCH_INDEX_PATH so a restarted worker serves searches without a full collection scan.
+
+from flask import Blueprint, request, jsonify
+from typing import Dict, Any, List, Optional, Set, Tuple
+from firebase_config import FirestoreCollections
+from background_index import BackgroundIndex
+from metrics import timed
+from session_tokens import require_auth
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+
+bp = Blueprint('search', __name__)
+
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(tempfile.gettempdir(), 'camo-inv-search-index.json'))
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv('SEARCH_INDEX_REFRESH_SECONDS', '300'))
+SEARCH_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv('SEARCH_SNAPSHOT_INTERVAL_SECONDS', '30'))
+SNAPSHOT_VERSION = 1
+
+# Indexed fields and their weights; identifiers outrank free text
+FIELD_WEIGHTS = {
+    "sku": {"name": 3.0, "brand": 2.0, "model": 3.0, "description": 1.0},
+    "inventory": {"serial_number": 4.0, "barcode": 4.0, "location": 1.5, "notes": 1.0}
+}
+# Returned with each hit so results render without another read
+DISPLAY_FIELDS = {
+    "sku": ("name", "brand", "model", "category", "image_url"),
+    "inventory": ("sku_id", "serial_number", "barcode", "location", "condition", "status")
+}
+
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 200
+MIN_FUZZY_LENGTH = 4
+EXACT_SCORE = 1.0
+FUZZY_SCORE = 0.5
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(str(text or '').lower())
+
+def _deletions(token: str) -> Set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+def _fuzzy_eligible(token: str) -> bool:
+    # Serials and barcodes are matched by prefix only; neighbourhoods of every code would dwarf the index
+    return len(token) >= MIN_FUZZY_LENGTH and token.isalpha()
+
+def document_terms(doc_type: str, doc_id: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Dict[str, float]]:
+    """Index key, display fields and token weights of one SKU or inventory item"""
+    weights: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS[doc_type].items():
+        for token in tokenize(data.get(field)):
+            weights[token] = max(weights.get(token, 0.0), weight)
+    document = {"type": doc_type, "id": doc_id}
+    for field in DISPLAY_FIELDS[doc_type]:
+        value = data.get(field)
+        document[field] = value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+    return f"{doc_type}:{doc_id}", document, weights
+
+class SearchIndex:
+    """
+    Inverted index of search documents ("<type>:<id>" -> display fields)
+    All methods are thread-safe; a search holds the lock for its few milliseconds
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_tokens: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []
+        self._neighbours: Dict[str, Set[str]] = {}
+        self.built_at = 0.0
+        self.changed_at = 0.0
+        self.seen: Optional[Set[str]] = None  # BackgroundIndex view; write-through upserts are always replayed
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _add_token(self, token: str):
+        bisect.insort(self._vocabulary, token)
+        if _fuzzy_eligible(token):
+            for variant in _deletions(token):
+                self._neighbours.setdefault(variant, set()).add(token)
+
+    def _drop_token(self, token: str):
+        position = bisect.bisect_left(self._vocabulary, token)
+        if position < len(self._vocabulary) and self._vocabulary[position] == token:
+            del self._vocabulary[position]
+        if _fuzzy_eligible(token):
+            for variant in _deletions(token):
+                tokens = self._neighbours.get(variant)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._neighbours[variant]
+
+    def _remove(self, key: str):
+        for token in self._doc_tokens.pop(key, {}):
+            postings = self._postings[token]
+            del postings[key]
+            if not postings:
+                del self._postings[token]
+                self._drop_token(token)
+        self.documents.pop(key, None)
+
+    def upsert(self, doc_type: str, doc_id: str, data: Dict[str, Any]):
+        """Index (or re-index) one SKU or inventory item from its Firestore fields"""
+        key, document, weights = document_terms(doc_type, doc_id, data)
+        with self._lock:
+            self._remove(key)
+            self.documents[key] = document
+            self._doc_tokens[key] = weights
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._add_token(token)
+                postings[key] = weight
+            self.changed_at = time.time()
+
+    def _candidates(self, term: str, last: bool) -> Dict[str, float]:
+        """Vocabulary tokens matching one query token, with their match quality"""
+        matches: Dict[str, float] = {}
+        if term in self._postings:
+            matches[term] = EXACT_SCORE
+        # The token being typed completes from its first character
+        if len(term) >= MIN_PREFIX_LENGTH or last:
+            position = bisect.bisect_left(self._vocabulary, term)
+            for token in self._vocabulary[position:position + MAX_PREFIX_EXPANSIONS]:
+                if not token.startswith(term):
+                    break
+                if token != term:
+                    # Longer completions of a short prefix count for less
+                    matches[token] = max(matches.get(token, 0.0), 0.6 + 0.4 * len(term) / len(token))
+        if _fuzzy_eligible(term):
+            variants = _deletions(term)
+            fuzzy = set(self._neighbours.get(term, ()))
+            for variant in variants:
+                fuzzy.update(self._neighbours.get(variant, ()))
+                if variant in self._postings:
+                    fuzzy.add(variant)
+            for token in fuzzy:
+                matches.setdefault(token, FUZZY_SCORE)
+        return matches
+
+    def search(self, query: str, doc_type: Optional[str] = None, limit: int = DEFAULT_LIMIT) -> Tuple[List[Dict[str, Any]], int]:
+        """Top `limit` documents matching every token of `query`, and how many matched in total"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+
+        with self._lock:
+            total_documents = max(1, len(self.documents))
+            matched = []
+            for position, term in enumerate(terms):
+                candidates = self._candidates(term, position == len(terms) - 1)
+                if not candidates:
+                    return [], 0
+                matched.append((sum(len(self._postings[token]) for token in candidates), candidates))
+            # Rarest term first, so the running intersection starts small
+            matched.sort(key=lambda item: item[0])
+
+            scores: Optional[Dict[str, float]] = None
+            for size, candidates in matched:
+                weighted = [(quality * math.log(1 + total_documents / len(self._postings[token])), self._postings[token])
+                            for token, quality in candidates.items()]
+                term_scores: Dict[str, float] = {}
+                if scores is not None and len(scores) * len(weighted) < size:
+                    # Few survivors: probe them rather than walking long posting lists
+                    for key, score in scores.items():
+                        best = max((factor * postings[key] for factor, postings in weighted if key in postings), default=0.0)
+                        if best:
+                            term_scores[key] = score + best
+                else:
+                    for factor, postings in weighted:
+                        for key, weight in postings.items():
+                            if scores is not None and key not in scores:
+                                continue
+                            if factor * weight > term_scores.get(key, 0.0):
+                                term_scores[key] = factor * weight
+                    if scores is not None:
+                        term_scores = {key: scores[key] + score for key, score in term_scores.items()}
+                scores = term_scores
+                if not scores:
+                    return [], 0
+
+            if doc_type:
+                scores = {key: score for key, score in scores.items() if self.documents[key]["type"] == doc_type}
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            results = [dict(self.documents[key], score=round(score, 3)) for key, score in top]
+        return results, len(scores)
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"version": SNAPSHOT_VERSION, "built_at": self.built_at, "documents": list(self.documents.values()),
+                    "tokens": {key: tokens for key, tokens in self._doc_tokens.items()}}
+
+    @classmethod
+    def bulk(cls, entries: List[Tuple[str, Dict[str, Any], Dict[str, float]]], built_at: float) -> 'SearchIndex':
+        """Index from (key, document, token weights) entries, sorting the vocabulary once at the end"""
+        index = cls()
+        for key, document, weights in entries:
+            index.documents[key] = document
+            index._doc_tokens[key] = weights
+            for token, weight in weights.items():
+                index._postings.setdefault(token, {})[key] = weight
+        index._vocabulary = sorted(index._postings)
+        for token in index._vocabulary:
+            if _fuzzy_eligible(token):
+                for variant in _deletions(token):
+                    index._neighbours.setdefault(variant, set()).add(token)
+        index.built_at = index.changed_at = built_at
+        return index
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> 'SearchIndex':
+        entries = []
+        for document in snapshot["documents"]:
+            key = f"{document['type']}:{document['id']}"
+            entries.append((key, document, snapshot["tokens"][key]))
+        return cls.bulk(entries, snapshot["built_at"])
+
+def build_index(db) -> SearchIndex:
+    """Full build from the skus and inventory collections"""
+    started = time.time()
+    entries = []
+    with timed("firestore", "search.scan"):
+        for doc_type, collection in (("sku", FirestoreCollections.SKUS), ("inventory", FirestoreCollections.INVENTORY)):
+            for doc in db.collection(collection).stream():
+                entries.append(document_terms(doc_type, doc.id, doc.to_dict()))
+    return SearchIndex.bulk(entries, started)
+
+class SearchService(BackgroundIndex):
+    """The process's current index: lazy warm start from a snapshot, background refresh and snapshots"""
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        super().__init__("Search", build_index, SEARCH_INDEX_REFRESH_SECONDS)
+        self.path = path
+        self._snapshot_at = 0.0
+
+    def _load_snapshot(self) -> Optional[SearchIndex]:
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return None
+            return SearchIndex.from_snapshot(snapshot)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_snapshot(self, index: SearchIndex):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(index.to_snapshot(), f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self._snapshot_at = time.time()
+        except OSError as e:
+            print(f"Search index snapshot failed: {str(e)}")
+
+    def _build(self):
+        previous = self.index
+        super()._build()
+        index = self.index
+        if index is not None and index is not previous:
+            self._save_snapshot(index)
+
+    def current(self, wait_seconds: float = 10.0) -> Optional[SearchIndex]:
+        """The index to search: snapshot or full build on first use, refreshed in the background once stale"""
+        if self.index is None:
+            with self._lock:
+                if self.index is None and not self._building:
+                    index = self._load_snapshot()
+                    if index is not None:
+                        self.index = index
+                        self.built_at = index.built_at
+                        self.ready.set()
+        return super().current(wait_seconds)
+
+    def index_document(self, doc_type: str, doc_id: str, data: Dict[str, Any]):
+        """Write-through from the create endpoints; skipped until the index is first used"""
+        # Upserts are idempotent, so writes made during a build are replayed whether or not its scan saw them
+        self.apply(None, 'upsert', doc_type, doc_id, data)
+        index = self.index
+        if index is not None and time.time() - self._snapshot_at > SEARCH_SNAPSHOT_INTERVAL_SECONDS:
+            self._snapshot_at = time.time()
+            threading.Thread(target=self._save_snapshot, args=(index,), daemon=True).start()
+
+search_service = SearchService()
+
+def index_document(doc_type: str, doc_id: str, data: Dict[str, Any]):
+    search_service.index_document(doc_type, doc_id, data)
+
+@bp.route('/api/search', methods=['GET'])
+@require_auth
+def search():
+    """
+    Search SKUs and inventory items
+    q: free text (prefix and typo tolerant); type: sku or inventory; limit: max results (default 20)
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        doc_type = request.args.get('type') or None
+        if doc_type not in (None, 'sku', 'inventory'):
+            return jsonify({"error": "type must be sku or inventory"}), 400
+        try:
+            limit = min(MAX_LIMIT, max(1, int(request.args.get('limit', DEFAULT_LIMIT))))
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+
+        if not query:
+            return jsonify({"query": query, "results": [], "count": 0, "total": 0})
+
+        index = search_service.current()
+        if index is None:
+            return jsonify({"error": "Database connection failed", "results": [], "count": 0}), 500
+
+        with timed("search", "query"):
+            results, total = index.search(query, doc_type, limit)
+
+        return jsonify({
+            "query": query,
+            "results": results,
+            "count": len(results),
+            "total": total
+        })
+
+    except Exception as e:
+        return jsonify({"error": f"Search failed: {str(e)}"}), 500
\ No newline at end of file
@@ -0,0 +1,225 @@
+# Stateless signed session tokens for the custom users collection
+# A token is "<kid>.<payload>.<signature>": the payload is base64url JSON {"sub", "iat", "exp", "jti"} and the
+# signature an HMAC-SHA256 over "<kid>.<payload>" with the key named by kid, so verifying a request is an HMAC and
+# a dict lookup, no Firestore read. Logout revokes one token by its jti; the revocation list is small (entries
+# drop out once the token would have expired anyway) and is cached in memory, re-read every few seconds.
+#   AUTH_TOKEN_KEYS="2025-06:<secret>,2025-01:<old secret>"  first key signs, every listed key verifies
+# Rotation: put the new key first and keep the old one until AUTH_TOKEN_TTL_SECONDS has passed.
+
+from flask import Blueprint, request, jsonify, g
+from functools import wraps
+from typing import Dict, Any, Optional, Tuple
+from firebase_config import get_firestore_client, FirestoreCollections
+from metrics import timed
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+bp = Blueprint('session_tokens', __name__)
+
+AUTH_TOKEN_KEYS = os.getenv('AUTH_TOKEN_KEYS', '')
+AUTH_TOKEN_TTL_SECONDS = int(os.getenv('AUTH_TOKEN_TTL_SECONDS', str(7 * 24 * 3600)))
+AUTH_REQUIRED = os.getenv('AUTH_REQUIRED', 'true').lower() == 'true'
+REVOCATION_REFRESH_SECONDS = float(os.getenv('REVOCATION_REFRESH_SECONDS', '30'))
+CLOCK_SKEW_SECONDS = 60
+
+class InvalidToken(Exception):
+    """Token is malformed, tampered with, signed by an unknown key, expired or revoked"""
+    pass
+
+def _parse_keys(spec: str) -> Tuple[str, Dict[str, bytes]]:
+    keys: Dict[str, bytes] = {}
+    signing_kid = None
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        kid, _, secret = item.strip().partition(':')
+        if not kid or not secret or '.' in kid:
+            raise ValueError(f"AUTH_TOKEN_KEYS entries must be <kid>:<secret>, got {item.strip()[:20]!r}")
+        keys[kid] = secret.encode('utf-8')
+        signing_kid = signing_kid or kid
+    if signing_kid is None:
+        # Development fallback: tokens only verify in this process and die with it
+        print("Warning: AUTH_TOKEN_KEYS not set, signing session tokens with a per-process key")
+        signing_kid = 'dev'
+        keys[signing_kid] = secrets.token_bytes(32)
+    return signing_kid, keys
+
+SIGNING_KID, _keys = _parse_keys(AUTH_TOKEN_KEYS)
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _signature(kid: str, signed: bytes) -> bytes:
+    return base64.urlsafe_b64encode(hmac.new(_keys[kid], signed, hashlib.sha256).digest()).rstrip(b'=')
+
+def _sign(kid: str, payload: str) -> str:
+    return _signature(kid, f"{kid}.{payload}".encode('ascii')).decode('ascii')
+
+def issue_token(user_id: str, ttl_seconds: int = None) -> Dict[str, Any]:
+    """New signed token for a user; returns {"token", "expires_at"} (expires_at in epoch seconds)"""
+    issued = int(time.time())
+    claims = {
+        "sub": user_id,
+        "iat": issued,
+        "exp": issued + (AUTH_TOKEN_TTL_SECONDS if ttl_seconds is None else ttl_seconds),
+        "jti": secrets.token_urlsafe(12)
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return {"token": f"{SIGNING_KID}.{payload}.{_sign(SIGNING_KID, payload)}", "expires_at": claims["exp"]}
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Claims of a token with a valid signature that has not expired; raises InvalidToken otherwise"""
+    try:
+        kid, payload, signature = token.split('.')
+        # Tokens are plain ASCII: anything else is malformed, and the signature is compared as bytes
+        signed = f"{kid}.{payload}".encode('ascii')
+        signature = signature.encode('ascii')
+    except (ValueError, TypeError, AttributeError):  # UnicodeEncodeError is a ValueError
+        raise InvalidToken("Malformed token")
+    if kid not in _keys:
+        raise InvalidToken("Token signed with an unknown key")
+    if not hmac.compare_digest(signature, _signature(kid, signed)):
+        raise InvalidToken("Bad token signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidToken("Malformed token payload")
+
+    now = time.time()
+    if claims.get("exp", 0) <= now:
+        raise InvalidToken("Token expired")
+    if claims.get("iat", 0) > now + CLOCK_SKEW_SECONDS:
+        raise InvalidToken("Token issued in the future")
+    return claims
+
+class RevocationList:
+    """
+    jti -> expiry of revoked tokens, mirrored from Firestore
+    Lookups are in memory; one caller re-reads the collection every refresh_seconds while the rest keep
+    using the current set, so a logout on another instance takes effect within that interval
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+    def _maybe_refresh(self):
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return
+            self._refreshing = True
+        try:
+            loaded = self._load()
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._loaded_at = time.monotonic()
+        if loaded is not None:
+            with self._lock:
+                now = time.time()
+                # Keep local revocations whose write may not be visible to the query yet
+                kept = {jti: expires for jti, expires in self._revoked.items() if expires > now}
+                kept.update(loaded)
+                self._revoked = kept
+
+    def _load(self) -> Optional[Dict[str, float]]:
+        db = get_firestore_client()
+        if not db:
+            return None
+        try:
+            query = db.collection(FirestoreCollections.REVOKED_TOKENS).where('expires_at', '>', time.time())
+            with timed("firestore", "revoked_tokens.list"):
+                return {doc.id: doc.to_dict()['expires_at'] for doc in query.stream()}
+        except Exception as e:
+            print(f"Revocation list refresh failed: {str(e)}")
+            return None
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        self._maybe_refresh()
+        return claims["jti"] in self._revoked
+
+    def revoke(self, claims: Dict[str, Any]):
+        """Revoke one token here at once and, through Firestore, on every other instance"""
+        with self._lock:
+            self._revoked[claims["jti"]] = claims["exp"]
+        db = get_firestore_client()
+        if db:
+            # expires_at doubles as the field for a Firestore TTL policy that deletes stale entries
+            with timed("firestore", "revoked_tokens.set"):
+                db.collection(FirestoreCollections.REVOKED_TOKENS).document(claims["jti"]).set({
+                    "user_id": claims["sub"],
+                    "expires_at": claims["exp"]
+                })
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+revocations = RevocationList()
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """decode_token plus the revocation check"""
+    claims = decode_token(token)
+    if revocations.is_revoked(claims):
+        raise InvalidToken("Token revoked")
+    return claims
+
+def bearer_token() -> Optional[str]:
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+def _unauthorized(message: str):
+    response = jsonify({"error": message})
+    response.status_code = 401
+    response.headers['WWW-Authenticate'] = 'Bearer'
+    return response
+
+def require_auth(fn):
+    """
+    Decorator for routes that need a signed-in user
+    Sets g.user_id and g.token_claims; answers 401 without a valid bearer token.
+    With AUTH_REQUIRED=false a missing token is let through (g.user_id is None) but a bad one is still rejected.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = bearer_token()
+        g.user_id = None
+        g.token_claims = None
+        if token is None:
+            if AUTH_REQUIRED:
+                return _unauthorized("Authentication required")
+            return fn(*args, **kwargs)
+        try:
+            claims = verify_token(token)
+        except InvalidToken as e:
+            return _unauthorized(str(e))
+        g.user_id = claims["sub"]
+        g.token_claims = claims
+        return fn(*args, **kwargs)
+    return wrapper
+
+@bp.route('/api/auth/logout', methods=['POST'])
+@require_auth
+def logout():
+    """Revoke the token this request was made with"""
+    try:
+        if g.token_claims is None:
+            return jsonify({"success": True})
+        revocations.revoke(g.token_claims)
+        return jsonify({"success": True})
+    except Exception as e:
+        return jsonify({"error": f"Logout failed: {str(e)}"}), 500
\ No newline at end of file
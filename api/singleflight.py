@@ -0,0 +1,162 @@
+# Singleflight coalescing of identical concurrent calls
+# When several tablets submit the same model within seconds, only one research/extraction runs and all callers share its result
+
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+
+# Set to a shared directory to also serialize identical calls across worker processes on one host
+SINGLEFLIGHT_LOCK_DIR = os.getenv('SINGLEFLIGHT_LOCK_DIR')
+FILE_LOCK_POLL_SECONDS = 0.05
+
+class _Call:
+    """One in-flight computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    In-process singleflight group
+    The first caller for a key runs the function; concurrent callers with the same key block
+    until it finishes and receive the same result (or exception). Nothing is cached afterwards.
+
+    `lock_factory` is the hook for running several worker processes: given a key and the caller's
+    timeout it returns a context manager holding a cross-process lock (e.g. a Redis or file lock),
+    taken only by the caller that actually runs the function. A lock not acquired within the
+    timeout is skipped rather than waited on.
+
+    Coroutines coalesce through do_async, on their own event loop's futures; the blocking and the
+    async paths do not wait on each other.
+    """
+
+    def __init__(self, lock_factory: Optional[Callable[[str, Optional[float]], Any]] = None):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[str, asyncio.Future] = {}
+        self.lock_factory = lock_factory
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: float = None) -> Any:
+        """Run fn once per key across concurrent callers and return its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                # Leader is too slow for this caller's budget: compute independently
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.lock_factory is not None:
+                with self.lock_factory(key, timeout):
+                    call.result = fn()
+            else:
+                call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: float = None) -> Any:
+        """
+        do() for coroutines on one event loop: the first caller awaits fn(), the others await its future
+        The cross-process lock is not taken, since it would block the loop
+        """
+        future = self._async_calls.get(key)
+        if future is not None:
+            # asyncio.wait never cancels the leader's future, even when this caller times out or is cancelled
+            await asyncio.wait({future}, timeout=timeout)
+            if not future.done() or future.cancelled():
+                # Leader is too slow for this caller's budget, or was cancelled: compute independently
+                return await fn()
+            return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Marks it retrieved when nobody was waiting
+            raise
+        finally:
+            self._async_calls.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    def in_flight(self) -> Dict[str, int]:
+        """Keys currently being computed and how many callers are waiting on each"""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
+
+def normalize_query(query: str) -> str:
+    """Normalize a research query so casing and spacing differences share one flight"""
+    return re.sub(r'\s+', ' ', (query or '').strip().lower())
+
+def research_key(search_query: str) -> str:
+    return f"research:{normalize_query(search_query)}"
+
+def transcript_key(transcript: str) -> str:
+    digest = hashlib.sha256(normalize_query(transcript).encode('utf-8')).hexdigest()
+    return f"extract:{digest}"
+
+def file_lock_factory(directory: str) -> Callable[[str, Optional[float]], Any]:
+    """
+    Cross-process lock hook backed by flock on one file per key
+    The second process waits for the first and then runs against its warm HTTP cache; once its own
+    timeout runs out it stops waiting and runs without the lock
+    """
+    import fcntl
+
+    os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def lock(key: str, timeout: float = None):
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        with open(os.path.join(directory, f"{name}.lock"), 'w') as f:
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    if give_up_at is not None and time.monotonic() >= give_up_at:
+                        print(f"Singleflight lock for {key} still held elsewhere, running without it")
+                        locked = False
+                        break
+                    time.sleep(FILE_LOCK_POLL_SECONDS)
+            try:
+                yield
+            finally:
+                if locked:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    return lock
+
+# Shared group for the processing pipeline
+pipeline_flights = SingleFlight(lock_factory=file_lock_factory(SINGLEFLIGHT_LOCK_DIR) if SINGLEFLIGHT_LOCK_DIR else None)
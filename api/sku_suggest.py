@@ -0,0 +1,238 @@
+# SKU and brand typeahead for the equipment form
+# A character trie over normalized SKU names, "brand model", models and the word suffixes of names; every
+# node keeps the top SUGGEST_TOP_K SKUs beneath it by inventory count, so a suggestion is a walk down
+# len(prefix) nodes (plus a filter of at most BUCKET_SIZE keys when the prefix runs past the trie).
+# Counts only grow (items are added, never deleted here), so offering a SKU whose count went up to the
+# nodes on its paths keeps every node's list exact.
+# Built in the background after the first request a process serves, kept current by create_sku and
+# create_inventory_item, and rebuilt after SUGGEST_REFRESH_SECONDS for other instances' writes.
+
+from flask import Blueprint, request, jsonify
+from typing import Dict, Any, List, Optional, Set
+from firebase_config import FirestoreCollections
+from background_index import BackgroundIndex
+from metrics import timed
+from session_tokens import require_auth
+import os
+import re
+import threading
+
+bp = Blueprint('sku_suggest', __name__)
+
+SUGGEST_TOP_K = int(os.getenv('SUGGEST_TOP_K', '10'))
+SUGGEST_REFRESH_SECONDS = float(os.getenv('SUGGEST_REFRESH_SECONDS', '300'))
+MAX_KEY_LENGTH = 32  # Deeper prefixes are matched on their first 32 characters
+BUCKET_SIZE = 8
+
+_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+def normalize(text: Any) -> str:
+    return _SEPARATORS.sub(' ', str(text or '').lower()).strip()
+
+def sku_keys(sku: Dict[str, Any]) -> List[str]:
+    """Strings a SKU is found by: its name and each word suffix of it, "brand model" and the model"""
+    name = normalize(sku.get('name'))
+    words = name.split(' ') if name else []
+    keys = {' '.join(words[i:]) for i in range(len(words))}
+    keys.add(normalize(f"{sku.get('brand', '')} {sku.get('model', '')}"))
+    keys.add(normalize(sku.get('model')))
+    return [key[:MAX_KEY_LENGTH] for key in keys if key]
+
+class TrieNode:
+    __slots__ = ('children', 'bucket', 'top')
+
+    def __init__(self):
+        self.children: Optional[Dict[str, 'TrieNode']] = None
+        # Leaves keep the (key, SKU ID) pairs below them instead of a node per character, and split
+        # into children once they hold more than BUCKET_SIZE; unique name tails are most of the keys
+        self.bucket: Optional[List[tuple]] = []
+        self.top: List[str] = []  # SKU IDs, highest inventory count first
+
+class SkuSuggester:
+    """Prefix trie of SKUs with per-node top-k by inventory count, plus brand totals"""
+
+    def __init__(self, top_k: int = SUGGEST_TOP_K):
+        self.top_k = top_k
+        self.root = TrieNode()
+        self.skus: Dict[str, Dict[str, Any]] = {}
+        self.counts: Dict[str, int] = {}
+        self.brands: Dict[str, Dict[str, Any]] = {}  # normalized brand -> display name, SKU and item counts
+        self._nodes: Dict[str, List[TrieNode]] = {}  # SKU ID -> nodes on its key paths
+        self._lock = threading.Lock()
+        self.seen: Optional[Set[str]] = None  # Inventory IDs read by the build scan
+
+    def _rank(self, sku_id: str):
+        return (-self.counts.get(sku_id, 0), self.skus[sku_id]['name'], sku_id)
+
+    def _offer(self, node: TrieNode, sku_id: str):
+        top = node.top
+        if sku_id not in top:
+            if len(top) >= self.top_k and self._rank(sku_id) >= self._rank(top[-1]):
+                return
+            top.append(sku_id)
+        top.sort(key=self._rank)
+        del top[self.top_k:]
+
+    def _visit(self, node: TrieNode, sku_id: str):
+        nodes = self._nodes[sku_id]
+        if node not in nodes:
+            nodes.append(node)
+        self._offer(node, sku_id)
+
+    def _burst(self, node: TrieNode, depth: int):
+        entries, node.bucket, node.children = node.bucket, None, {}
+        for key, sku_id in entries:
+            if len(key) == depth:
+                continue  # Ends here; already in node.top
+            child = node.children.get(key[depth])
+            if child is None:
+                child = node.children[key[depth]] = TrieNode()
+            child.bucket.append((key, sku_id))
+            self._visit(child, sku_id)
+        for child in node.children.values():
+            if len(child.bucket) > BUCKET_SIZE:
+                self._burst(child, depth + 1)
+
+    def _insert(self, key: str, sku_id: str):
+        node = self.root
+        self._visit(node, sku_id)
+        for depth, char in enumerate(key):
+            if node.children is None:
+                node.bucket.append((key, sku_id))
+                if len(node.bucket) > BUCKET_SIZE:
+                    self._burst(node, depth)
+                return
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = TrieNode()
+            node = child
+            self._visit(node, sku_id)
+
+    def _brand(self, sku: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = normalize(sku.get('brand'))
+        if not key:
+            return None
+        brand = self.brands.get(key)
+        if brand is None:
+            brand = self.brands[key] = {"brand": sku.get('brand'), "sku_count": 0, "inventory_count": 0}
+        return brand
+
+    def add_sku(self, sku_id: str, sku: Dict[str, Any]):
+        with self._lock:
+            if sku_id in self.skus:
+                return
+            self.skus[sku_id] = {"id": sku_id, "name": str(sku.get('name') or ''), "brand": sku.get('brand', ''),
+                                 "model": sku.get('model', ''), "category": sku.get('category', '')}
+            brand = self._brand(sku)
+            if brand is not None:
+                brand["sku_count"] += 1
+                brand["inventory_count"] += self.counts.get(sku_id, 0)
+            self._nodes[sku_id] = []
+            for key in sku_keys(sku):
+                self._insert(key, sku_id)
+
+    def add_items(self, sku_id: str, count: int = 1):
+        """Count new inventory items of a SKU"""
+        with self._lock:
+            self.counts[sku_id] = self.counts.get(sku_id, 0) + count
+            if sku_id not in self.skus:
+                return
+            brand = self._brand(self.skus[sku_id])
+            if brand is not None:
+                brand["inventory_count"] += count
+            for node in self._nodes[sku_id]:
+                self._offer(node, sku_id)
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[Dict[str, Any]]:
+        key = normalize(prefix)[:MAX_KEY_LENGTH]
+        with self._lock:
+            node = self.root
+            top = None
+            for depth, char in enumerate(key):
+                if node.children is None:
+                    # Past the trie: rank the leaf's keys that carry on with the rest of the prefix
+                    matches = {sku_id for bucket_key, sku_id in node.bucket if bucket_key.startswith(key)}
+                    top = sorted(matches, key=self._rank)
+                    break
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            if top is None:
+                top = node.top
+            return [dict(self.skus[sku_id], inventory_count=self.counts.get(sku_id, 0)) for sku_id in top[:limit]]
+
+    def suggest_brands(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[Dict[str, Any]]:
+        # A few hundred brands at most, so a scan beats keeping a second trie current
+        key = normalize(prefix)
+        with self._lock:
+            matches = [dict(brand) for name, brand in self.brands.items() if name.startswith(key)]
+        matches.sort(key=lambda brand: (-brand["inventory_count"], brand["brand"]))
+        return matches[:limit]
+
+def build_suggester(db) -> SkuSuggester:
+    """Full build: every SKU, and inventory counts from a sku_id-only scan of the inventory"""
+    suggester = SkuSuggester()
+    suggester.seen = set()
+    with timed("firestore", "suggest.scan"):
+        for doc in db.collection(FirestoreCollections.INVENTORY).select(['sku_id']).stream():
+            suggester.seen.add(doc.id)
+            sku_id = doc.to_dict().get('sku_id')
+            if sku_id:
+                suggester.counts[sku_id] = suggester.counts.get(sku_id, 0) + 1
+        for doc in db.collection(FirestoreCollections.SKUS).stream():
+            suggester.add_sku(doc.id, doc.to_dict())
+    return suggester
+
+class SuggestService(BackgroundIndex):
+    """The process's current suggester, built once and refreshed in the background"""
+
+    def __init__(self):
+        super().__init__("SKU suggest", build_suggester, SUGGEST_REFRESH_SECONDS)
+
+    def sku_created(self, sku_id: str, sku: Dict[str, Any]):
+        self.apply(sku_id, 'add_sku', sku_id, sku)
+
+    def item_created(self, item_id: str, sku_id: str):
+        if sku_id:
+            self.apply(item_id, 'add_items', sku_id, 1)
+
+suggest_service = SuggestService()
+
+@bp.teardown_app_request
+def _warm_after_first_request(exc=None):
+    # After the response of the process's first request, so neither import nor that request waits for the scan
+    if suggest_service.index is None and not suggest_service.ready.is_set():
+        suggest_service.warm()
+
+@bp.route('/api/skus/suggest', methods=['GET'])
+@require_auth
+def suggest_skus():
+    """
+    Typeahead for the equipment form
+    prefix: what has been typed; type: sku (default) or brand; limit: max suggestions (default and max SUGGEST_TOP_K)
+    """
+    try:
+        prefix = request.args.get('prefix', '')
+        suggestion_type = request.args.get('type', 'sku')
+        if suggestion_type not in ('sku', 'brand'):
+            return jsonify({"error": "type must be sku or brand"}), 400
+        try:
+            limit = min(SUGGEST_TOP_K, max(1, int(request.args.get('limit', SUGGEST_TOP_K))))
+        except ValueError:
+            return jsonify({"error": "limit must be a number"}), 400
+
+        if not normalize(prefix):
+            return jsonify({"prefix": prefix, "suggestions": []})
+
+        suggester = suggest_service.current()
+        if suggester is None:
+            return jsonify({"error": "Database connection failed", "suggestions": []}), 500
+
+        if suggestion_type == 'brand':
+            suggestions = suggester.suggest_brands(prefix, limit)
+        else:
+            suggestions = suggester.suggest(prefix, limit)
+        return jsonify({"prefix": prefix, "suggestions": suggestions})
+
+    except Exception as e:
+        return jsonify({"error": f"Suggest failed: {str(e)}"}), 500
\ No newline at end of file
@@ -1,15 +1,97 @@
 # SKU management endpoints  
 # PRD: "/api/skus": "GET/POST - List equipment SKUs, create new SKUs"
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from firebase_admin import firestore
-from firebase_config import get_firestore_client, FirestoreCollections
+from flask import Blueprint, request, jsonify
+from firebase_config import get_firestore_client, get_async_firestore_client, server_timestamp, FirestoreCollections
+from metrics import timed
+from exports import EXPORT_FORMATS, export_response
+from session_tokens import require_auth
+from search import index_document
+from sku_suggest import suggest_service
+import asyncio
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint('skus', __name__)
 
-@app.route('/api/skus', methods=['GET'])
+SKU_EXPORT_COLUMNS = ["id", "name", "brand", "model", "category", "description", "specifications",
+                      "price_per_day", "security_deposit", "image_url", "is_active", "created_at"]
+
+def find_sku_by_brand_model(db, brand: str, model: str):
+    """
+    Find an existing SKU document by brand + model combination
+    PRD: database_operations: "Save to Firebase Firestore with automatic SKU linking or creation"
+    """
+    existing_sku_query = db.collection(FirestoreCollections.SKUS)\
+        .where('brand', '==', brand)\
+        .where('model', '==', model or '')\
+        .limit(1)
+    
+    with timed("firestore", "skus.find_by_brand_model"):
+        existing_docs = list(existing_sku_query.stream())
+    return existing_docs[0] if existing_docs else None
+
+def match_existing_sku(brand: str, model: str):
+    """
+    Look up the SKU an extracted item would link to, so the form can show it before saving
+    Returns {"sku_id", "name"} or None when there is no match or no database
+    """
+    if not brand:
+        return None
+    
+    try:
+        db = get_firestore_client()
+        if not db:
+            return None
+        
+        existing_sku = find_sku_by_brand_model(db, brand, model)
+        if not existing_sku:
+            return None
+        
+        return {"sku_id": existing_sku.id, "name": existing_sku.to_dict().get('name', '')}
+    except Exception as e:
+        print(f"SKU match error: {e}")
+        return None
+
+async def match_existing_sku_async(brand: str, model: str):
+    """match_existing_sku() for the event loop, through the async Firestore client when there is one"""
+    if not brand:
+        return None
+
+    try:
+        db = get_async_firestore_client()
+        if db is None:
+            return await asyncio.to_thread(match_existing_sku, brand, model)
+
+        query = db.collection(FirestoreCollections.SKUS)\
+            .where('brand', '==', brand)\
+            .where('model', '==', model or '')\
+            .limit(1)
+
+        with timed("firestore", "skus.find_by_brand_model"):
+            existing_docs = [doc async for doc in query.stream()]
+        if not existing_docs:
+            return None
+
+        return {"sku_id": existing_docs[0].id, "name": existing_docs[0].to_dict().get('name', '')}
+    except Exception as e:
+        print(f"SKU match error: {e}")
+        return None
+
+def skus_query(db, args):
+    """SKU query with the list filters from query parameters: category, is_active"""
+    query = db.collection(FirestoreCollections.SKUS)
+    
+    category_filter = args.get('category')
+    is_active_filter = args.get('is_active')
+    
+    if category_filter:
+        query = query.where('category', '==', category_filter)
+    if is_active_filter is not None:
+        is_active = is_active_filter.lower() == 'true'
+        query = query.where('is_active', '==', is_active)
+    return query
+
+@bp.route('/api/skus', methods=['GET'])
+@require_auth
 def get_skus():
     """
     Get SKUs with optional category filtering
@@ -20,28 +102,16 @@ def get_skus():
         if not db:
             return jsonify({"error": "Database connection failed", "skus": [], "count": 0}), 500
         
-        skus_ref = db.collection(FirestoreCollections.SKUS)
-        
-        # Apply filters
-        category_filter = request.args.get('category')
-        is_active_filter = request.args.get('is_active')
-        
-        query = skus_ref
-        
-        if category_filter:
-            query = query.where('category', '==', category_filter)
-        if is_active_filter is not None:
-            is_active = is_active_filter.lower() == 'true'
-            query = query.where('is_active', '==', is_active)
+        query = skus_query(db, request.args)
         
         # Execute query
-        docs = query.stream()
         skus = []
         
-        for doc in docs:
-            sku_data = doc.to_dict()
-            sku_data['id'] = doc.id
-            skus.append(sku_data)
+        with timed("firestore", "skus.list"):
+            for doc in query.stream():
+                sku_data = doc.to_dict()
+                sku_data['id'] = doc.id
+                skus.append(sku_data)
         
         # Group by category if requested
         group_by_category = request.args.get('group_by_category', 'false').lower() == 'true'
@@ -67,7 +137,29 @@ def get_skus():
     except Exception as e:
         return jsonify({"error": f"Failed to fetch SKUs: {str(e)}"}), 500
 
-@app.route('/api/skus', methods=['POST'])
+@bp.route('/api/skus/export', methods=['GET'])
+@require_auth
+def export_skus():
+    """
+    Stream SKUs as NDJSON or CSV (format=ndjson|csv) with the list filters
+    Rows are sent as they are read, so exports of any size run in constant memory
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        db = get_firestore_client()
+        if not db:
+            return jsonify({"error": "Database connection failed"}), 500
+        
+        return export_response(skus_query(db, request.args), export_format, SKU_EXPORT_COLUMNS, "skus")
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to export SKUs: {str(e)}"}), 500
+
+@bp.route('/api/skus', methods=['POST'])
+@require_auth
 def create_sku():
     """
     Create new SKU or update existing one
@@ -90,16 +182,10 @@ def create_sku():
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
         # Check if SKU already exists (by brand + model combination)
-        existing_sku_query = db.collection(FirestoreCollections.SKUS)\
-            .where('brand', '==', data.get('brand'))\
-            .where('model', '==', data.get('model', ''))\
-            .limit(1)
-        
-        existing_docs = list(existing_sku_query.stream())
+        existing_sku = find_sku_by_brand_model(db, data.get('brand'), data.get('model', ''))
         
-        if existing_docs:
+        if existing_sku:
             # Return existing SKU ID
-            existing_sku = existing_docs[0]
             return jsonify({
                 "success": True,
                 "sku_id": existing_sku.id,
@@ -118,12 +204,15 @@ def create_sku():
             "price_per_day": data.get('price_per_day', 0),  # Daily rental price in INR
             "security_deposit": data.get('security_deposit', 0),
             "image_url": data.get('image_url', ''),
-            "created_at": firestore.SERVER_TIMESTAMP,
+            "created_at": server_timestamp(),
             "is_active": data.get('is_active', True)
         }
         
         # Add to Firestore
-        doc_ref = db.collection(FirestoreCollections.SKUS).add(sku_data)
+        with timed("firestore", "skus.add"):
+            doc_ref = db.collection(FirestoreCollections.SKUS).add(sku_data)
+        index_document("sku", doc_ref[1].id, sku_data)
+        suggest_service.sku_created(doc_ref[1].id, sku_data)
         
         return jsonify({
             "success": True,
@@ -136,4 +225,5 @@ def create_sku():
         return jsonify({"error": f"Failed to create SKU: {str(e)}"}), 500
 
 if __name__ == '__main__':
+    from app import app
     app.run(debug=True)
\ No newline at end of file
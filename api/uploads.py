@@ -0,0 +1,137 @@
+# Streaming audio upload handling
+# PRD: audio_handling: "Save uploaded file temporarily, send to Whisper API"
+# Uploads are size-capped, sniffed and hashed while the multipart body streams in, so garbage is rejected
+# on the first chunk; small recordings stay in memory and larger ones spool to an anonymous temp file
+
+from flask import Request, request
+from werkzeug.exceptions import RequestEntityTooLarge
+from typing import List, Optional, Tuple, IO
+import hashlib
+import os
+import tempfile
+
+MAX_AUDIO_BYTES = int(os.getenv('MAX_AUDIO_BYTES', str(25 * 1024 * 1024)))  # Whisper's own upload limit
+MAX_REQUEST_BYTES = int(os.getenv('MAX_REQUEST_BYTES', str(100 * 1024 * 1024)))  # Flask MAX_CONTENT_LENGTH, covers batches
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', str(2 * 1024 * 1024)))  # Kept in memory below this size
+SNIFF_BYTES = 12
+
+class UploadRejected(Exception):
+    """Upload refused before processing; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def sniff_audio_format(head: bytes) -> Optional[str]:
+    """Container format from the first bytes of a file, as the file extension Whisper expects"""
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'  # Matroska/WebM, what MediaRecorder produces in Chrome
+    if head[4:8] == b'ftyp':
+        return 'm4a'  # MP4 audio, what MediaRecorder produces in Safari
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:4] == b'OggS':
+        return 'ogg'
+    if head[:4] == b'fLaC':
+        return 'flac'
+    if head[:3] == b'ID3' or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return None
+
+class AudioSpool:
+    """
+    Write target for one uploaded file
+    Checks the size cap and the magic bytes as data arrives and hashes the stream on the way through.
+    The underlying SpooledTemporaryFile rolls over to an unnamed temp file, so nothing is left on disk.
+    """
+
+    def __init__(self, filename: str = None, max_bytes: int = MAX_AUDIO_BYTES):
+        self.filename = filename or 'recording'
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.format = None
+        self._head = b''
+        self._hash = hashlib.sha256()
+        self._file = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode='w+b')
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected(f"Audio file {self.filename} is too large, maximum is {self.max_bytes / (1024 * 1024):g} MB", 413)
+
+        if self.format is None:
+            self._head = (self._head + data)[:SNIFF_BYTES]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def _sniff(self):
+        self.format = sniff_audio_format(self._head)
+        if self.format is None:
+            raise UploadRejected(f"Audio file {self.filename} is not a supported audio format", 415)
+
+    def finish(self):
+        """Validate files too short to have been sniffed while streaming"""
+        if self.size == 0:
+            raise UploadRejected(f"Audio file {self.filename} is empty", 400)
+        if self.format is None:
+            self._sniff()
+        self._file.seek(0)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def as_file(self) -> Tuple[str, IO[bytes]]:
+        """(filename, file) rewound for an upload; the extension tells Whisper the container format"""
+        self._file.seek(0)
+        return f"recording.{self.format}", self._file
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        # read/readline/seek/tell for werkzeug's FileStorage
+        return getattr(self._file, name)
+
+class UploadRequest(Request):
+    """Request class whose multipart file parts stream into AudioSpools; every file upload in this API is a recording"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return AudioSpool(filename)
+
+def get_audio_uploads(field: str = 'audio', upload_request: Request = None) -> List[AudioSpool]:
+    """
+    Validated uploads for a multipart field of the current request, or of `upload_request` when given
+    Raises UploadRejected for oversize requests, oversize or empty files and unknown formats
+    """
+    try:
+        files = (upload_request or request).files.getlist(field)
+    except RequestEntityTooLarge:
+        raise UploadRejected(f"Upload too large, maximum is {MAX_REQUEST_BYTES / (1024 * 1024):g} MB", 413)
+
+    uploads = []
+    for file_storage in files:
+        spool = file_storage.stream
+        if not isinstance(spool, AudioSpool):
+            # App without UploadRequest: validate by copying through a spool
+            spool = AudioSpool(file_storage.filename)
+            for chunk in iter(lambda: file_storage.stream.read(64 * 1024), b''):
+                spool.write(chunk)
+        spool.finish()
+        uploads.append(spool)
+    return uploads
+
+def configure_uploads(flask_app):
+    """Install the streaming request class and the request size cap on a Flask app"""
+    flask_app.request_class = UploadRequest
+    flask_app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
\ No newline at end of file
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+One-off backfill of the parsed location fields on inventory items created before the location hierarchy
+
+Each item's free-text location is parsed into location_path (what GET /api/inventory?location_prefix= range
+queries) and location_zone, location_cabinet and location_shelf labels. Items whose stored fields already
+match are skipped, so re-running is safe, and after changing the parser it re-parses everything.
+
+    python backfill_inventory_locations.py            # dry run: report what would change
+    python backfill_inventory_locations.py --apply
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'api'))
+
+from firebase_config import get_firestore_client, FirestoreCollections
+from locations import location_fields
+
+BATCH_SIZE = 400  # Firestore allows 500 writes per batch
+
+def main():
+    parser = argparse.ArgumentParser(description="Store parsed location fields on existing inventory")
+    parser.add_argument('--apply', action='store_true', help="Write the fields (default is a dry run)")
+    args = parser.parse_args()
+
+    db = get_firestore_client()
+    if not db:
+        print("❌ Firestore connection failed")
+        sys.exit(1)
+
+    fields = ['location', 'location_path', 'location_zone', 'location_cabinet', 'location_shelf']
+    pending = []
+    paths = {}
+    for snapshot in db.collection(FirestoreCollections.INVENTORY).select(fields).stream():
+        item = snapshot.to_dict()
+        parsed = location_fields(item.get('location'))
+        paths[parsed['location_path']] = paths.get(parsed['location_path'], 0) + 1
+        if any(item.get(field) != value for field, value in parsed.items()):
+            pending.append((snapshot.reference, parsed))
+
+    if args.apply:
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = db.batch()
+            for reference, parsed in pending[start:start + BATCH_SIZE]:
+                batch.update(reference, parsed)
+            batch.commit()
+
+    for path, count in sorted(paths.items()):
+        print(f"   {path:<50} {count}")
+    verb = "Updated" if args.apply else "Would update"
+    print(f"\n{'✅' if args.apply else '🔍'} {verb} {len(pending)} items across {len(paths)} locations")
+    if not args.apply:
+        print("Dry run; re-run with --apply to write")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+One-off backfill of inventory_lookup documents for items created before barcode/serial uniqueness
+
+Each inventory item claims barcode:<code> and serial:<brand>:<serial> lookups, holding a copy of the item
+and its SKU summary, so GET /api/inventory/lookup finds it. Items whose barcode or serial number is
+already claimed by another item are reported as duplicates for manual review. Re-running is safe.
+
+    python backfill_inventory_lookups.py            # dry run: report what would change
+    python backfill_inventory_lookups.py --apply
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'api'))
+
+from firebase_config import get_firestore_client, FirestoreCollections
+from inventory import lookup_ids
+
+BATCH_SIZE = 400  # Firestore allows 500 writes per batch
+
+def main():
+    parser = argparse.ArgumentParser(description="Create barcode and serial number lookups for existing inventory")
+    parser.add_argument('--apply', action='store_true', help="Write the lookups (default is a dry run)")
+    args = parser.parse_args()
+
+    db = get_firestore_client()
+    if not db:
+        print("❌ Firestore connection failed")
+        sys.exit(1)
+
+    skus = {}
+    for snapshot in db.collection(FirestoreCollections.SKUS).stream():
+        sku = snapshot.to_dict()
+        skus[snapshot.id] = {"id": snapshot.id, "name": sku.get('name', ''), "brand": sku.get('brand', ''),
+                             "model": sku.get('model', '')}
+
+    lookups_ref = db.collection(FirestoreCollections.INVENTORY_LOOKUP)
+    claimed = {snapshot.id: snapshot.to_dict().get('inventory_id') for snapshot in lookups_ref.stream()}
+
+    pending = []
+    duplicates = 0
+    for snapshot in db.collection(FirestoreCollections.INVENTORY).stream():
+        item = snapshot.to_dict()
+        sku = skus.get(item.get('sku_id'), {})
+        for field, lookup_id in lookup_ids(item, sku.get('brand', '')).items():
+            owner = claimed.get(lookup_id)
+            if owner == snapshot.id:
+                continue
+            if owner is not None:
+                duplicates += 1
+                print(f"⚠️  {snapshot.id}: {field} {item.get(field)} already belongs to {owner}")
+                continue
+            claimed[lookup_id] = snapshot.id
+            pending.append((lookup_id, {"field": field, "inventory_id": snapshot.id, "item": item, "sku": sku}))
+
+    if args.apply:
+        for start in range(0, len(pending), BATCH_SIZE):
+            batch = db.batch()
+            for lookup_id, data in pending[start:start + BATCH_SIZE]:
+                batch.create(lookups_ref.document(lookup_id), data)
+            batch.commit()
+
+    verb = "Created" if args.apply else "Would create"
+    print(f"\n{'✅' if args.apply else '🔍'} {verb} {len(pending)} lookups, {duplicates} duplicates")
+    if not args.apply:
+        print("Dry run; re-run with --apply to write")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,8 @@
+# Benchmarks for the API against local stand-ins for Firestore, OpenAI and the web
+# Run from the repository root:
+#   python -m bench.run --concurrency 8 --requests 200
+#   python -m bench.run --server asgi --scenarios process_sample,process_audio --concurrency 64
+#   python -m bench.compare bench/results/before.json bench/results/after.json
+#   python -m bench.replay record --cassette bench/cassettes/corpus.jsonl
+#   python -m bench.replay replay --cassette bench/cassettes/corpus.jsonl --latency-scale 0
+#   python -m bench.startup --runs 5 --budget-ms 400
@@ -0,0 +1,48 @@
+# Compare two benchmark result files scenario by scenario
+#   python -m bench.compare bench/results/before.json bench/results/after.json
+
+from typing import Any, Dict
+import argparse
+import json
+
+METRICS = [
+    ("p50 ms", lambda r: r["latency_ms"]["p50"], False),
+    ("p95 ms", lambda r: r["latency_ms"]["p95"], False),
+    ("p99 ms", lambda r: r["latency_ms"]["p99"], False),
+    ("req/s", lambda r: r["throughput_rps"], True),
+    ("success", lambda r: r["success_rate"], True),
+    ("peak RSS MB", lambda r: round(r["memory"]["peak_rss_bytes"] / (1024 * 1024), 1), False)
+]
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]):
+    print(f"before: {before['meta']['git_revision']} {before['meta']['started_at']}")
+    print(f"after:  {after['meta']['git_revision']} {after['meta']['started_at']}")
+    for name in sorted(set(before["scenarios"]) | set(after["scenarios"])):
+        if name not in before["scenarios"] or name not in after["scenarios"]:
+            print(f"\n{name}: only in {'after' if name in after['scenarios'] else 'before'}")
+            continue
+        print(f"\n{name}")
+        for label, read, higher_is_better in METRICS:
+            old, new = read(before["scenarios"][name]), read(after["scenarios"][name])
+            better = (new > old) == higher_is_better if new != old else None
+            marker = "" if better is None else (" better" if better else " worse")
+            print(f"  {label:<12} {old:>10} -> {new:>10}  {_change(old, new)}{marker}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args(argv)
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    compare(before, after)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,363 @@
+# In-memory stand-in for the Firestore client used by the API
+# Covers the calls the endpoints make: collection/document references, where/order_by/limit queries,
+# add/set/create/update/delete and transactions, with an optional per-operation latency to mimic a network round trip
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import copy
+import threading
+import time
+import uuid
+
+try:
+    from firebase_admin import firestore as _firestore
+    SERVER_TIMESTAMP = _firestore.SERVER_TIMESTAMP
+except ImportError:
+    SERVER_TIMESTAMP = object()
+
+# Same exception types as the real client, so the API's error handling is exercised
+try:
+    from google.api_core.exceptions import AlreadyExists, NotFound
+except ImportError:
+    class AlreadyExists(Exception):
+        """Raised by create() on an existing document"""
+
+    class NotFound(Exception):
+        """Raised by update() on a missing document"""
+
+def _resolve(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace SERVER_TIMESTAMP sentinels the way the server would"""
+    resolved = {}
+    for key, value in data.items():
+        if value is SERVER_TIMESTAMP:
+            resolved[key] = datetime.now(timezone.utc)
+        elif isinstance(value, dict):
+            resolved[key] = _resolve(value)
+        else:
+            resolved[key] = copy.deepcopy(value)
+    return resolved
+
+def _matches(value: Any, op: str, expected: Any) -> bool:
+    try:
+        if op == '==':
+            return value == expected
+        if op == '!=':
+            return value != expected
+        if op == '<':
+            return value is not None and value < expected
+        if op == '<=':
+            return value is not None and value <= expected
+        if op == '>':
+            return value is not None and value > expected
+        if op == '>=':
+            return value is not None and value >= expected
+        if op == 'in':
+            return value in expected
+        if op == 'not-in':
+            return value not in expected
+        if op == 'array_contains':
+            return isinstance(value, list) and expected in value
+        if op == 'array_contains_any':
+            return isinstance(value, list) and any(item in value for item in expected)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator: {op}")
+
+class WriteResult:
+    """What a single-document write returns"""
+
+    def __init__(self):
+        self.update_time = datetime.now(timezone.utc)
+
+class DocumentSnapshot:
+    def __init__(self, reference: 'DocumentReference', data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field: str) -> Any:
+        return (self._data or {}).get(field)
+
+class DocumentReference:
+    def __init__(self, client: 'FakeFirestore', collection: str, document_id: str):
+        self._client = client
+        self.collection_name = collection
+        self.id = document_id
+        self.path = f"{collection}/{document_id}"
+
+    def get(self, transaction=None) -> DocumentSnapshot:
+        return self._read()[0]
+
+    def _read(self):
+        self._client._pause()
+        with self._client._lock:
+            data = self._client._collections.get(self.collection_name, {}).get(self.id)
+            return DocumentSnapshot(self, copy.deepcopy(data)), self._client._version(self)
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        self._client._pause()
+        with self._client._lock:
+            self._client._write_set(self, data, merge)
+        return WriteResult()
+
+    def create(self, data: Dict[str, Any]):
+        self._client._pause()
+        with self._client._lock:
+            self._client._write_create(self, data)
+        return WriteResult()
+
+    def update(self, data: Dict[str, Any]):
+        self._client._pause()
+        with self._client._lock:
+            self._client._write_update(self, data)
+        return WriteResult()
+
+    def delete(self):
+        self._client._pause()
+        with self._client._lock:
+            self._client._write_delete(self)
+
+class Query:
+    def __init__(self, client: 'FakeFirestore', collection: str, filters=None, orders=None, limit_count=None, offset_count=0):
+        self._client = client
+        self._collection = collection
+        self._filters = list(filters or [])
+        self._orders = list(orders or [])
+        self._limit = limit_count
+        self._offset = offset_count
+        self._fields = None
+
+    def _copy(self, **changes) -> 'Query':
+        query = Query(self._client, self._collection, self._filters, self._orders, self._limit, self._offset)
+        query._fields = self._fields
+        for key, value in changes.items():
+            setattr(query, key, value)
+        return query
+
+    def where(self, field: str = None, op: str = None, value: Any = None, filter=None) -> 'Query':
+        if filter is not None:
+            field, op, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(_filters=self._filters + [(field, op, value)])
+
+    def order_by(self, field: str, direction: str = 'ASCENDING') -> 'Query':
+        return self._copy(_orders=self._orders + [(field, direction)])
+
+    def limit(self, count: int) -> 'Query':
+        return self._copy(_limit=count)
+
+    def offset(self, count: int) -> 'Query':
+        return self._copy(_offset=count)
+
+    def select(self, field_paths) -> 'Query':
+        return self._copy(_fields=list(field_paths))
+
+    def stream(self, transaction=None):
+        self._client._pause()
+        with self._client._lock:
+            documents = list(self._client._collections.get(self._collection, {}).items())
+
+        results = [
+            (document_id, data) for document_id, data in documents
+            if all(_matches(data.get(field), op, value) for field, op, value in self._filters)
+        ]
+        for field, direction in reversed(self._orders):
+            results.sort(key=lambda item: (item[1].get(field) is None, item[1].get(field)),
+                         reverse=str(direction).upper().startswith('DESC'))
+        results = results[self._offset:]
+        if self._limit is not None:
+            results = results[:self._limit]
+
+        for document_id, data in results:
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield DocumentSnapshot(DocumentReference(self._client, self._collection, document_id), copy.deepcopy(data))
+
+    def get(self, transaction=None) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+class CollectionReference(Query):
+    def __init__(self, client: 'FakeFirestore', name: str):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, document_id: str = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict[str, Any], document_id: str = None):
+        reference = self.document(document_id)
+        reference.set(data)
+        return datetime.now(timezone.utc), reference
+
+class TransactionContention(Exception):
+    """A document read by the transaction changed before it committed"""
+
+class Transaction:
+    """
+    Buffers writes and applies them atomically on commit, like a Firestore transaction
+    Document reads are versioned; the commit fails with TransactionContention if any of them changed since
+    """
+
+    def __init__(self, client: 'FakeFirestore'):
+        self._client = client
+        self._writes = []
+        self._reads: Dict[Any, int] = {}
+
+    def _read(self, reference: DocumentReference) -> DocumentSnapshot:
+        snapshot, version = reference._read()
+        self._reads.setdefault((reference.collection_name, reference.id), version)
+        return snapshot
+
+    def get(self, reference):
+        # Both kinds of read yield snapshots, as in the real client
+        if isinstance(reference, DocumentReference):
+            return iter([self._read(reference)])
+        return reference.stream()
+
+    def get_all(self, references):
+        return iter([self._read(reference) for reference in references])
+
+    def set(self, reference: DocumentReference, data: Dict[str, Any], merge: bool = False):
+        self._writes.append(('set', reference, data, merge))
+
+    def create(self, reference: DocumentReference, data: Dict[str, Any]):
+        self._writes.append(('create', reference, data, False))
+
+    def update(self, reference: DocumentReference, data: Dict[str, Any]):
+        self._writes.append(('update', reference, data, False))
+
+    def delete(self, reference: DocumentReference):
+        self._writes.append(('delete', reference, None, False))
+
+    def _commit(self):
+        self._client._pause()
+        with self._client._lock:
+            for (collection, document_id), version in self._reads.items():
+                if self._client._versions.get((collection, document_id), 0) != version:
+                    raise TransactionContention(f"{collection}/{document_id} changed during the transaction")
+            # Validate everything first so a failing write leaves nothing applied
+            exists: Dict[Any, bool] = {}
+            for kind, reference, data, merge in self._writes:
+                key = (reference.collection_name, reference.id)
+                present = exists.get(key, reference.id in self._client._collections.get(reference.collection_name, {}))
+                if kind == 'create' and present:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+                if kind == 'update' and not present:
+                    raise NotFound(f"No document to update: {reference.path}")
+                exists[key] = kind != 'delete'
+
+            for kind, reference, data, merge in self._writes:
+                if kind == 'set':
+                    self._client._write_set(reference, data, merge)
+                elif kind == 'create':
+                    self._client._write_create(reference, data)
+                elif kind == 'update':
+                    self._client._write_update(reference, data)
+                else:
+                    self._client._write_delete(reference)
+        self._writes = []
+        self._reads = {}
+
+TRANSACTION_MAX_ATTEMPTS = 5
+
+def transactional(fn):
+    """
+    Stand-in for firestore.transactional: runs fn(transaction, ...) and commits its buffered writes
+    Optimistic like the real client: when a document it read changed before the commit, fn runs again
+    """
+    def wrapper(transaction: Transaction, *args, **kwargs):
+        for _ in range(TRANSACTION_MAX_ATTEMPTS):
+            transaction._writes = []
+            transaction._reads = {}
+            result = fn(transaction, *args, **kwargs)
+            try:
+                transaction._commit()
+                return result
+            except TransactionContention:
+                continue
+        raise ValueError(f"Failed to commit transaction in {TRANSACTION_MAX_ATTEMPTS} attempts.")
+    return wrapper
+
+class WriteBatch(Transaction):
+    def commit(self):
+        self._commit()
+
+class FakeFirestore:
+    """
+    Thread-safe in-memory Firestore client
+    latency: seconds slept per read/write round trip
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.RLock()
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Write count per document, for transaction conflict checks
+        self._versions: Dict[Any, int] = {}
+
+    def _pause(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _version(self, reference: DocumentReference) -> int:
+        return self._versions.get((reference.collection_name, reference.id), 0)
+
+    def _touch(self, reference: DocumentReference):
+        key = (reference.collection_name, reference.id)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _write_set(self, reference: DocumentReference, data: Dict[str, Any], merge: bool):
+        self._touch(reference)
+        documents = self._collections.setdefault(reference.collection_name, {})
+        if merge and reference.id in documents:
+            documents[reference.id].update(_resolve(data))
+        else:
+            documents[reference.id] = _resolve(data)
+
+    def _write_create(self, reference: DocumentReference, data: Dict[str, Any]):
+        documents = self._collections.setdefault(reference.collection_name, {})
+        if reference.id in documents:
+            raise AlreadyExists(f"Document already exists: {reference.path}")
+        self._touch(reference)
+        documents[reference.id] = _resolve(data)
+
+    def _write_update(self, reference: DocumentReference, data: Dict[str, Any]):
+        documents = self._collections.setdefault(reference.collection_name, {})
+        if reference.id not in documents:
+            raise NotFound(f"No document to update: {reference.path}")
+        self._touch(reference)
+        documents[reference.id].update(_resolve(data))
+
+    def _write_delete(self, reference: DocumentReference):
+        self._touch(reference)
+        self._collections.get(reference.collection_name, {}).pop(reference.id, None)
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def transaction(self, **kwargs) -> Transaction:
+        return Transaction(self)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            return len(self._collections.get(collection, {}))
+
+def install(client: FakeFirestore):
+    """Route the API's Firestore access to `client`; call before requests are served"""
+    import firebase_config
+    firebase_config.initialize_firebase = lambda: client
+    try:
+        from firebase_admin import firestore
+        firestore.transactional = transactional
+    except ImportError:
+        pass
+    return client
\ No newline at end of file
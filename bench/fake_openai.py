@@ -0,0 +1,158 @@
+# Local stand-in for the OpenAI HTTP API
+# Serves /v1/chat/completions (single and batched extraction) and /v1/audio/transcriptions with
+# deterministic answers and a configurable latency, so benchmarks measure our code rather than OpenAI
+
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, List
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from bench.fixture_server import QuietHTTPServer
+
+BRANDS = ["canon", "sony", "nikon", "fujifilm", "fuji", "panasonic", "olympus", "blackmagic", "red", "arri",
+          "sigma", "tamron", "zeiss", "godox", "aputure", "nanlite", "rode", "sennheiser", "zoom", "dji", "manfrotto"]
+
+EQUIPMENT_TYPES = [
+    ("lens", ["lens", "mm f", "prime", "zoom lens"]),
+    ("lighting", ["light", "led", "softbox", "strobe"]),
+    ("audio", ["microphone", "mic", "recorder", "audio", "lav"]),
+    ("tripod", ["tripod", "monopod"]),
+    ("gimbal", ["gimbal", "stabilizer"]),
+    ("drone", ["drone"]),
+    ("camera", ["camera", "body", "mirrorless", "dslr", "cinema"])
+]
+
+CONDITIONS = ["new", "good", "fair", "damaged"]
+
+DEFAULT_TRANSCRIPTS = [
+    "Canon EOS R5 mirrorless camera body in good condition with two batteries, stored on shelf A3",
+    "Sony A7 IV camera, new, with 28-70 kit lens, rack B1",
+    "Aputure 300d II LED light, fair condition, light stand included, lighting cage",
+    "Rode NTG3 shotgun microphone in good condition, audio cabinet drawer 2",
+    "Sigma 24-70mm f2.8 Art lens for Sony E mount, good condition, lens cabinet"
+]
+
+def extract_fields(text: str) -> Dict[str, Any]:
+    """Deterministic stand-in for GPT extraction"""
+    lower = text.lower()
+    brand = next((b for b in BRANDS if re.search(rf'\b{re.escape(b)}\b', lower)), "")
+    model = ""
+    if brand:
+        after = text[lower.index(brand) + len(brand):]
+        words = re.findall(r'[A-Za-z0-9][A-Za-z0-9\-\.]*', after)[:3]
+        model_words = []
+        for word in words:
+            if word.lower() in ("camera", "lens", "light", "microphone", "in", "with", "mirrorless", "body", "shotgun"):
+                break
+            model_words.append(word)
+        model = " ".join(model_words)
+    equipment_type = next((name for name, words in EQUIPMENT_TYPES if any(w in lower for w in words)), "camera")
+    condition = next((c for c in CONDITIONS if re.search(rf'\b{c}\b', lower)), "good")
+    display_brand = brand.title() if brand not in ("dji", "arri", "red") else brand.upper()
+    return {
+        "equipment_type": equipment_type,
+        "brand": display_brand,
+        "model": model,
+        "condition": condition,
+        "description": text,
+        "estimated_value": 50000 + (int(hashlib.sha256(text.encode()).hexdigest(), 16) % 200) * 1000,
+        "web_search_query": f"{display_brand} {model}".strip()
+    }
+
+class FakeOpenAIServer:
+    """
+    Threaded fake OpenAI API on 127.0.0.1
+    latency/jitter: seconds added to every response (uniform jitter, seeded for repeatability)
+    transcripts: texts returned by Whisper, picked by a hash of the uploaded audio
+    """
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, port: int = 0, seed: int = 1,
+                 transcripts: List[str] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.transcripts = transcripts or DEFAULT_TRANSCRIPTS
+        self.calls = {"chat": 0, "transcription": 0}
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server = QuietHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _delay(self):
+        with self._random_lock:
+            offset = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        time.sleep(max(0.0, self.latency + offset))
+
+    def _chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls["chat"] += 1
+        messages = body.get("messages", [])
+        user_text = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        prompt_text = " ".join(str(m.get("content", "")) for m in messages)
+
+        numbered = re.findall(r'^\[(\d+)\] (.+)$', user_text, flags=re.MULTILINE)
+        if numbered and '"items"' in prompt_text:
+            content = {"items": [dict(extract_fields(text), index=int(index)) for index, text in numbered]}
+        else:
+            content = extract_fields(user_text.split("from:", 1)[-1].strip())
+
+        completion = json.dumps(content)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": completion}}],
+            "usage": {
+                "prompt_tokens": len(prompt_text) // 4,
+                "completion_tokens": len(completion) // 4,
+                "total_tokens": (len(prompt_text) + len(completion)) // 4
+            }
+        }
+
+    def _transcription(self, raw: bytes) -> Dict[str, Any]:
+        self.calls["transcription"] += 1
+        index = int(hashlib.sha256(raw).hexdigest(), 16) % len(self.transcripts)
+        return {"text": self.transcripts[index], "language": "english", "duration": round(len(raw) / 16000, 2)}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                server._delay()
+                if self.path.endswith('/chat/completions'):
+                    payload = server._chat(json.loads(raw or b'{}'))
+                elif self.path.endswith('/audio/transcriptions'):
+                    payload = server._transcription(raw)
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeOpenAIServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
\ No newline at end of file
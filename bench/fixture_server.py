@@ -0,0 +1,127 @@
+# Local web server for the research stage: a Google-style results page plus recorded product pages
+# /search?q=... lists the best-matching fixture pages in `div.g` blocks the way the scraper expects,
+# /pages/<name>.html serves the recorded page and /images/<name>.png a generated product image
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+import hashlib
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+def make_png(width: int, height: int, seed: str) -> bytes:
+    """A small gradient PNG whose colours depend on `seed`, so different products hash differently"""
+    digest = hashlib.sha256(seed.encode('utf-8')).digest()
+    r0, g0, b0 = digest[0], digest[1], digest[2]
+    rows = []
+    for y in range(height):
+        row = bytearray([0])  # Filter type: none
+        for x in range(width):
+            row += bytes(((r0 + x) % 256, (g0 + y) % 256, (b0 + x * y // 64) % 256))
+        rows.append(bytes(row))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(b''.join(rows), 6)) + chunk(b'IEND', b'')
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Threaded server that ignores clients hanging up early (image probes stop reading after the header)"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+class FixtureWebServer:
+    """
+    Threaded fixture site on 127.0.0.1
+    latency: seconds added to every response, to mimic remote sites
+    """
+
+    def __init__(self, pages_dir: str = PAGES_DIR, latency: float = 0.05, port: int = 0):
+        self.pages_dir = pages_dir
+        self.latency = latency
+        self.pages: Dict[str, bytes] = {}
+        for name in sorted(os.listdir(pages_dir)):
+            if name.endswith('.html'):
+                with open(os.path.join(pages_dir, name), 'rb') as f:
+                    self.pages[name[:-len('.html')]] = f.read()
+        self._images: Dict[str, bytes] = {}
+        self._images_lock = threading.Lock()
+        self._server = QuietHTTPServer(('127.0.0.1', port), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}/search"
+
+    def search_page(self, query: str) -> bytes:
+        words = set(re.findall(r'[a-z0-9]+', query.lower())) - {'specifications', 'specs'}
+        ranked = sorted(self.pages, key=lambda slug: (-len(words & set(slug.split('-'))), slug))
+        results = "\n".join(
+            f'<div class="g"><a href="{self.base_url}/pages/{slug}.html"><h3>{slug.replace("-", " ").title()}</h3></a>'
+            f'<span>Specifications, price and reviews</span></div>'
+            for slug in ranked[:3]
+        )
+        return f'<html><body><div id="search">{results}</div></body></html>'.encode('utf-8')
+
+    def image(self, name: str) -> bytes:
+        with self._images_lock:
+            if name not in self._images:
+                self._images[name] = make_png(320, 240, name)
+            return self._images[name]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urllib.parse.urlparse(self.path)
+                path = parsed.path
+
+                if path == '/search':
+                    query = urllib.parse.parse_qs(parsed.query).get('q', [''])[0]
+                    self._send(server.search_page(query), 'text/html; charset=utf-8')
+                elif path.startswith('/pages/') and path[len('/pages/'):-len('.html')] in server.pages:
+                    self._send(server.pages[path[len('/pages/'):-len('.html')]], 'text/html; charset=utf-8')
+                elif path.startswith('/images/') and path.endswith('.png'):
+                    self._send(server.image(path[len('/images/'):]), 'image/png')
+                else:
+                    self._send(b'<html><body>Not found</body></html>', 'text/html', status=404)
+
+            def _send(self, body: bytes, content_type: str, status: int = 200):
+                # Range requests (image probes) get the whole body; the client reads what it needs
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FixtureWebServer':
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
\ No newline at end of file
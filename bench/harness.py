@@ -0,0 +1,182 @@
+# Starts the API in-process against local stand-ins for Firestore, OpenAI and the web
+# Everything external is replaced before app.py is imported, so no request leaves the machine
+
+from typing import Any, Dict, Optional
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+
+from bench.fake_firestore import FakeFirestore, install as install_firestore
+from bench.fake_openai import FakeOpenAIServer
+from bench.fixture_server import FixtureWebServer
+
+CATEGORIES = ["Cameras", "Lenses", "Lighting", "Audio", "Support", "Drones"]
+BRANDS = ["Canon", "Sony", "Nikon", "Fujifilm", "Panasonic", "Sigma", "Aputure", "Rode", "DJI", "Manfrotto"]
+CONDITIONS = ["new", "good", "fair", "damaged"]
+STATUSES = ["available", "booked", "maintenance", "retired"]
+
+def seed_firestore(db: FakeFirestore, skus: int = 200, inventory: int = 2000, seed: int = 1):
+    """Deterministic catalogue: `skus` SKU documents and `inventory` items spread across them"""
+    rng = random.Random(seed)
+    sku_ids = []
+    for index in range(skus):
+        brand = BRANDS[index % len(BRANDS)]
+        model = f"M{index:03d}"
+        _, reference = db.collection('skus').add({
+            "name": f"{brand} {model}",
+            "brand": brand,
+            "model": model,
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "description": f"{brand} {model} fixture SKU",
+            "specifications": {"weight": f"{rng.randint(100, 3000)} g"},
+            "price_per_day": rng.randint(500, 10000),
+            "security_deposit": rng.randint(5000, 100000),
+            "image_url": "",
+            "is_active": rng.random() > 0.1
+        })
+        sku_ids.append(reference.id)
+
+    # Items claim their barcode and serial number lookups and get parsed locations, as create_inventory_item does
+    from inventory import lookup_ids
+    from locations import location_fields
+    for index in range(inventory):
+        sku_index = rng.randrange(len(sku_ids)) if sku_ids else None
+        item = {
+            "sku_id": sku_ids[sku_index] if sku_ids else "",
+            "serial_number": f"SN{index:07d}",
+            "barcode": f"CAM-BENCH-{index:07d}",
+            "condition": rng.choice(CONDITIONS),
+            "status": rng.choice(STATUSES),
+            "location": f"Studio {rng.randint(1, 2)}, Rack {rng.choice('ABCDEF')}, Shelf {rng.randint(1, 5)}",
+            "purchase_price": rng.randint(10000, 400000),
+            "current_value": rng.randint(5000, 300000),
+            "notes": "",
+            "created_by": "bench"
+        }
+        item.update(location_fields(item["location"]))
+        _, reference = db.collection('inventory').add(item)
+        brand = BRANDS[sku_index % len(BRANDS)] if sku_ids else ""
+        sku = {"id": item["sku_id"], "name": f"{brand} M{sku_index:03d}", "brand": brand, "model": f"M{sku_index:03d}"} if sku_ids else {}
+        for field, lookup_id in lookup_ids(item, brand).items():
+            db.collection('inventory_lookup').document(lookup_id).set(
+                {"field": field, "inventory_id": reference.id, "item": item, "sku": sku})
+
+def load_api(firestore: FakeFirestore, env: Dict[str, str], seed_skus: int = 200, seed_inventory: int = 2000,
+             disable_scrapegraphai: bool = True):
+    """Point the API at the stand-ins configured in `env`, seed Firestore and import app.py; returns the app module"""
+    os.environ.update(env)
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    install_firestore(firestore)
+    seed_firestore(firestore, seed_skus, seed_inventory)
+
+    import app as api
+    if disable_scrapegraphai:
+        import process_audio
+        process_audio.SCRAPEGRAPHAI_AVAILABLE = False
+    return api
+
+def workdir_env(workdir: str) -> Dict[str, str]:
+    """Caches, upload sessions, profiles and the search snapshot under `workdir`, so runs start cold and leave nothing behind"""
+    return {
+        "HTTP_CACHE_DIR": os.path.join(workdir, 'http-cache'),
+        "IMAGE_CACHE_DIR": os.path.join(workdir, 'images'),
+        "UPLOAD_SESSION_DIR": os.path.join(workdir, 'uploads'),
+        "PROFILE_DIR": os.path.join(workdir, 'profiles'),
+        "SEARCH_INDEX_PATH": os.path.join(workdir, 'search-index.json')
+    }
+
+class BenchEnvironment:
+    """
+    Stand-ins plus the API served over HTTP on a local port
+    server="wsgi" serves app.py with werkzeug's threaded server, server="asgi" serves asgi.py with uvicorn.
+    Use as a context manager; `base_url` is the API root and `auth_headers` authenticate as a bench user.
+    """
+
+    def __init__(self, openai_latency: float = 0.3, openai_jitter: float = 0.1, page_latency: float = 0.05,
+                 firestore_latency: float = 0.0, seed_skus: int = 200, seed_inventory: int = 2000,
+                 extra_env: Optional[Dict[str, str]] = None, disable_scrapegraphai: bool = True, server: str = 'wsgi'):
+        self.workdir = tempfile.mkdtemp(prefix='camo-bench-')
+        self.openai = FakeOpenAIServer(latency=openai_latency, jitter=openai_jitter)
+        self.web = FixtureWebServer(latency=page_latency)
+        self.firestore = FakeFirestore(latency=firestore_latency)
+        self.seed_skus = seed_skus
+        self.seed_inventory = seed_inventory
+        self.extra_env = extra_env or {}
+        self.disable_scrapegraphai = disable_scrapegraphai
+        self.server = server
+        self.app = None
+        self._server = None
+        self._thread = None
+        self._port = None
+        self.auth_headers: Dict[str, str] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._port}"
+
+    def _env(self) -> Dict[str, str]:
+        env = {
+            "OPENAI_API_KEY": "sk-bench",
+            "OPENAI_BASE_URL": self.openai.url,
+            "SEARCH_BASE_URL": self.web.search_url
+        }
+        env.update(workdir_env(self.workdir))
+        env.update(self.extra_env)
+        return env
+
+    def start(self) -> 'BenchEnvironment':
+        self.openai.start()
+        self.web.start()
+        api = load_api(self.firestore, self._env(), self.seed_skus, self.seed_inventory, self.disable_scrapegraphai)
+        self.app = api.app
+        # Protected routes get a signed token for a bench user, so requests pay the real verification cost
+        from session_tokens import issue_token
+        self.auth_headers = {"Authorization": f"Bearer {issue_token('bench-user')['token']}"}
+
+        if self.server == 'asgi':
+            self._start_asgi()
+        else:
+            from werkzeug.serving import make_server
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No per-request access log lines
+            self._server = make_server('127.0.0.1', 0, self.app, threaded=True)
+            self._port = self._server.server_port
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def _start_asgi(self):
+        import asgi
+        import uvicorn
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+        self._port = sock.getsockname()[1]
+        self._server = uvicorn.Server(uvicorn.Config(asgi.app, log_level='warning', access_log=False, backlog=1024))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.01)
+
+    def stop(self):
+        if self.server == 'asgi' and self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+        elif self._server is not None:
+            self._server.shutdown()
+        self.openai.stop()
+        self.web.stop()
+
+    def __enter__(self) -> 'BenchEnvironment':
+        return self.start()
+
+    def __exit__(self, *exc: Any):
+        self.stop()
\ No newline at end of file
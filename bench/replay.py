@@ -0,0 +1,235 @@
+# Record/replay benchmark for the analysis pipeline (extraction, research, images)
+#   python -m bench.replay record --cassette bench/cassettes/corpus.jsonl               # live OpenAI and sites
+#   python -m bench.replay record --cassette /tmp/corpus.jsonl --stand-ins             # local stand-ins
+#   python -m bench.replay replay --cassette bench/cassettes/corpus.jsonl --latency-scale 0
+# Every transcript in the corpus runs through the pipeline one stage at a time, so wall time, CPU and
+# allocations can be attributed per stage; extraction is scored against the corpus labels.
+# Record and replay with the same flags, otherwise the pipeline asks for exchanges the cassette lacks.
+
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import platform
+import re
+import tempfile
+import time
+import tracemalloc
+from bench.fake_firestore import FakeFirestore
+from bench.fake_openai import FakeOpenAIServer
+from bench.fixture_server import FixtureWebServer
+from bench.harness import load_api, workdir_env
+from bench.run import RESULTS_DIR, git_revision, percentile
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'transcripts.jsonl')
+SCORED_FIELDS = ("category", "brand", "model", "condition")
+
+def load_corpus(path: str, limit: int = 0) -> List[Dict[str, Any]]:
+    """Transcripts with expected labels, one JSON object per line"""
+    with open(path) as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    return items[:limit] if limit else items
+
+def _normalize(value: Any) -> str:
+    return re.sub(r'[^a-z0-9]', '', str(value or '').lower())
+
+def score_extraction(expected: Dict[str, str], extracted: Dict[str, Any],
+                     category_of: Callable[[str], str]) -> Dict[str, bool]:
+    """
+    Field-by-field match of an extraction against its labels
+    Equipment types are compared by the form category they map to, and a model that repeats the
+    brand ("Canon EOS R5" for brand Canon) still counts as a match
+    """
+    brand = _normalize(extracted.get('brand'))
+    model = _normalize(extracted.get('model'))
+    if brand and model.startswith(brand) and model != brand:
+        model = model[len(brand):]
+    return {
+        "category": category_of(expected['equipment_type']) == category_of(str(extracted.get('equipment_type') or '')),
+        "brand": brand == _normalize(expected['brand']),
+        "model": model == _normalize(expected['model']),
+        "condition": _normalize(extracted.get('condition')) == _normalize(expected['condition'])
+    }
+
+class StageSamples:
+    """Wall time, process CPU and traced allocations for every run of each stage"""
+
+    def __init__(self, trace_allocations: bool):
+        self.trace_allocations = trace_allocations
+        self.samples: Dict[str, List[Dict[str, float]]] = {}
+
+    def instrument(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        # Stages run serially, so process-wide CPU and tracemalloc counters belong to this stage alone
+        def run(**kwargs):
+            if self.trace_allocations:
+                tracemalloc.reset_peak()
+                traced_before = tracemalloc.get_traced_memory()[0]
+            cpu_before = time.process_time()
+            started = time.perf_counter()
+            try:
+                return fn(**kwargs)
+            finally:
+                sample = {
+                    "wall_ms": (time.perf_counter() - started) * 1000,
+                    "cpu_ms": (time.process_time() - cpu_before) * 1000
+                }
+                if self.trace_allocations:
+                    current, peak = tracemalloc.get_traced_memory()
+                    sample["alloc_peak_bytes"] = max(0, peak - traced_before)
+                    sample["alloc_retained_bytes"] = current - traced_before
+                self.samples.setdefault(name, []).append(sample)
+        return run
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        summary = {}
+        for name, samples in self.samples.items():
+            wall = sorted(sample["wall_ms"] for sample in samples)
+            cpu = [sample["cpu_ms"] for sample in samples]
+            entry = {
+                "runs": len(samples),
+                "wall_ms": {
+                    "p50": round(percentile(wall, 0.50), 2),
+                    "p95": round(percentile(wall, 0.95), 2),
+                    "mean": round(sum(wall) / len(wall), 2),
+                    "total": round(sum(wall), 1)
+                },
+                "cpu_ms": {"mean": round(sum(cpu) / len(cpu), 2), "total": round(sum(cpu), 1)}
+            }
+            if self.trace_allocations:
+                peaks = [sample["alloc_peak_bytes"] for sample in samples]
+                retained = [sample["alloc_retained_bytes"] for sample in samples]
+                entry["allocations"] = {
+                    "peak_bytes_mean": int(sum(peaks) / len(peaks)),
+                    "peak_bytes_max": max(peaks),
+                    "retained_bytes_mean": int(sum(retained) / len(retained))
+                }
+            summary[name] = entry
+        return summary
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Record or replay the analysis pipeline over a transcript corpus")
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--cassette', required=True, help="Cassette file (JSON lines), written by record and read by replay")
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    parser.add_argument('--limit', type=int, default=0, help="Only the first N transcripts")
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help="Replay latency as a multiple of the recorded one; 0 replays without waiting")
+    parser.add_argument('--stand-ins', action='store_true',
+                        help="Record against the local OpenAI and web stand-ins instead of the real services")
+    parser.add_argument('--stand-in-port', type=int, default=8931, help="Port of the fixture site with --stand-ins")
+    parser.add_argument('--no-trace-allocations', action='store_true', help="Skip tracemalloc (lower overhead)")
+    parser.add_argument('--output', help="Result file, default bench/results/replay-<timestamp>.json")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus, args.limit)
+    workdir = tempfile.mkdtemp(prefix='camo-replay-')
+    env = workdir_env(workdir)
+    servers = []
+    if args.stand_ins:
+        # Recorded URLs include the fixture site's address, so it always gets the same port
+        env.update({"OPENAI_API_KEY": "sk-bench", "SEARCH_BASE_URL": f"http://127.0.0.1:{args.stand_in_port}/search"})
+        if args.mode == 'record':
+            servers = [FakeOpenAIServer(latency=0.3, jitter=0.1).start(),
+                       FixtureWebServer(latency=0.05, port=args.stand_in_port).start()]
+            env["OPENAI_BASE_URL"] = servers[0].url
+    elif args.mode == 'replay':
+        # Any configured key sends extraction down the GPT path, which the cassette answers
+        env.setdefault("OPENAI_API_KEY", os.getenv('OPENAI_API_KEY') or "sk-replay")
+    elif not os.getenv('OPENAI_API_KEY'):
+        parser.error("Recording live needs OPENAI_API_KEY (or use --stand-ins)")
+
+    load_api(FakeFirestore(), env, seed_skus=200, seed_inventory=0, disable_scrapegraphai=args.stand_ins)
+    import cassette
+    from deadline import request_deadline
+    from pipeline import Pipeline, PipelineAbort, Stage
+    from process_audio import ANALYSIS_PIPELINE, map_equipment_type_to_category
+
+    trace_allocations = not args.no_trace_allocations
+    stages = StageSamples(trace_allocations)
+    # Same DAG without stage caches, so repeated products in the corpus still do their research
+    pipeline = Pipeline("replay", [
+        Stage(stage.name, stages.instrument(stage.name, stage.fn), inputs=stage.inputs, budget=stage.budget)
+        for stage in ANALYSIS_PIPELINE.stages
+    ])
+
+    items = []
+    failures = 0
+    partial = 0
+    if trace_allocations:
+        tracemalloc.start()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    with cassette.use_cassette(args.cassette, args.mode, args.latency_scale) as tape:
+        print(f"{args.mode.title()}ing {len(corpus)} transcripts ({args.cassette})")
+        for item in corpus:
+            deadline = request_deadline()
+            try:
+                result = pipeline.run({"transcription": item["transcript"], "transcription_confidence": 1.0}, deadline, serial=True)
+            except PipelineAbort as e:
+                failures += 1
+                items.append({"id": item["id"], "error": e.message})
+                continue
+            partial += 1 if deadline.root.timed_out_stages else 0
+            extraction = result["extraction"]
+            items.append({
+                "id": item["id"],
+                "scores": score_extraction(item["expected"], extraction, map_equipment_type_to_category),
+                "extracted": {field: extraction.get(field) for field in ("equipment_type", "brand", "model", "condition")},
+                "expected": item["expected"],
+                "timed_out_stages": list(deadline.root.timed_out_stages)
+            })
+        cassette_stats = dict(tape.stats)
+
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    if trace_allocations:
+        tracemalloc.stop()
+    for server in servers:
+        server.stop()
+
+    scored = [item for item in items if "scores" in item]
+    accuracy = {
+        field: round(sum(item["scores"][field] for item in scored) / len(scored), 4) if scored else 0.0
+        for field in SCORED_FIELDS
+    }
+    accuracy["all_fields"] = round(sum(all(item["scores"].values()) for item in scored) / len(scored), 4) if scored else 0.0
+
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "transcripts": len(corpus),
+        "failures": failures,
+        "partial": partial,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "cassette": cassette_stats,
+        "stages": stages.summary(),
+        "accuracy": accuracy,
+        "mismatches": [item for item in items if "error" in item or not all(item["scores"].values())]
+    }
+
+    print(f"{'stage':<14} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'cpu ms':>9} {'peak KB':>9}")
+    for name, entry in results["stages"].items():
+        peak = entry.get("allocations", {}).get("peak_bytes_mean")
+        print(f"{name:<14} {entry['runs']:>5} {entry['wall_ms']['p50']:>9} {entry['wall_ms']['p95']:>9} "
+              f"{entry['cpu_ms']['mean']:>9} {(round(peak / 1024, 1) if peak is not None else '-'):>9}")
+    print(f"wall {results['wall_seconds']}s  cpu {results['cpu_seconds']}s  failures {failures}  partial {partial}  "
+          f"cassette {cassette_stats}")
+    print("accuracy " + "  ".join(f"{field} {value:.1%}" for field, value in accuracy.items()))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"replay-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+# Load driver: runs each endpoint scenario at a fixed concurrency and reports latency percentiles,
+# throughput, status codes and memory, written as JSON for comparing runs
+#   python -m bench.run --scenarios inventory_list,process_sample --concurrency 16 --requests 300
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+import tracemalloc
+import requests
+from bench.harness import BenchEnvironment, BRANDS, CATEGORIES
+from bench.fake_openai import DEFAULT_TRANSCRIPTS
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+WEBM_HEADER = b'\x1a\x45\xdf\xa3'
+
+# Exact, prefix, typo and identifier queries against the seeded catalogue
+SEARCH_QUERIES = ["canon", "sony m01", "nikn", "fixture sku", "rack c", "SN00012", "CAM-BENCH-0001999", "manfroto m1"]
+
+# Keystroke-by-keystroke prefixes, as the equipment form sends them
+SUGGEST_PREFIXES = ["c", "ca", "can", "canon", "canon m", "s", "so", "sony", "fix", "m0", "go", "zz"]
+
+def _audio_bytes(index: int, unique: bool) -> bytes:
+    """A WebM-looking recording; unique payloads defeat the transcription cache, like real recordings"""
+    body = (f"bench-recording-{index if unique else 0}-".encode('utf-8') * 2000)[:32000]
+    return WEBM_HEADER + body
+
+def build_scenarios(unique_audio: bool) -> Dict[str, Callable[[requests.Session, str, int], requests.Response]]:
+    return {
+        "inventory_list": lambda s, base, i: s.get(f"{base}/api/inventory", params={"status": "available"} if i % 2 else None),
+        "inventory_create": lambda s, base, i: s.post(f"{base}/api/inventory", json={
+            "sku_id": "bench-sku", "serial_number": f"BENCH{i:06d}", "barcode": f"CAM-LOAD-{i:06d}",
+            "condition": "good", "status": "available", "location": "Rack Z1"
+        }),
+        "inventory_export": lambda s, base, i: s.get(f"{base}/api/inventory/export", params={"format": "csv" if i % 2 else "ndjson", "status": "available"}),
+        "inventory_by_location": lambda s, base, i: s.get(f"{base}/api/inventory", params={"location_prefix": f"studio-{i % 2 + 1}/rack-{'abcdef'[i % 6]}/"}),
+        "location_tree": lambda s, base, i: s.get(f"{base}/api/inventory/locations", params={"path": "studio-1/"} if i % 2 else None),
+        "inventory_lookup": lambda s, base, i: s.get(f"{base}/api/inventory/lookup", params={"barcode": f"CAM-BENCH-{abs(i) % 1000:07d}"}),
+        "skus_list": lambda s, base, i: s.get(f"{base}/api/skus", params={"category": CATEGORIES[i % len(CATEGORIES)]} if i % 2 else None),
+        "skus_create": lambda s, base, i: s.post(f"{base}/api/skus", json={
+            "name": f"{BRANDS[i % len(BRANDS)]} Load {i}", "brand": BRANDS[i % len(BRANDS)], "model": f"Load {i}",
+            "category": CATEGORIES[i % len(CATEGORIES)]
+        }),
+        "search": lambda s, base, i: s.get(f"{base}/api/search", params={"q": SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}),
+        "skus_suggest": lambda s, base, i: s.get(f"{base}/api/skus/suggest", params={"prefix": SUGGEST_PREFIXES[i % len(SUGGEST_PREFIXES)]}),
+        "process_sample": lambda s, base, i: s.post(f"{base}/api/process-sample", json={
+            "sample_text": DEFAULT_TRANSCRIPTS[i % len(DEFAULT_TRANSCRIPTS)]
+        }),
+        "process_audio": lambda s, base, i: s.post(f"{base}/api/process-audio", files={
+            "audio": ("recording.webm", _audio_bytes(i, unique_audio), "audio/webm")
+        })
+    }
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+def run_scenario(name: str, call: Callable, base_url: str, requests_count: int, concurrency: int,
+                 trace_allocations: bool, headers: Dict[str, str] = None) -> Dict[str, Any]:
+    local = threading.local()
+    latencies = []
+    statuses: Dict[str, int] = {}
+    errors = []
+    lock = threading.Lock()
+
+    def one(index: int):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.headers.update(headers or {})
+        started = time.perf_counter()
+        try:
+            response = call(local.session, base_url, index)
+            response.content  # Include body transfer, incl. streamed responses
+            status = str(response.status_code)
+        except Exception as e:
+            status = "exception"
+            with lock:
+                errors.append(str(e)[:200])
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    rss_before = rss_bytes()
+    if trace_allocations:
+        tracemalloc.start()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests_count)))
+
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    traced_peak = None
+    if trace_allocations:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.isdigit() and int(status) < 400)
+    return {
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests_count / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+        },
+        "statuses": statuses,
+        "success_rate": round(ok / requests_count, 4) if requests_count else 0.0,
+        "cpu_seconds": round(cpu, 3),
+        "memory": {
+            "rss_before_bytes": rss_before,
+            "rss_after_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "traced_peak_bytes": traced_peak
+        },
+        "errors": errors[:5]
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the API against local stand-ins")
+    parser.add_argument('--scenarios', default='inventory_list,inventory_create,skus_list,skus_create,process_sample,process_audio',
+                        help="Comma-separated scenario names")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100, help="Requests per scenario")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per scenario")
+    parser.add_argument('--openai-latency', type=float, default=0.3)
+    parser.add_argument('--openai-jitter', type=float, default=0.1)
+    parser.add_argument('--page-latency', type=float, default=0.05)
+    parser.add_argument('--firestore-latency', type=float, default=0.005)
+    parser.add_argument('--seed-skus', type=int, default=200)
+    parser.add_argument('--seed-inventory', type=int, default=2000)
+    parser.add_argument('--repeat-audio', action='store_true', help="Send identical recordings (transcription cache hits)")
+    parser.add_argument('--trace-allocations', action='store_true', help="Track Python allocation peaks (slower)")
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                        help="Serve app.py with a threaded WSGI server or asgi.py with uvicorn")
+    parser.add_argument('--output', help="Result file, default bench/results/<timestamp>.json")
+    args = parser.parse_args(argv)
+
+    scenarios = build_scenarios(unique_audio=not args.repeat_audio)
+    selected = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(scenarios)})")
+
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "scenarios": {}
+    }
+
+    with BenchEnvironment(openai_latency=args.openai_latency, openai_jitter=args.openai_jitter,
+                          page_latency=args.page_latency, firestore_latency=args.firestore_latency,
+                          seed_skus=args.seed_skus, seed_inventory=args.seed_inventory, server=args.server) as env:
+        for name in selected:
+            call = scenarios[name]
+            warmup_session = requests.Session()
+            warmup_session.headers.update(env.auth_headers)
+            for index in range(args.warmup):
+                call(warmup_session, env.base_url, -1 - index)
+            print(f"Running {name}: {args.requests} requests at concurrency {args.concurrency}")
+            result = run_scenario(name, call, env.base_url, args.requests, args.concurrency, args.trace_allocations,
+                                  env.auth_headers)
+            results["scenarios"][name] = result
+            latency = result["latency_ms"]
+            print(f"  p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms  "
+                  f"{result['throughput_rps']} req/s  statuses {result['statuses']}")
+        results["stand_in_calls"] = dict(env.openai.calls)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    return results
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+# Cold-start benchmark: fresh interpreters import the API and serve one request, measured against a budget
+#   python -m bench.startup --runs 5 --path /api/categories --budget-ms 400
+# Prints an import-time report (self time per package, from python -X importtime) and exits non-zero
+# when the median cold start is over budget, so it can gate CI
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from bench.harness import API_DIR
+from bench.run import RESULTS_DIR, git_revision
+
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '400'))
+
+# Runs inside the fresh interpreter; the last stdout line is the measurement
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {api_dir!r})
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get({path!r})
+finished = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (finished - imported) * 1000,
+    "status": response.status_code,
+    "modules_loaded": len(sys.modules)
+}}))
+'''
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Self time in ms per top-level package; self times add up to the whole import"""
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, _, name = line[len('import time:'):].split('|')
+            package = name.strip().split('.')[0]
+            packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+        except ValueError:
+            continue
+    return packages
+
+def cold_start(path: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """One fresh interpreter: process wall time, import and first-request time, import-time breakdown"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(api_dir=API_DIR, path=path)],
+        cwd=API_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{completed.stderr[-2000:]}")
+    sample = json.loads(completed.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = process_ms
+    sample["packages"] = parse_importtime(completed.stderr)
+    return sample
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Measure API cold-start time against a budget")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/categories', help="Request served after the import")
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help="Budget for import plus first request (median), default STARTUP_BUDGET_MS or 400")
+    parser.add_argument('--top', type=int, default=15, help="Packages listed in the import-time report")
+    parser.add_argument('--output', help="Result file, default bench/results/startup-<timestamp>.json")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.pop('PROFILING_ENABLED', None)
+    samples = [cold_start(args.path, env) for _ in range(args.runs)]
+
+    def median(field: str) -> float:
+        return round(statistics.median(sample[field] for sample in samples), 1)
+
+    cold_start_ms = round(statistics.median(sample["import_ms"] + sample["first_request_ms"] for sample in samples), 1)
+    packages = {}
+    for name in set().union(*(sample["packages"] for sample in samples)):
+        packages[name] = round(statistics.median(sample["packages"].get(name, 0.0) for sample in samples), 1)
+    ranked = sorted(packages.items(), key=lambda item: -item[1])
+
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "cold_start_ms": cold_start_ms,
+        "budget_ms": args.budget_ms,
+        "within_budget": cold_start_ms <= args.budget_ms,
+        "import_ms": median("import_ms"),
+        "first_request_ms": median("first_request_ms"),
+        "process_ms": median("process_ms"),
+        "modules_loaded": int(median("modules_loaded")),
+        "statuses": sorted({sample["status"] for sample in samples}),
+        "import_self_ms_by_package": dict(ranked)
+    }
+
+    print(f"{'package':<28} {'self ms':>9}")
+    for name, self_ms in ranked[:args.top]:
+        print(f"{name:<28} {self_ms:>9}")
+    print(f"import {results['import_ms']} ms  first request {results['first_request_ms']} ms  "
+          f"process {results['process_ms']} ms  modules {results['modules_loaded']}")
+    print(f"cold start {cold_start_ms} ms, budget {args.budget_ms} ms: "
+          f"{'ok' if results['within_budget'] else 'OVER BUDGET'}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    if not results["within_budget"]:
+        sys.exit(1)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+One-off migration of the users collection to email-keyed document IDs
+
+Login and signup address users/<user_doc_id(email)>; accounts created before that live under random IDs.
+Each one is copied to its new ID (keeping the old ID as legacy_id) and the old document deleted, then
+inventory items whose created_by is the old ID are pointed at the new one. Re-running is safe.
+
+    python migrate_user_ids.py            # dry run: report what would change
+    python migrate_user_ids.py --apply
+
+Emails registered more than once (possible with the old check-then-insert signup) keep their earliest
+account; the others are listed and left in place for manual review.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'api'))
+
+from auth import user_doc_id
+from firebase_config import get_firestore_client, FirestoreCollections
+
+BATCH_SIZE = 400  # Firestore allows 500 writes per batch
+
+def _created_key(snapshot):
+    created_at = snapshot.to_dict().get('created_at')
+    return (created_at is None, str(created_at))
+
+def repoint_inventory(db, legacy_id: str, user_id: str, apply: bool) -> int:
+    """Point inventory created_by fields at the new user ID; returns how many items reference the old one"""
+    items = list(db.collection(FirestoreCollections.INVENTORY).where('created_by', '==', legacy_id).stream())
+    if apply:
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = db.batch()
+            for item in items[start:start + BATCH_SIZE]:
+                batch.update(item.reference, {"created_by": user_id})
+            batch.commit()
+    return len(items)
+
+def main():
+    parser = argparse.ArgumentParser(description="Move users to document IDs derived from their email")
+    parser.add_argument('--apply', action='store_true', help="Write the changes (default is a dry run)")
+    args = parser.parse_args()
+
+    db = get_firestore_client()
+    if not db:
+        print("❌ Firestore connection failed")
+        sys.exit(1)
+
+    users_ref = db.collection(FirestoreCollections.USERS)
+    by_id = {}
+    by_email = {}
+    for snapshot in users_ref.stream():
+        by_id[snapshot.id] = snapshot
+        email = snapshot.to_dict().get('email')
+        if email:
+            by_email.setdefault(user_doc_id(email), []).append(snapshot)
+        else:
+            print(f"⚠️  {snapshot.id}: no email, skipped")
+
+    moved = repointed = 0
+    duplicates = []
+    for target_id, snapshots in by_email.items():
+        existing = by_id.get(target_id)
+        legacy = sorted((s for s in snapshots if s.id != target_id), key=_created_key)
+        if existing is None and legacy:
+            source = legacy.pop(0)
+            data = dict(source.to_dict(), legacy_id=source.id)
+            print(f"{'➡️ ' if args.apply else '   would move'} {source.id} -> {target_id} ({data['email']})")
+            if args.apply:
+                batch = db.batch()
+                batch.create(users_ref.document(target_id), data)
+                batch.delete(source.reference)
+                batch.commit()
+            moved += 1
+            legacy_id = source.id
+        else:
+            legacy_id = existing.to_dict().get('legacy_id') if existing is not None else None
+        duplicates += legacy
+
+        # Also finishes the references of users moved by an earlier, interrupted run
+        if legacy_id:
+            repointed += repoint_inventory(db, legacy_id, target_id, args.apply)
+
+    for snapshot in duplicates:
+        print(f"⚠️  {snapshot.id}: duplicate account for {snapshot.to_dict().get('email')}, left in place")
+
+    verb = "Moved" if args.apply else "Would move"
+    print(f"\n{'✅' if args.apply else '🔍'} {verb} {moved} users, {len(duplicates)} duplicates, "
+          f"{repointed} inventory items referencing old IDs")
+    if not args.apply:
+        print("Dry run; re-run with --apply to write")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
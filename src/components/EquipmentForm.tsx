@@ -56,6 +56,7 @@ interface EquipmentFormData {
   // Image handling
   images: string[];
   primary_image: string;
+  image_thumbnails?: Record<string, string>;
   removed_images: string[];
   uploaded_images: string[];
 }
@@ -87,6 +88,11 @@ export default function EquipmentForm({
   const [removedImages, setRemovedImages] = useState<string[]>([]);
   const [uploadedImages, setUploadedImages] = useState<string[]>([]);
   const [originalImages, setOriginalImages] = useState<string[]>(initialData.images || []);
+  const imageThumbnails = initialData.image_thumbnails || {};
+
+  // Prefer small locally cached thumbnails over full-size remote images
+  const displayUrl = (imageUrl: string) =>
+    imageThumbnails[imageUrl] ? `${process.env.REACT_APP_API_URL}${imageThumbnails[imageUrl]}` : imageUrl;
 
   // Auto-generate barcode on component mount if not provided
   useEffect(() => {
@@ -395,7 +401,7 @@ export default function EquipmentForm({
               </label>
               <div className="relative w-full h-48 bg-gray-light rounded-input overflow-hidden">
                 <img 
-                  src={primaryImage} 
+                  src={displayUrl(primaryImage)} 
                   alt="Primary equipment image" 
                   className="w-full h-full object-cover"
                 />
@@ -413,7 +419,7 @@ export default function EquipmentForm({
                 <div key={index} className="relative">
                   <div className="aspect-square bg-gray-light rounded-input overflow-hidden">
                     <img 
-                      src={imageUrl} 
+                      src={displayUrl(imageUrl)} 
                       alt={`Equipment image ${index + 1}`} 
                       className="w-full h-full object-cover cursor-pointer"
                       onClick={() => handleSetPrimary(imageUrl)}
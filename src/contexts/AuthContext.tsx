@@ -3,6 +3,7 @@
 // PRD: session_management: "Firebase handles token refresh and persistence automatically"
 
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
+import { authHeaders, isTokenExpired } from '../utils/authHeaders';
 
 interface User {
   id: string;
@@ -85,6 +86,12 @@ export function AuthProvider({ children }: AuthProviderProps) {
   }
 
   async function logout() {
+    // Revoke the signed token server-side; the local session is cleared either way
+    try {
+      await fetch('http://localhost:5000/api/auth/logout', { method: 'POST', headers: authHeaders() });
+    } catch (error) {
+      console.error('Failed to revoke session:', error);
+    }
     setCurrentUser(null);
     localStorage.removeItem('auth_token');
     localStorage.removeItem('user_data');
@@ -95,7 +102,10 @@ export function AuthProvider({ children }: AuthProviderProps) {
     const token = localStorage.getItem('auth_token');
     const userData = localStorage.getItem('user_data');
     
-    if (token && userData) {
+    if (token && userData && isTokenExpired(token)) {
+      localStorage.removeItem('auth_token');
+      localStorage.removeItem('user_data');
+    } else if (token && userData) {
       try {
         const user = JSON.parse(userData);
         setCurrentUser(user);
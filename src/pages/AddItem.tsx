@@ -7,6 +7,8 @@ import { useNavigate } from 'react-router-dom';
 import RecordingInterface from '../components/RecordingInterface';
 import ProgressOverlay from '../components/ProgressOverlay';
 import EquipmentForm from '../components/EquipmentForm';
+import { uploadAndProcessRecording } from '../utils/resumableUpload';
+import { authHeaders } from '../utils/authHeaders';
 
 interface ProcessedData {
   transcript: string;
@@ -97,20 +99,8 @@ export default function AddItem() {
   };
 
   const processAudioRecording = async (audioBlob: Blob) => {
-    const formData = new FormData();
-    formData.append('audio', audioBlob, 'recording.webm');
-
-    // Call the real API endpoint for processing
+    // Upload in resumable chunks, then finalize to run the same processing as /api/process-audio
     // PRD: "/api/process-audio": "POST - Accept audio file, transcribe with Whisper, extract with GPT, research web, return structured data"
-    
-    const response = await fetch(`${process.env.REACT_APP_API_URL}/api/process-audio`, {
-      method: 'POST',
-      body: formData
-    });
-
-    if (!response.ok) {
-      throw new Error('Audio processing failed');
-    }
 
     // Simulate progress updates while waiting for response
     const progressInterval = setInterval(() => {
@@ -120,8 +110,12 @@ export default function AddItem() {
       });
     }, 2000);
 
-    const data = await response.json();
-    clearInterval(progressInterval);
+    let data;
+    try {
+      data = await uploadAndProcessRecording(process.env.REACT_APP_API_URL || '', audioBlob, 'recording.webm');
+    } finally {
+      clearInterval(progressInterval);
+    }
     
     setProcessingStep(4);
     setProcessedData(data);
@@ -136,7 +130,7 @@ export default function AddItem() {
       // First create or link SKU
       const skuResponse = await fetch(`${process.env.REACT_APP_API_URL}/api/skus`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...authHeaders() },
         body: JSON.stringify({
           name: formData.name,
           brand: formData.brand,
@@ -155,7 +149,7 @@ export default function AddItem() {
       // Then create inventory item
       const inventoryResponse = await fetch(`${process.env.REACT_APP_API_URL}/api/inventory`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...authHeaders() },
         body: JSON.stringify({
           sku_id: skuData.sku_id,
           serial_number: formData.serial_number,
@@ -166,7 +160,7 @@ export default function AddItem() {
           purchase_price: formData.purchase_price,
           current_value: formData.current_value,
           notes: formData.notes,
-          created_by: 'current_user' // Would get from auth context
+          created_by: 'current_user' // Replaced server-side by the signed-in user
         })
       });
 
@@ -174,6 +168,11 @@ export default function AddItem() {
         // PRD: success_feedback: "Confirmation screen with options to add another item or view inventory"
         alert('Equipment added successfully!');
         navigate('/inventory');
+      } else if (inventoryResponse.status === 409) {
+        // Barcode or serial number already belongs to another item
+        const conflict = await inventoryResponse.json();
+        alert(conflict.error);
+        return;
       } else {
         throw new Error('Failed to save inventory item');
       }
@@ -3,6 +3,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { MagnifyingGlass } from 'phosphor-react';
+import { authHeaders } from '../utils/authHeaders';
 
 interface InventoryItem {
   id: string;
@@ -36,7 +37,9 @@ export default function Inventory() {
       if (statusFilter) params.append('status', statusFilter);
       if (conditionFilter) params.append('condition', conditionFilter);
 
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/api/inventory?${params.toString()}`);
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/api/inventory?${params.toString()}`, {
+        headers: authHeaders()
+      });
       const data = await response.json();
       setInventory(data.inventory || []);
     } catch (error) {
@@ -3,6 +3,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { MagnifyingGlass, Package } from 'phosphor-react';
+import { authHeaders } from '../utils/authHeaders';
 
 interface SKU {
   id: string;
@@ -41,7 +42,9 @@ export default function SKUs() {
       if (selectedCategory) params.append('category', selectedCategory);
       params.append('group_by_category', viewMode === 'grouped' ? 'true' : 'false');
 
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/api/skus?${params.toString()}`);
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/api/skus?${params.toString()}`, {
+        headers: authHeaders()
+      });
       const data = await response.json();
       
       if (viewMode === 'grouped') {
@@ -0,0 +1,20 @@
+// Authorization header for the protected API routes (inventory, SKUs, logout)
+// The session token is "<kid>.<payload>.<signature>"; the server verifies it, the client only reads its expiry
+
+export function authHeaders(): Record<string, string> {
+  const token = localStorage.getItem('auth_token');
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
+
+export function isTokenExpired(token: string): boolean {
+  const parts = token.split('.');
+  if (parts.length !== 3) {
+    return true; // Tokens from before signed sessions
+  }
+  try {
+    const payload = JSON.parse(atob(parts[1].replace(/-/g, '+').replace(/_/g, '/')));
+    return typeof payload.exp !== 'number' || payload.exp * 1000 <= Date.now();
+  } catch {
+    return true;
+  }
+}
@@ -0,0 +1,68 @@
+// Resumable chunked upload for recordings on flaky godown Wi-Fi
+// PRD: audio_handling: "Save uploaded file temporarily, send to Whisper API"
+// Sends the recording in chunks and resumes from the server's acknowledged offset after a dropped connection
+
+const CHUNK_SIZE = 256 * 1024;
+const MAX_ATTEMPTS = 5;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+async function getServerOffset(uploadUrl: string): Promise<number> {
+  const response = await fetch(uploadUrl);
+  if (!response.ok) {
+    throw new Error('Upload session lost');
+  }
+  const status = await response.json();
+  return status.offset;
+}
+
+export async function uploadAndProcessRecording(apiUrl: string, audioBlob: Blob, filename: string = 'recording.webm'): Promise<any> {
+  const sessionResponse = await fetch(`${apiUrl}/api/uploads`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename, size: audioBlob.size })
+  });
+  if (!sessionResponse.ok) {
+    throw new Error('Could not start upload');
+  }
+  const session = await sessionResponse.json();
+  const uploadUrl = `${apiUrl}/api/uploads/${session.upload_id}`;
+
+  let offset = 0;
+  let attempts = 0;
+  while (offset < audioBlob.size) {
+    const end = Math.min(offset + CHUNK_SIZE, audioBlob.size) - 1;
+    try {
+      const response = await fetch(uploadUrl, {
+        method: 'PUT',
+        headers: { 'Content-Range': `bytes ${offset}-${end}/${audioBlob.size}` },
+        body: audioBlob.slice(offset, end + 1)
+      });
+      if (response.status === 409) {
+        offset = (await response.json()).offset;
+        continue;
+      }
+      if (!response.ok) {
+        // 4xx other than 409 (bad format, too large) will not succeed on retry
+        const error = await response.json().catch(() => ({}));
+        throw Object.assign(new Error(error.error || 'Upload failed'), { fatal: response.status < 500 });
+      }
+      offset = (await response.json()).offset;
+      attempts = 0;
+    } catch (error: any) {
+      attempts += 1;
+      if (error.fatal || attempts >= MAX_ATTEMPTS) {
+        throw error;
+      }
+      // Connection dropped: back off, then continue from whatever the server actually stored
+      await sleep(500 * 2 ** attempts);
+      offset = await getServerOffset(uploadUrl).catch(() => offset);
+    }
+  }
+
+  const finalizeResponse = await fetch(`${uploadUrl}/finalize`, { method: 'POST' });
+  if (!finalizeResponse.ok) {
+    throw new Error('Audio processing failed');
+  }
+  return finalizeResponse.json();
+}
\ No newline at end of file
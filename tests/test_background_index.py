@@ -0,0 +1,59 @@
+# BackgroundIndex: first-use waits, write-through during a build and retries after a failed build
+#   python -m pytest tests
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import pytest
+import background_index
+from background_index import BackgroundIndex
+
+class View:
+    def __init__(self, seen=None):
+        self.seen = set(seen or ())
+        self.added = []
+
+    def add(self, value):
+        self.added.append(value)
+
+@pytest.fixture(autouse=True)
+def fake_db(monkeypatch):
+    monkeypatch.setattr(background_index, 'get_firestore_client', lambda: object())
+
+def test_first_use_waits_for_the_build():
+    index = BackgroundIndex("test", lambda db: View(), refresh_seconds=60)
+    assert isinstance(index.current(), View)
+
+def test_writes_during_a_build_are_replayed_unless_seen():
+    release = threading.Event()
+
+    def build(db):
+        release.wait(5)
+        return View(seen={"seen-doc"})
+
+    index = BackgroundIndex("test", build, refresh_seconds=60)
+    index.warm()
+    index.apply("seen-doc", 'add', 1)
+    index.apply("new-doc", 'add', 2)
+    index.apply(None, 'add', 3)
+    release.set()
+    assert index.current().added == [2, 3]
+
+def test_failed_first_build_is_retried_and_waited_for():
+    builds = []
+
+    def build(db):
+        builds.append(1)
+        if len(builds) == 1:
+            raise RuntimeError("first build fails")
+        time.sleep(0.2)  # Slow enough that a caller not waiting for the retry would get None
+        return View()
+
+    index = BackgroundIndex("test", build, refresh_seconds=60)
+    assert index.current() is None
+    assert isinstance(index.current(), View)
+    assert len(builds) == 2
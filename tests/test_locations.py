@@ -0,0 +1,68 @@
+# Location parsing: free text to zone > cabinet > shelf labels and a location_path prefix
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import pytest
+from locations import location_fields, location_prefix_path, parse_location
+
+@pytest.mark.parametrize("location, path, zone, cabinet, shelf", [
+    # Keyword levels; a level that was not given is "_"
+    ("Cabinet A, Shelf 2", "_/cabinet-a/shelf-2/", "", "Cabinet A", "Shelf 2"),
+    ("Studio B > Rack C > Shelf 4", "studio-b/rack-c/shelf-4/", "Studio B", "Rack C", "Shelf 4"),
+    ("Shelf 2", "_/_/shelf-2/", "", "", "Shelf 2"),
+    # Parts beyond the shelf are appended to it
+    ("Studio B, Cabinet A, Shelf 2, Left", "studio-b/cabinet-a/shelf-2-left/", "Studio B", "Cabinet A", "Shelf 2, Left"),
+    # Keyword levels are placed by keyword, not by position
+    ("Rack C, Zone 1", "zone-1/rack-c/", "Zone 1", "Rack C", ""),
+    # Parts without a keyword fill the level after the last one assigned
+    ("Warehouse, Top shelf, Bin 4, Front", "warehouse/top-shelf/bin-4-front/", "Warehouse", "Top shelf", "Bin 4, Front"),
+    ("Store room", "store-room/", "Store room", "", ""),
+    # "cab" is an alias, so it shares nodes with "cabinet"
+    ("cab 3 / shelf 1", "_/cabinet-3/shelf-1/", "", "cab 3", "shelf 1"),
+    # Casing, spacing and punctuation do not make new nodes
+    ("  CABINET  a ,shelf   2 ", "_/cabinet-a/shelf-2/", "", "CABINET a", "shelf 2"),
+    ("Cabinet #A; Shelf: 2", "_/cabinet-a/shelf-2/", "", "Cabinet #A", "Shelf: 2"),
+    # A keyword must be a whole word
+    ("Bayside", "bayside/", "Bayside", "", ""),
+    ("", "_/", "", "", ""),
+    (None, "_/", "", "", "")
+])
+def test_location_fields(location, path, zone, cabinet, shelf):
+    assert location_fields(location) == {
+        "location_path": path,
+        "location_zone": zone,
+        "location_cabinet": cabinet,
+        "location_shelf": shelf
+    }
+
+def test_repeated_level_moves_to_the_next_one():
+    assert parse_location("Cabinet A, Cabinet B") == {
+        "cabinet": ("cabinet-a", "Cabinet A"),
+        "shelf": ("cabinet-b", "Cabinet B")
+    }
+
+def test_every_node_is_a_prefix_of_its_items():
+    path = location_fields("Studio B, Cabinet A, Shelf 2")["location_path"]
+    for node in ("studio-b/", "studio-b/cabinet-a/", "studio-b/cabinet-a/shelf-2/"):
+        assert path.startswith(node)
+    # Sibling names sharing a prefix stay apart
+    assert not location_fields("Cabinet A2")["location_path"].startswith(location_fields("Cabinet A")["location_path"])
+
+@pytest.mark.parametrize("prefix, path", [
+    # Tree node paths are used as they are, with the trailing slash added
+    ("studio-b/rack-c", "studio-b/rack-c/"),
+    ("_/cabinet-a/shelf-2/", "_/cabinet-a/shelf-2/"),
+    ("_/cabinet-a", "_/cabinet-a/"),
+    # Free text is parsed like an item's location
+    ("Studio B", "studio-b/"),
+    ("Cabinet A", "_/cabinet-a/"),
+    ("Cabinet A, Shelf 2", "_/cabinet-a/shelf-2/"),
+    ("cab a / shelf 2", "_/cabinet-a/shelf-2/"),
+    (" studio-b ", "studio-b/")
+])
+def test_location_prefix_path(prefix, path):
+    assert location_prefix_path(prefix) == path
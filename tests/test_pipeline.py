@@ -0,0 +1,61 @@
+# Pipeline stage cache: only complete results are kept, so stand-ins are recomputed on the next run
+#   python -m pytest tests
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import pytest
+from pipeline import Pipeline, Stage
+from process_audio import fallback_result
+
+def counting_pipeline(result):
+    """Pipeline with one cached stage returning result(deadline); returns (pipeline, calls)"""
+    calls = []
+
+    def research(deadline, query):
+        calls.append(query)
+        return result(deadline)
+
+    async def research_async(deadline, query):
+        return research(deadline, query)
+
+    stage = Stage("research", research, inputs=["query"], cache=True, async_fn=research_async)
+    return Pipeline("test", [stage]), calls
+
+def run_twice(pipeline, use_async):
+    if use_async:
+        return [asyncio.run(pipeline.run_async({"query": "canon r5"})) for _ in range(2)]
+    return [pipeline.run({"query": "canon r5"}) for _ in range(2)]
+
+def timed_out(deadline):
+    deadline.mark_timed_out()
+    return {"specifications": {"note": "Research timed out"}}
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_complete_result_is_cached(use_async):
+    pipeline, calls = counting_pipeline(lambda deadline: {"specifications": {"sensor": "full frame"}})
+    first, second = run_twice(pipeline, use_async)
+    assert len(calls) == 1
+    assert second.cache_hits == ["research"]
+    assert second["research"] == first["research"]
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("result", [
+    lambda deadline: fallback_result({"specifications": {"note": "Web research temporarily unavailable"}}),
+    lambda deadline: {"specifications": {}, "partial": True},
+    timed_out,
+    lambda deadline: None
+], ids=["degraded", "partial", "timed_out", "none"])
+def test_stand_in_result_is_recomputed(use_async, result):
+    pipeline, calls = counting_pipeline(result)
+    first, second = run_twice(pipeline, use_async)
+    assert len(calls) == 2
+    assert second.cache_hits == []
+
+def test_cached_value_is_a_copy():
+    pipeline, calls = counting_pipeline(lambda deadline: {"images": ["a.jpg"]})
+    pipeline.run({"query": "canon r5"})["research"]["images"].append("mutated.jpg")
+    assert pipeline.run({"query": "canon r5"})["research"] == {"images": ["a.jpg"]}
@@ -0,0 +1,71 @@
+# Session token verification: every rejected token raises InvalidToken (a 401), never an unhandled error (a 500)
+#   python -m pytest tests
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import pytest
+import session_tokens
+from session_tokens import InvalidToken, RevocationList, decode_token, issue_token, verify_token
+
+@pytest.fixture(autouse=True)
+def no_firestore(monkeypatch):
+    monkeypatch.setattr(session_tokens, 'get_firestore_client', lambda: None)
+
+def test_valid_token():
+    token = issue_token("user-1")["token"]
+    assert decode_token(token)["sub"] == "user-1"
+
+def test_tampered_token():
+    kid, payload, signature = issue_token("user-1")["token"].split('.')
+    other_payload = issue_token("user-2")["token"].split('.')[1]
+    with pytest.raises(InvalidToken, match="Bad token signature"):
+        decode_token(f"{kid}.{other_payload}.{signature}")
+    flipped = ('B' if signature[0] == 'A' else 'A') + signature[1:]
+    with pytest.raises(InvalidToken, match="Bad token signature"):
+        decode_token(f"{kid}.{payload}.{flipped}")
+
+def test_unknown_key():
+    _, payload, signature = issue_token("user-1")["token"].split('.')
+    with pytest.raises(InvalidToken, match="unknown key"):
+        decode_token(f"retired.{payload}.{signature}")
+
+def test_expired_token():
+    token = issue_token("user-1", ttl_seconds=-1)["token"]
+    with pytest.raises(InvalidToken, match="Token expired"):
+        decode_token(token)
+
+def test_revoked_token(monkeypatch):
+    monkeypatch.setattr(session_tokens, 'revocations', RevocationList(refresh_seconds=float('inf')))
+    token = issue_token("user-1")["token"]
+    claims = verify_token(token)
+    session_tokens.revocations.revoke(claims)
+    with pytest.raises(InvalidToken, match="Token revoked"):
+        verify_token(token)
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not-a-token",
+    "a.b.c.d",
+    f"{session_tokens.SIGNING_KID}.é.x",
+    f"{session_tokens.SIGNING_KID}.eyJzdWIiOiJ1In0.é",
+    "dév.payload.signature"
+])
+def test_malformed_token(token):
+    with pytest.raises(InvalidToken):
+        decode_token(token)
+
+def test_malformed_bearer_token_is_unauthorized():
+    from flask import Flask
+
+    app = Flask(__name__)
+
+    @app.route('/protected')
+    @session_tokens.require_auth
+    def protected():
+        return "ok"
+
+    response = app.test_client().get('/protected', headers={"Authorization": f"Bearer {session_tokens.SIGNING_KID}.é.x"})
+    assert response.status_code == 401
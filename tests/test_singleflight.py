@@ -0,0 +1,162 @@
+# Singleflight: followers share the leader's result, error and partial flag, and give up on a slow leader
+#   python -m pytest tests
+
+import asyncio
+import fcntl
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import pytest
+import process_audio
+from deadline import Deadline
+from singleflight import SingleFlight, file_lock_factory
+
+def wait_for(condition, seconds: float = 5.0):
+    give_up_at = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < give_up_at, "condition not reached"
+        time.sleep(0.005)
+
+class BlockedCall:
+    """fn for SingleFlight.do that blocks until released and counts how often it ran"""
+
+    def __init__(self, result=None, error=None):
+        self.release = threading.Event()
+        self.calls = 0
+        self.result = result
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def run_callers(flights, key, fn, count, timeout=None):
+    """Start a leader, then count - 1 followers once it is in flight; returns (threads, results)"""
+    results = [None] * count
+
+    def call(position):
+        try:
+            results[position] = flights.do(key, fn, timeout=timeout)
+        except Exception as e:
+            results[position] = e
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    wait_for(lambda: key in flights.in_flight())
+    for position in range(1, count):
+        threads.append(threading.Thread(target=call, args=(position,)))
+        threads[-1].start()
+    return threads, results
+
+def test_followers_share_the_leaders_result():
+    flights = SingleFlight()
+    fn = BlockedCall(result={"specifications": {}})
+    threads, results = run_callers(flights, "research:canon r5", fn, 4)
+    wait_for(lambda: flights.in_flight().get("research:canon r5") == 3)
+    fn.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert fn.calls == 1
+    assert all(result is results[0] for result in results)
+    assert flights.in_flight() == {}
+
+def test_followers_share_the_leaders_error():
+    flights = SingleFlight()
+    fn = BlockedCall(error=RuntimeError("backend down"))
+    threads, results = run_callers(flights, "research:canon r5", fn, 3)
+    wait_for(lambda: flights.in_flight().get("research:canon r5") == 2)
+    fn.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert fn.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_follower_computes_itself_when_the_leader_is_too_slow():
+    flights = SingleFlight()
+    fn = BlockedCall(result="shared")
+    threads, results = run_callers(flights, "research:canon r5", fn, 1)
+    own = BlockedCall(result="own")
+    own.release.set()
+    started = time.monotonic()
+    assert flights.do("research:canon r5", own, timeout=0.05) == "own"
+    assert time.monotonic() - started < 1
+    fn.release.set()
+    threads[0].join(5)
+    assert results == ["shared"]
+
+def test_followers_share_the_leaders_partial_flag():
+    release = threading.Event()
+    leader_deadline = Deadline(10).stage("research")
+    follower_deadline = Deadline(10).stage("research")
+    results = {}
+
+    def research():
+        release.wait(5)
+        leader_deadline.mark_timed_out()
+        return {"specifications": {"note": "Research timed out"}, "partial": True}
+
+    def call(name, deadline):
+        results[name] = process_audio.coalesced("research:partial", research, deadline, "research")
+
+    leader = threading.Thread(target=call, args=("leader", leader_deadline))
+    leader.start()
+    wait_for(lambda: "research:partial" in process_audio.pipeline_flights.in_flight())
+    follower = threading.Thread(target=call, args=("follower", follower_deadline))
+    follower.start()
+    wait_for(lambda: process_audio.pipeline_flights.in_flight().get("research:partial") == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert follower_deadline.root.timed_out_stages == ["research"]
+    # Each caller gets its own copy to mutate
+    assert results["follower"] == results["leader"]
+    assert results["follower"] is not results["leader"]
+
+def test_async_followers_share_the_leaders_result():
+    flights = SingleFlight()
+    calls = []
+
+    async def research():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"specifications": {}}
+
+    async def main():
+        return await asyncio.gather(*(flights.do_async("research:canon r5", research) for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result == {"specifications": {}} for result in results)
+
+def test_file_lock_is_skipped_after_the_timeout(tmp_path):
+    lock = file_lock_factory(str(tmp_path))
+    with lock("research:canon r5"):
+        # A second open file description conflicts with the first, as another process's would
+        lock_file = next(tmp_path.iterdir())
+        with open(lock_file, 'w') as other:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        waited = []
+
+        def contender():
+            started = time.monotonic()
+            with lock("research:canon r5", timeout=0.1):
+                waited.append(time.monotonic() - started)
+
+        thread = threading.Thread(target=contender, daemon=True)
+        thread.start()
+        thread.join(2)
+        assert waited and 0.1 <= waited[0] < 1
+
+    # Released once the holder is done
+    with lock("research:canon r5", timeout=0.1):
+        pass
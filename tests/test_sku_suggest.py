@@ -0,0 +1,86 @@
+# SKU typeahead: the trie's per-node top-k matches a brute-force ranking, across bucket bursts and count updates
+#   python -m pytest tests
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import pytest
+from sku_suggest import BUCKET_SIZE, MAX_KEY_LENGTH, SkuSuggester, normalize, sku_keys
+
+BRANDS = ["Canon", "Sony", "Nikon", "Sigma", "Godox", "Aputure"]
+WORDS = ["EOS", "R5", "R6", "Mark", "II", "lens", "24-70mm", "f/2.8", "light", "softbox", "kit", "body"]
+
+def random_skus(rng, count):
+    skus = {}
+    for index in range(count):
+        brand = rng.choice(BRANDS)
+        model = ' '.join(rng.sample(WORDS, rng.randint(1, 3)))
+        # Some names run past MAX_KEY_LENGTH, so truncated keys are covered too
+        name = f"{brand} {model}" + (" professional cinema edition" if index % 7 == 0 else "")
+        skus[f"sku-{index:03d}"] = {"name": name, "brand": brand, "model": model, "category": "Cameras"}
+    return skus
+
+def brute_force(skus, keys, counts, prefix, limit):
+    key = normalize(prefix)[:MAX_KEY_LENGTH]
+    matches = [sku_id for sku_id in skus if any(k.startswith(key) for k in keys[sku_id])]
+    matches.sort(key=lambda sku_id: (-counts.get(sku_id, 0), str(skus[sku_id]['name']), sku_id))
+    return matches[:limit]
+
+def assert_matches_brute_force(suggester, skus, counts):
+    keys = {sku_id: sku_keys(sku) for sku_id, sku in skus.items()}
+    prefixes = {key[:end] for sku_key_list in keys.values() for key in sku_key_list for end in (1, 2, 4, 7, len(key))}
+    prefixes.update(["", "zz", "canon zz", "x" * 40])
+    for prefix in sorted(prefixes):
+        for limit in (1, suggester.top_k):
+            got = [result["id"] for result in suggester.suggest(prefix, limit)]
+            assert got == brute_force(skus, keys, counts, prefix, limit), prefix
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_suggest_matches_brute_force_after_bursts(seed):
+    rng = random.Random(seed)
+    skus = random_skus(rng, 120)
+    counts = {}
+    suggester = SkuSuggester(top_k=5)
+
+    # Counts arrive before, between and after the SKUs they belong to, as the build scan and writes interleave
+    for sku_id, sku in skus.items():
+        for other in rng.sample(list(skus), 3):
+            amount = rng.randint(1, 4)
+            suggester.add_items(other, amount)
+            counts[other] = counts.get(other, 0) + amount
+        suggester.add_sku(sku_id, sku)
+
+    # Far more keys than one bucket holds, so leaves have burst more than one level down
+    assert len(suggester.root.children) > 1
+    assert any(child.children for child in suggester.root.children.values())
+    assert_matches_brute_force(suggester, skus, counts)
+
+    # Counts only grow; a SKU moving up must reach the top lists of every node on its paths
+    for sku_id in rng.sample(list(skus), 40):
+        amount = rng.randint(1, 30)
+        suggester.add_items(sku_id, amount)
+        counts[sku_id] = counts.get(sku_id, 0) + amount
+    assert_matches_brute_force(suggester, skus, counts)
+
+def test_bucket_bursts_at_its_limit():
+    suggester = SkuSuggester()
+    skus = {f"sku-{index}": {"name": f"Softbox {index:02d}", "brand": "", "model": ""} for index in range(BUCKET_SIZE + 1)}
+    for sku_id, sku in list(skus.items())[:BUCKET_SIZE]:
+        suggester.add_sku(sku_id, sku)
+    # Each name gives two keys ("softbox nn" and "nn"), so the root has already burst once
+    softbox = suggester.root.children["s"]
+    assert softbox.children is None and len(softbox.bucket) == BUCKET_SIZE
+
+    suggester.add_sku(f"sku-{BUCKET_SIZE}", skus[f"sku-{BUCKET_SIZE}"])
+    assert softbox.children is not None and softbox.bucket is None
+    assert [result["id"] for result in suggester.suggest("softbox 0", 20)] == list(skus)
+
+def test_adding_a_sku_twice_is_ignored():
+    suggester = SkuSuggester()
+    suggester.add_sku("sku-1", {"name": "Canon EOS R5", "brand": "Canon", "model": "EOS R5"})
+    suggester.add_sku("sku-1", {"name": "Canon EOS R5", "brand": "Canon", "model": "EOS R5"})
+    assert [result["id"] for result in suggester.suggest("canon")] == ["sku-1"]
+    assert suggester.suggest_brands("can") == [{"brand": "Canon", "sku_count": 1, "inventory_count": 0}]